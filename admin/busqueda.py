@@ -0,0 +1,121 @@
+# ==admin/busqueda.py #064
+import re
+import sqlite3
+from typing import List, Optional, Tuple
+
+from usuarios.entidades import normalizar_nombre
+
+# --- Búsqueda de texto completo en solicitudes y entidades ---
+# Usa los índices FTS5 de la migración 10 (solicitudes_fts, entidades_fts).
+# El texto del usuario nunca se pasa tal cual a MATCH (su sintaxis tiene operadores
+# y comillas): se parte en palabras y cada una se busca como prefijo, todas
+# obligatorias. "juan@expo" -> "juan"* AND "expo"*
+#
+# Orden: bm25 (menor = más relevante), con pesos por columna: una coincidencia en
+# la clave de exportador o en el nombre pesa más que una en el mensaje.
+
+_PALABRAS = re.compile(r"\w+", re.UNICODE)
+MAX_PALABRAS = 8
+# nombre_completo, email, nombre_organizacion, clave_exportador, mensaje_solicitud
+PESOS_SOLICITUDES = (4.0, 3.0, 4.0, 5.0, 1.0)
+
+
+def palabras_busqueda(texto: str) -> List[str]:
+    return _PALABRAS.findall(texto or "")[:MAX_PALABRAS]
+
+
+def consulta_fts(texto: str) -> Optional[str]:
+    """Expresión MATCH segura para el texto del usuario; None si no tiene palabras."""
+    palabras = palabras_busqueda(texto)
+    if not palabras:
+        return None
+    return " AND ".join(f'"{palabra}"*' for palabra in palabras)
+
+
+def fragmento(textos: List[Optional[str]], palabras: List[str], contexto: int = 12) -> str:
+    """
+    Fragmento del primer texto con coincidencias, con las palabras encontradas entre [ ].
+    Se arma en Python con las columnas ya leídas: snippet() de FTS5 vuelve a recorrer
+    la lista de coincidencias por cada fila y con términos frecuentes cuesta milisegundos.
+    """
+    prefijos = [normalizar_nombre(p) for p in palabras]
+    for texto in textos:
+        if not texto:
+            continue
+        tokens = texto.split()
+        marcas = [
+            any(parte.startswith(p) for parte in _PALABRAS.findall(normalizar_nombre(t)) for p in prefijos)
+            for t in tokens
+        ]
+        if not any(marcas):
+            continue
+        inicio = max(0, marcas.index(True) - contexto // 3)
+        fin = min(len(tokens), inicio + contexto)
+        partes = [f"[{t}]" if m else t for t, m in zip(tokens[inicio:fin], marcas[inicio:fin])]
+        return ("…" if inicio else "") + " ".join(partes) + ("…" if fin < len(tokens) else "")
+    return ""
+
+
+def buscar_solicitudes(conn: sqlite3.Connection, texto: str, estado: Optional[str], limite: int,
+                       despues_de: Optional[Tuple[float, int]] = None) -> List[tuple]:
+    """
+    Filas (id_solicitud, nombre_completo, email, nombre_organizacion, tipo_entidad_solicitada,
+    fecha_solicitud, estado, clave_exportador, fragmento, puntaje) en orden de relevancia.
+    despues_de = (puntaje, id_solicitud) de la última fila de la página anterior.
+
+    Ordenar exige calcular bm25 para todas las coincidencias; para que eso sea lo único
+    proporcional a ellas, el orden se calcula solo con (rowid, puntaje) y las columnas
+    y fragmentos se leen y arman después, solo para la página.
+    """
+    palabras = palabras_busqueda(texto)
+    consulta = consulta_fts(texto)
+    if consulta is None:
+        return []
+    union, condiciones = "", ["solicitudes_fts MATCH ?"]
+    parametros = [*PESOS_SOLICITUDES, consulta]
+    if estado is not None:
+        union = "JOIN solicitudes_registro AS s ON s.id_solicitud = f.rowid"
+        condiciones.append("s.estado = ?")
+        parametros.append(estado)
+    if despues_de is not None:
+        condiciones.append("(bm25(solicitudes_fts, ?, ?, ?, ?, ?), f.rowid) > (?, ?)")
+        parametros += [*PESOS_SOLICITUDES, *despues_de]
+    pagina = conn.execute(f"""
+        SELECT f.rowid, bm25(solicitudes_fts, ?, ?, ?, ?, ?) AS puntaje
+        FROM solicitudes_fts AS f {union}
+        WHERE {" AND ".join(condiciones)}
+        ORDER BY puntaje, f.rowid
+        LIMIT ?
+    """, (*parametros, limite)).fetchall()
+    if not pagina:
+        return []
+
+    ids = [fila[0] for fila in pagina]
+    filas = {fila[0]: fila for fila in conn.execute(f"""
+        SELECT id_solicitud, nombre_completo, email, nombre_organizacion,
+               tipo_entidad_solicitada, fecha_solicitud, estado, clave_exportador, mensaje_solicitud
+        FROM solicitudes_registro WHERE id_solicitud IN ({",".join("?" * len(ids))})
+    """, ids).fetchall()}
+    resultado = []
+    for id_solicitud, puntaje in pagina:
+        fila = filas.get(id_solicitud)
+        if fila is None:
+            continue
+        # Fragmento en el orden de los pesos: clave, nombre, organización, email, mensaje
+        texto_fragmento = fragmento([fila[7], fila[1], fila[3], fila[2], fila[8]], palabras)
+        resultado.append((*fila[:8], texto_fragmento, puntaje))
+    return resultado
+
+
+def buscar_entidades(conn: sqlite3.Connection, texto: str, limite: int) -> List[tuple]:
+    """Filas (id_entidad, tipo, nombre) en orden de relevancia."""
+    consulta = consulta_fts(texto)
+    if consulta is None:
+        return []
+    return conn.execute("""
+        SELECT e.id_entidad, e.tipo, e.nombre
+        FROM entidades_fts AS f JOIN entidades AS e ON e.id_entidad = f.rowid
+        WHERE entidades_fts MATCH ?
+        ORDER BY f.rank
+        LIMIT ?
+    """, (consulta, limite)).fetchall()
@@ -0,0 +1,130 @@
+# ==admin/eventos.py #062
+import asyncio
+import json
+import secrets
+import threading
+import time
+from collections import deque
+from typing import List, NamedTuple, Optional, Tuple
+
+# --- Eventos de solicitudes (pub/sub en proceso) ---
+# Los endpoints que crean, aprueban o rechazan solicitudes publican un evento
+# DESPUÉS del COMMIT (escritor.despues_del_commit). Cada conexión SSE de
+# /admin/solicitudes/eventos es un suscriptor con su propia cola asyncio.
+#
+# Los últimos MAX_HISTORIAL eventos se guardan para reenviarlos a un cliente que
+# se reconecta con Last-Event-ID. El id SSE es "<época>-<n>": n es un contador que
+# vuelve a 1 con cada arranque y la época es aleatoria por instancia del bus, así
+# un id de otro proceso o de antes de un reinicio nunca se confunde con uno actual
+# aunque su n coincida. Si la época no es la nuestra, o el id ya no está en el
+# historial, se envía un evento 'recargar' para que el cliente vuelva a pedir el listado.
+#
+# Es por proceso: con varios workers, cada uno ve solo sus propios eventos.
+
+MAX_HISTORIAL = 1000
+MAX_COLA_SUSCRIPTOR = 1000
+
+
+class Evento(NamedTuple):
+    id: int
+    tipo: str      # solicitud_creada | solicitud_aprobada | solicitud_rechazada
+    datos: dict
+    instante: float
+    epoca: str
+
+    def como_sse(self) -> str:
+        return f"id: {self.epoca}-{self.id}\nevent: {self.tipo}\ndata: {json.dumps(self.datos, ensure_ascii=False)}\n\n"
+
+
+class _Suscriptor:
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.cola: "asyncio.Queue[Optional[Evento]]" = asyncio.Queue(MAX_COLA_SUSCRIPTOR)
+        self.desbordado = False
+
+    def entregar(self, evento: Optional[Evento]):
+        """Corre en el loop del suscriptor (call_soon_threadsafe)."""
+        if self.desbordado:
+            return
+        try:
+            self.cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            # Cliente demasiado lento: se le cierra el flujo y se reconecta con Last-Event-ID
+            self.desbordado = True
+            self.cola.get_nowait()
+            self.cola.put_nowait(None)
+
+
+class BusEventos:
+    def __init__(self, max_historial: int = MAX_HISTORIAL):
+        self._lock = threading.Lock()
+        self._historial: "deque[Evento]" = deque(maxlen=max_historial)
+        self.epoca = secrets.token_hex(4)
+        self._ultimo_id = 0
+        self._suscriptores: List[_Suscriptor] = []
+        self.publicados = 0
+
+    def publicar(self, tipo: str, datos: dict) -> Evento:
+        """Publica desde cualquier hilo (normalmente una acción posterior al COMMIT)."""
+        with self._lock:
+            self._ultimo_id += 1
+            evento = Evento(self._ultimo_id, tipo, datos, time.time(), self.epoca)
+            self._historial.append(evento)
+            suscriptores = list(self._suscriptores)
+            self.publicados += 1
+        for suscriptor in suscriptores:
+            try:
+                suscriptor.loop.call_soon_threadsafe(suscriptor.entregar, evento)
+            except RuntimeError:
+                pass  # Loop cerrado: la conexión ya terminó
+        return evento
+
+    def _numero(self, ultimo_id: str) -> Optional[int]:
+        """n de un id SSE "<época>-<n>" de esta instancia; None si es de otra época o no es válido."""
+        epoca, _, numero = ultimo_id.rpartition("-")
+        if epoca != self.epoca or not numero.isdigit():
+            return None
+        return int(numero)
+
+    def suscribir(self, ultimo_id: Optional[str] = None) -> Tuple[_Suscriptor, List[Evento], bool]:
+        """
+        Registra un suscriptor (llamar desde el loop de asyncio). ultimo_id es el
+        Last-Event-ID tal como lo envía el cliente.
+        Devuelve (suscriptor, eventos a reenviar, completo). completo = False si
+        ultimo_id es de otra época o ya no está en el historial y el cliente debe recargar.
+        """
+        suscriptor = _Suscriptor(asyncio.get_running_loop())
+        with self._lock:
+            self._suscriptores.append(suscriptor)
+            if ultimo_id is None:
+                return suscriptor, [], True
+            ultimo_id = self._numero(ultimo_id)
+            if ultimo_id is None:
+                return suscriptor, [], False
+            primero = self._historial[0].id if self._historial else self._ultimo_id + 1
+            if not primero - 1 <= ultimo_id <= self._ultimo_id:
+                return suscriptor, [], False
+            return suscriptor, [e for e in self._historial if e.id > ultimo_id], True
+
+    def desuscribir(self, suscriptor: _Suscriptor):
+        with self._lock:
+            if suscriptor in self._suscriptores:
+                self._suscriptores.remove(suscriptor)
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {
+                "suscriptores": len(self._suscriptores),
+                "publicados": self.publicados,
+                "epoca": self.epoca,
+                "ultimo_id": self._ultimo_id,
+                "en_historial": len(self._historial),
+            }
+
+
+bus_solicitudes = BusEventos()
+
+
+def publicar_solicitud(tipo: str, id_solicitud: int, estado: str, **datos):
+    """Atajo para los endpoints: publica con los campos comunes de una solicitud."""
+    bus_solicitudes.publicar(tipo, {"id_solicitud": id_solicitud, "estado": estado, **datos})
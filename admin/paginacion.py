@@ -0,0 +1,61 @@
+# ==admin/paginacion.py #056
+import base64
+import json
+import threading
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from base_datos.secuencias import valor_actual
+
+# --- Paginación por cursor (keyset) ---
+# En lugar de OFFSET (que recorre y descarta todas las filas anteriores), cada
+# página termina con un cursor opaco con la clave de orden de su última fila;
+# la página siguiente continúa con WHERE (clave) < (cursor) sobre el índice.
+
+
+def codificar_cursor(*valores) -> str:
+    """Cursor opaco (base64 url-safe) con los valores de la clave de orden."""
+    return base64.urlsafe_b64encode(json.dumps(valores, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str, cantidad: int) -> tuple:
+    """Valores del cursor; ValueError si está mal formado."""
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Cursor inválido.") from e
+    if not isinstance(valores, list) or len(valores) != cantidad:
+        raise ValueError("Cursor inválido.")
+    return tuple(valores)
+
+
+# --- Conteos en caché por versión ---
+# COUNT(*) recorre todo el rango del índice. El total de cada combinación de filtros
+# se guarda junto con el contador de versión de la tabla (tabla secuencias), que
+# aumentan los trabajos del escritor que la modifican. Mientras la versión no cambie,
+# el total guardado es exacto; leer la versión es una búsqueda por clave primaria.
+
+
+class CacheConteos:
+    def __init__(self, ambito_version: str, max_entradas: int = 256):
+        self.ambito_version = ambito_version
+        self.max_entradas = max_entradas
+        self._lock = threading.Lock()
+        self._conteos: Dict[Hashable, Tuple[int, int]] = {}  # filtros -> (version, total)
+        self.aciertos = 0
+        self.fallos = 0
+
+    def contar(self, conn, filtros: Hashable, calcular: Callable[[], int]) -> int:
+        version = valor_actual(conn, self.ambito_version)
+        with self._lock:
+            guardado: Optional[Tuple[int, int]] = self._conteos.get(filtros)
+            if guardado is not None and guardado[0] == version:
+                self.aciertos += 1
+                return guardado[1]
+            self.fallos += 1
+        total = calcular()
+        with self._lock:
+            if len(self._conteos) >= self.max_entradas:
+                self._conteos.clear()
+            self._conteos[filtros] = (version, total)
+        return total
@@ -1,14 +1,24 @@
 # ==admin/solicitudes.py #019 (Versión actualizada con autenticación real)
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, Header
+from fastapi.responses import StreamingResponse
+import asyncio
 import sqlite3
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from typing import List, Optional
 from pydantic import BaseModel
 
 # Importaciones reales
-from auth.seguridad import get_admin_ihcafe_actual # Importamos la nueva dependencia
-from usuarios.modelos import Usuario # Asegúrate de que este modelo exista
-from config.settings import DB_NAME
+from auth.seguridad import get_admin_ihcafe_actual, require_role # Importamos la nueva dependencia
+from usuarios.modelos import UsuarioToken
+from base_datos.conexion import get_conexion, obtener_conexion
+from base_datos.escritor import escritor
+from usuarios.cache import cache_usuarios
+from auth.hash_pool import pool_hash
+from usuarios.entidades import cache_entidades, resolver_entidad
+from base_datos.secuencias import siguiente_numero
+from admin.paginacion import CacheConteos, codificar_cursor, decodificar_cursor
+from admin.eventos import bus_solicitudes, publicar_solicitud
+from admin.busqueda import consulta_fts, buscar_solicitudes, buscar_entidades
 
 router = APIRouter(prefix="/admin/solicitudes", tags=["Administración - Solicitudes"])
 
@@ -29,58 +39,241 @@ class SolicitudDetalle(SolicitudResumen):
     cargo_relacion: Optional[str] = None
     telefono_contacto: Optional[str] = None
 
+class PaginaSolicitudes(BaseModel):
+    solicitudes: List[SolicitudResumen]
+    total: int                       # Con los mismos filtros, sin paginar
+    siguiente: Optional[str] = None  # Cursor de la página siguiente (None: última página)
+
+# Cambios en solicitudes_registro: aumentan este contador (tabla secuencias) para
+# invalidar los totales en caché de todos los procesos
+VERSION_SOLICITUDES = "solicitudes_registro"
+ESTADOS = ("PENDIENTE", "APROBADA", "RECHAZADA")
+TIPOS_ENTIDAD = ("EXPORTADOR", "GESTOR")
+LIMITE_MAXIMO = 200
+
+conteos_solicitudes = CacheConteos(VERSION_SOLICITUDES)
+
+
+def _listar_solicitudes(conn: sqlite3.Connection, estado: Optional[str], tipo_entidad: Optional[str],
+                        desde: Optional[date], hasta: Optional[date], limite: int,
+                        cursor: Optional[str]) -> PaginaSolicitudes:
+    """
+    Página de solicitudes, más recientes primero, ordenadas por (fecha_solicitud, id_solicitud).
+    Índices: (estado, fecha_solicitud), (estado, tipo_entidad_solicitada, fecha_solicitud)
+    y (fecha_solicitud); la clave del cursor continúa el recorrido del índice.
+    """
+    if estado is not None and estado not in ESTADOS:
+        raise HTTPException(status_code=400, detail=f"Estado inválido. Use: {', '.join(ESTADOS)}.")
+    if tipo_entidad is not None and tipo_entidad not in TIPOS_ENTIDAD:
+        raise HTTPException(status_code=400, detail=f"Tipo de entidad inválido. Use: {', '.join(TIPOS_ENTIDAD)}.")
+    if desde and hasta and desde > hasta:
+        raise HTTPException(status_code=400, detail="'desde' no puede ser posterior a 'hasta'.")
+
+    condiciones, parametros = [], []
+    if estado is not None:
+        condiciones.append("estado = ?")
+        parametros.append(estado)
+    if tipo_entidad is not None:
+        condiciones.append("tipo_entidad_solicitada = ?")
+        parametros.append(tipo_entidad)
+    if desde is not None:
+        condiciones.append("fecha_solicitud >= ?")
+        parametros.append(desde.isoformat())
+    if hasta is not None:
+        condiciones.append("fecha_solicitud < ?")  # Hasta el final del día 'hasta'
+        parametros.append((hasta + timedelta(days=1)).isoformat())
+    filtros = " AND ".join(condiciones) or "1"
+
+    def _contar() -> int:
+        return conn.execute(f"SELECT COUNT(*) FROM solicitudes_registro WHERE {filtros}", parametros).fetchone()[0]
+
+    total = conteos_solicitudes.contar(conn, (estado, tipo_entidad, desde, hasta), _contar)
+
+    condiciones_pagina, parametros_pagina = list(condiciones), list(parametros)
+    if cursor:
+        try:
+            fecha_cursor, id_cursor = decodificar_cursor(cursor, 2)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        condiciones_pagina.append("(fecha_solicitud, id_solicitud) < (?, ?)")
+        parametros_pagina += [fecha_cursor, id_cursor]
+
+    # Una fila de más indica si hay página siguiente
+    filas = conn.execute(f"""
+        SELECT id_solicitud, nombre_completo, email, nombre_organizacion,
+               tipo_entidad_solicitada, fecha_solicitud, estado
+        FROM solicitudes_registro
+        WHERE {" AND ".join(condiciones_pagina) or "1"}
+        ORDER BY fecha_solicitud DESC, id_solicitud DESC
+        LIMIT ?
+    """, (*parametros_pagina, limite + 1)).fetchall()
+
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = codificar_cursor(filas[-1][5], filas[-1][0])
+
+    solicitudes = [
+        SolicitudResumen(
+            id_solicitud=row[0],
+            nombre_completo=row[1],
+            email=row[2],
+            nombre_organizacion=row[3],
+            tipo_entidad_solicitada=row[4],
+            fecha_solicitud=row[5],
+            estado=row[6],
+        )
+        for row in filas
+    ]
+    return PaginaSolicitudes(solicitudes=solicitudes, total=total, siguiente=siguiente)
+
+
 # --- Endpoints ---
 
-@router.get("/pendientes", response_model=List[SolicitudResumen])
-def listar_solicitudes_pendientes(admin: Usuario = Depends(get_admin_ihcafe_actual)):
+@router.get("/pendientes", response_model=PaginaSolicitudes)
+def listar_solicitudes_pendientes(
+    tipo_entidad: Optional[str] = None,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    limite: int = Query(50, ge=1, le=LIMITE_MAXIMO),
+    cursor: Optional[str] = None,
+    admin: UsuarioToken = Depends(get_admin_ihcafe_actual),
+    conn: sqlite3.Connection = Depends(get_conexion),
+):
     """
     Endpoint para que un administrador de IHCAFE liste las solicitudes pendientes.
+    Paginado: para la página siguiente, repetir la consulta con cursor = 'siguiente'.
     """
-    # ... (resto del código de la función, igual que antes) ...
-    try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT id_solicitud, nombre_completo, email, nombre_organizacion, 
-                   tipo_entidad_solicitada, fecha_solicitud, estado
-            FROM solicitudes_registro
-            WHERE estado = 'PENDIENTE'
-            ORDER BY fecha_solicitud DESC
-        """)
-        
-        filas = cursor.fetchall()
-        conn.close()
-        
-        solicitudes = [
-            SolicitudResumen(
-                id_solicitud=row[0],
-                nombre_completo=row[1],
-                email=row[2],
-                nombre_organizacion=row[3],
-                tipo_entidad_solicitada=row[4],
-                fecha_solicitud=row[5] if isinstance(row[5], str) else datetime.strptime(row[5], '%Y-%m-%d %H:%M:%S').strftime('%Y-%m-%d %H:%M:%S') if row[5] else None,
-                estado=row[6]
-            )
-            for row in filas
-        ]
-        
-        return solicitudes
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error al obtener solicitudes pendientes: {str(e)}"
+    return _listar_solicitudes(conn, "PENDIENTE", tipo_entidad, desde, hasta, limite, cursor)
+
+
+@router.get("/", response_model=PaginaSolicitudes)
+def listar_solicitudes(
+    estado: Optional[str] = None,
+    tipo_entidad: Optional[str] = None,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    limite: int = Query(50, ge=1, le=LIMITE_MAXIMO),
+    cursor: Optional[str] = None,
+    admin: UsuarioToken = Depends(get_admin_ihcafe_actual),
+    conn: sqlite3.Connection = Depends(get_conexion),
+):
+    """Lista las solicitudes de cualquier estado, con los mismos filtros y paginación que /pendientes."""
+    return _listar_solicitudes(conn, estado, tipo_entidad, desde, hasta, limite, cursor)
+
+class ResultadoBusqueda(SolicitudResumen):
+    clave_exportador: Optional[str] = None
+    fragmento: str
+    puntaje: float  # bm25: menor = más relevante
+
+class EntidadEncontrada(BaseModel):
+    id_entidad: int
+    tipo: str
+    nombre: str
+
+class PaginaBusqueda(BaseModel):
+    solicitudes: List[ResultadoBusqueda]
+    entidades: List[EntidadEncontrada]  # Solo en la primera página
+    siguiente: Optional[str] = None
+
+
+@router.get("/buscar", response_model=PaginaBusqueda)
+def buscar_solicitudes_texto(
+    q: str = Query(..., min_length=1, max_length=200),
+    estado: Optional[str] = None,
+    limite: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    admin: UsuarioToken = Depends(get_admin_ihcafe_actual),
+    conn: sqlite3.Connection = Depends(get_conexion),
+):
+    """
+    Búsqueda por nombre, email, organización, clave de exportador o mensaje (FTS5,
+    ver admin/busqueda.py), ordenada por relevancia. Cada palabra se busca como prefijo.
+    """
+    if estado is not None and estado not in ESTADOS:
+        raise HTTPException(status_code=400, detail=f"Estado inválido. Use: {', '.join(ESTADOS)}.")
+    if consulta_fts(q) is None:
+        raise HTTPException(status_code=400, detail="La búsqueda debe contener al menos una palabra.")
+    despues_de = None
+    if cursor:
+        try:
+            despues_de = decodificar_cursor(cursor, 2)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    filas = buscar_solicitudes(conn, q, estado, limite + 1, despues_de)
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = codificar_cursor(filas[-1][9], filas[-1][0])
+
+    solicitudes = [
+        ResultadoBusqueda(
+            id_solicitud=row[0], nombre_completo=row[1], email=row[2], nombre_organizacion=row[3],
+            tipo_entidad_solicitada=row[4], fecha_solicitud=row[5], estado=row[6],
+            clave_exportador=row[7], fragmento=row[8], puntaje=row[9],
         )
+        for row in filas
+    ]
+    entidades = [] if cursor else [
+        EntidadEncontrada(id_entidad=row[0], tipo=row[1], nombre=row[2])
+        for row in buscar_entidades(conn, q, 10)
+    ]
+    return PaginaBusqueda(solicitudes=solicitudes, entidades=entidades, siguiente=siguiente)
+
+
+INTERVALO_PING = 15.0  # Segundos sin eventos antes de enviar un comentario (mantiene viva la conexión)
+
+
+async def flujo_eventos(ultimo_id: Optional[str], desconectado, intervalo_ping: float = INTERVALO_PING):
+    """
+    Cuerpo SSE: reenvía lo publicado después de ultimo_id (Last-Event-ID) y luego cada evento nuevo.
+    'desconectado' es una corrutina sin argumentos (request.is_disconnected).
+    """
+    suscriptor, pendientes, completo = bus_solicitudes.suscribir(ultimo_id)
+    try:
+        yield "retry: 3000\n\n"
+        if not completo:
+            yield "event: recargar\ndata: {}\n\n"
+        for evento in pendientes:
+            yield evento.como_sse()
+        while not await desconectado():
+            try:
+                evento = await asyncio.wait_for(suscriptor.cola.get(), timeout=intervalo_ping)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if evento is None:  # Cola desbordada: el cliente se reconecta con Last-Event-ID
+                break
+            yield evento.como_sse()
+    finally:
+        bus_solicitudes.desuscribir(suscriptor)
+
+
+@router.get("/eventos")
+async def eventos_solicitudes(
+    request: Request,
+    last_event_id: Optional[str] = Header(None),
+    admin: UsuarioToken = Depends(require_role("admin_ihcafe", token_en_query=True)),
+):
+    """
+    Server-sent events: solicitud_creada, solicitud_aprobada y solicitud_rechazada.
+    Desde el navegador: new EventSource('/admin/solicitudes/eventos?token=...').
+    Al reconectarse, EventSource envía Last-Event-ID y se reenvía lo que se perdió.
+    """
+    return StreamingResponse(
+        flujo_eventos(last_event_id or None, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.get("/{id_solicitud}", response_model=SolicitudDetalle)
-def obtener_detalle_solicitud(id_solicitud: int, admin: Usuario = Depends(get_admin_ihcafe_actual)):
+def obtener_detalle_solicitud(id_solicitud: int, admin: UsuarioToken = Depends(get_admin_ihcafe_actual), conn: sqlite3.Connection = Depends(get_conexion)):
     """
     Endpoint para obtener los detalles de una solicitud específica.
     """
     # ... (resto del código de la función, igual que antes) ...
     try:
-        conn = sqlite3.connect(DB_NAME)
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -92,7 +285,6 @@ def obtener_detalle_solicitud(id_solicitud: int, admin: Usuario = Depends(get_ad
         """, (id_solicitud,))
         
         row = cursor.fetchone()
-        conn.close()
         
         if not row:
             raise HTTPException(
@@ -143,76 +335,70 @@ class MotivoRechazo(BaseModel):
 # --- Nuevos Endpoints ---
 
 @router.post("/{id_solicitud}/aprobar", response_model=RespuestaAprobar, status_code=status.HTTP_201_CREATED)
-def aprobar_solicitud(id_solicitud: int, admin: Usuario = Depends(get_admin_ihcafe_actual)):
+def aprobar_solicitud(id_solicitud: int, admin: UsuarioToken = Depends(get_admin_ihcafe_actual)):
     """
     Endpoint para que un administrador de IHCAFE apruebe una solicitud de acceso.
     Esto crea un usuario en la tabla 'usuarios' y actualiza el estado de la solicitud.
     """
     try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        
-        # 1. Verificar que la solicitud exista y esté pendiente
-        cursor.execute("""
-            SELECT id_solicitud, nombre_completo, email, nombre_organizacion, clave_exportador
-            FROM solicitudes_registro
-            WHERE id_solicitud = ? AND estado = 'PENDIENTE'
-        """, (id_solicitud,))
-        
-        solicitud = cursor.fetchone()
-        if not solicitud:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Solicitud no encontrada o ya procesada."
-            )
-        
-        # Extraer datos de la solicitud
-        _, nombre_completo, email, nombre_organizacion, clave_exportador = solicitud
-        
-        # 2. Crear una contraseña temporal/hash (en una implementación real, se enviaría un correo para que la establezca)
+        # 1. Crear una contraseña temporal/hash (en una implementación real, se enviaría un correo para que la establezca)
         # Por ahora, creamos un hash de una contraseña temporal.
+        # Se calcula ANTES de encolar la escritura: bcrypt es lento y no debe frenar al hilo escritor.
+        # Corre en el pool de bcrypt; forzar=True: una aprobación no se rechaza por saturación de logins.
         from auth.seguridad import hash_password
         contraseña_temporal = "Temporal123!" # En el futuro, esto debería manejarse mejor
-        hash_contraseña_temp = hash_password(contraseña_temporal)
-        
-        # 3. Crear el usuario en la tabla 'usuarios'
-        # Asumimos rol 'editor_exportador' (id_rol=2) por defecto. 
-        # En el futuro, se podría parametrizar.
-        # Para id_entidad, necesitamos encontrar o crear la entidad exportadora.
-        # Por simplicidad, asumimos que existe o creamos una básica.
-        
-        # Verificar si la entidad (exportadora) ya existe
-        cursor.execute("SELECT id_entidad FROM entidades WHERE nombre = ?", (nombre_organizacion,))
-        entidad = cursor.fetchone()
-        
-        id_entidad = None
-        if entidad:
-            id_entidad = entidad[0]
-        else:
-            # Crear la entidad si no existe
+        hash_contraseña_temp = pool_hash.ejecutar(hash_password, contraseña_temporal, forzar=True)
+
+        def _aprobar(conn: sqlite3.Connection):
+            cursor = conn.cursor()
+
+            # 2. Verificar que la solicitud exista y esté pendiente
             cursor.execute("""
-                INSERT INTO entidades (tipo, nombre)
-                VALUES (?, ?)
-            """, ("EXPORTADOR", nombre_organizacion))
-            id_entidad = cursor.lastrowid
-            
-        # Crear el usuario
-        cursor.execute("""
-            INSERT INTO usuarios (nombre_completo, email, contraseña_hash, id_rol, id_entidad)
-            VALUES (?, ?, ?, ?, ?)
-        """, (nombre_completo, email, hash_contraseña_temp, 2, id_entidad)) # id_rol=2 -> editor_exportador
-        
-        id_usuario_creado = cursor.lastrowid
-        
-        # 4. Actualizar el estado de la solicitud
-        cursor.execute("""
-            UPDATE solicitudes_registro
-            SET estado = 'APROBADA', id_usuario_aprobador = ?, fecha_respuesta = ?
-            WHERE id_solicitud = ?
-        """, (admin.id_usuario, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), id_solicitud))
-        
-        conn.commit()
-        conn.close()
+                SELECT id_solicitud, nombre_completo, email, nombre_organizacion, clave_exportador
+                FROM solicitudes_registro
+                WHERE id_solicitud = ? AND estado = 'PENDIENTE'
+            """, (id_solicitud,))
+
+            solicitud = cursor.fetchone()
+            if not solicitud:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Solicitud no encontrada o ya procesada."
+                )
+
+            # Extraer datos de la solicitud
+            _, nombre_completo, email, nombre_organizacion, clave_exportador = solicitud
+
+            # 3. Crear el usuario en la tabla 'usuarios'
+            # Asumimos rol 'editor_exportador' (id_rol=2) por defecto. 
+            # En el futuro, se podría parametrizar.
+            # Entidad (exportadora) por nombre normalizado; se crea si no existe (usuarios/entidades.py)
+            id_entidad = resolver_entidad(conn, nombre_organizacion)
+
+            # Crear el usuario
+            cursor.execute("""
+                INSERT INTO usuarios (nombre_completo, email, contraseña_hash, id_rol, id_entidad)
+                VALUES (?, ?, ?, ?, ?)
+            """, (nombre_completo, email, hash_contraseña_temp, 2, id_entidad)) # id_rol=2 -> editor_exportador
+
+            id_usuario_creado = cursor.lastrowid
+            # La caché de usuarios no debe quedarse con un "no existe" para este email
+            escritor.despues_del_commit(lambda: cache_usuarios.invalidar(id_usuario_creado, email))
+
+            # 4. Actualizar el estado de la solicitud
+            cursor.execute("""
+                UPDATE solicitudes_registro
+                SET estado = 'APROBADA', id_usuario_aprobador = ?, fecha_respuesta = ?
+                WHERE id_solicitud = ?
+            """, (admin.id_usuario, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), id_solicitud))
+            siguiente_numero(conn, VERSION_SOLICITUDES)
+            escritor.despues_del_commit(lambda: publicar_solicitud(
+                "solicitud_aprobada", id_solicitud, "APROBADA", email=email,
+                nombre_organizacion=nombre_organizacion, id_usuario_creado=id_usuario_creado))
+
+            return nombre_completo, id_usuario_creado
+
+        nombre_completo, id_usuario_creado = escritor.ejecutar(_aprobar)
         
         return RespuestaAprobar(
             mensaje=f"✅ Solicitud aprobada. Usuario '{nombre_completo}' creado con ID {id_usuario_creado}.",
@@ -230,37 +416,39 @@ def aprobar_solicitud(id_solicitud: int, admin: Usuario = Depends(get_admin_ihca
 
 
 @router.post("/{id_solicitud}/rechazar", response_model=RespuestaRechazar)
-def rechazar_solicitud(id_solicitud: int, motivo: MotivoRechazo = None, admin: Usuario = Depends(get_admin_ihcafe_actual)):
+def rechazar_solicitud(id_solicitud: int, motivo: MotivoRechazo = None, admin: UsuarioToken = Depends(get_admin_ihcafe_actual)):
     """
     Endpoint para que un administrador de IHCAFE rechace una solicitud de acceso.
     """
     try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        
-        # 1. Verificar que la solicitud exista y esté pendiente
-        cursor.execute("""
-            SELECT id_solicitud FROM solicitudes_registro
-            WHERE id_solicitud = ? AND estado = 'PENDIENTE'
-        """, (id_solicitud,))
-        
-        solicitud = cursor.fetchone()
-        if not solicitud:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Solicitud no encontrada o ya procesada."
-            )
-        
-        # 2. Actualizar el estado de la solicitud
-        motivo_texto = motivo.motivo if motivo else "Solicitud rechazada por el administrador de IHCAFE."
-        cursor.execute("""
-            UPDATE solicitudes_registro
-            SET estado = 'RECHAZADA', id_usuario_aprobador = ?, fecha_respuesta = ?, mensaje_solicitud = ?
-            WHERE id_solicitud = ?
-        """, (admin.id_usuario, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), motivo_texto, id_solicitud))
-        
-        conn.commit()
-        conn.close()
+        def _rechazar(conn: sqlite3.Connection):
+            cursor = conn.cursor()
+
+            # 1. Verificar que la solicitud exista y esté pendiente
+            cursor.execute("""
+                SELECT id_solicitud FROM solicitudes_registro
+                WHERE id_solicitud = ? AND estado = 'PENDIENTE'
+            """, (id_solicitud,))
+
+            solicitud = cursor.fetchone()
+            if not solicitud:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Solicitud no encontrada o ya procesada."
+                )
+
+            # 2. Actualizar el estado de la solicitud
+            motivo_texto = motivo.motivo if motivo else "Solicitud rechazada por el administrador de IHCAFE."
+            cursor.execute("""
+                UPDATE solicitudes_registro
+                SET estado = 'RECHAZADA', id_usuario_aprobador = ?, fecha_respuesta = ?, mensaje_solicitud = ?
+                WHERE id_solicitud = ?
+            """, (admin.id_usuario, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), motivo_texto, id_solicitud))
+            siguiente_numero(conn, VERSION_SOLICITUDES)
+            escritor.despues_del_commit(lambda: publicar_solicitud(
+                "solicitud_rechazada", id_solicitud, "RECHAZADA", motivo=motivo_texto))
+
+        escritor.ejecutar(_rechazar)
         
         return RespuestaRechazar(mensaje=f"✅ Solicitud {id_solicitud} rechazada.")
         
@@ -273,3 +461,182 @@ def rechazar_solicitud(id_solicitud: int, motivo: MotivoRechazo = None, admin: U
             detail=f"Error al rechazar la solicitud: {str(e)}"
         )
 
+# ==admin/solicitudes.py #058 (Aprobación / rechazo por lotes)
+from typing import Dict, Literal
+from pydantic import Field
+
+from auth.seguridad import hash_password
+
+CONTRASEÑA_TEMPORAL = "Temporal123!"  # La misma que aprobar_solicitud
+MAX_ACCIONES_LOTE = 1000
+TAMAÑO_BLOQUE = 50      # Solicitudes por trabajo del escritor (un SAVEPOINT cada uno)
+_MAX_PARAMETROS = 500    # Valores por cláusula IN (...)
+
+
+class AccionSolicitud(BaseModel):
+    id_solicitud: int
+    accion: Literal["aprobar", "rechazar"]
+    motivo: Optional[str] = None  # Solo para rechazar
+
+class SolicitudLote(BaseModel):
+    acciones: List[AccionSolicitud] = Field(..., min_length=1, max_length=MAX_ACCIONES_LOTE)
+
+class ResultadoAccion(BaseModel):
+    id_solicitud: int
+    accion: str
+    ok: bool
+    mensaje: str
+    id_usuario_creado: Optional[int] = None
+
+class RespuestaLote(BaseModel):
+    aprobadas: int
+    rechazadas: int
+    fallidas: int
+    resultados: List[ResultadoAccion]
+
+
+def _en_bloques(valores: list, tamaño: int):
+    for inicio in range(0, len(valores), tamaño):
+        yield valores[inicio:inicio + tamaño]
+
+
+def _leer_solicitudes_pendientes(conn: sqlite3.Connection, ids: List[int]) -> Dict[int, tuple]:
+    """id_solicitud -> (nombre_completo, email, nombre_organizacion) de las que siguen pendientes."""
+    pendientes = {}
+    for bloque in _en_bloques(ids, _MAX_PARAMETROS):
+        filas = conn.execute(f"""
+            SELECT id_solicitud, nombre_completo, email, nombre_organizacion
+            FROM solicitudes_registro
+            WHERE id_solicitud IN ({",".join("?" * len(bloque))}) AND estado = 'PENDIENTE'
+        """, bloque).fetchall()
+        pendientes.update({fila[0]: tuple(fila[1:]) for fila in filas})
+    return pendientes
+
+
+@router.post("/bulk", response_model=RespuestaLote)
+def procesar_solicitudes_lote(lote: SolicitudLote, admin: UsuarioToken = Depends(get_admin_ihcafe_actual)):
+    """
+    Aprueba y/o rechaza varias solicitudes en una sola llamada. Devuelve el resultado de cada id.
+
+    1. Lee las solicitudes y precarga las entidades con una consulta por bloque.
+    2. Calcula UNA vez el hash de la contraseña temporal (es la misma para todos) en el
+       pool de bcrypt, ya sin conexión prestada.
+    3. Escribe en bloques de TAMAÑO_BLOQUE solicitudes (un trabajo del escritor cada uno):
+       cada solicitud se vuelve a verificar dentro del trabajo, y un error en una
+       (p. ej. email ya registrado) se deshace solo para ella.
+    """
+    acciones = lote.acciones
+    if len({a.id_solicitud for a in acciones}) != len(acciones):
+        raise HTTPException(status_code=400, detail="Cada id_solicitud puede aparecer una sola vez en el lote.")
+
+    # 1. Lecturas por bloque (la conexión se devuelve al pool antes de calcular el hash)
+    with obtener_conexion() as conn:
+        pendientes = _leer_solicitudes_pendientes(conn, [a.id_solicitud for a in acciones])
+        aprobables = {a.id_solicitud for a in acciones if a.accion == "aprobar" and a.id_solicitud in pendientes}
+        cache_entidades.precargar(conn, [pendientes[id_solicitud][2] for id_solicitud in aprobables])
+
+    # 2. Un solo hash por petición (forzar=True, como aprobar_solicitud): un trabajo por
+    #    aprobación llenaría el pool y el control de admisión rechazaría los /login
+    hash_temporal = pool_hash.ejecutar(hash_password, CONTRASEÑA_TEMPORAL, forzar=True) if aprobables else None
+
+    # 3. Escritura por bloques
+    def _procesar_bloque(bloque: List[AccionSolicitud]):
+        def _trabajo(conn: sqlite3.Connection) -> List[ResultadoAccion]:
+            cursor = conn.cursor()
+            ahora = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            resultados_bloque, usuarios_creados, eventos = [], [], []
+            for accion in bloque:
+                cursor.execute("""
+                    SELECT nombre_completo, email, nombre_organizacion FROM solicitudes_registro
+                    WHERE id_solicitud = ? AND estado = 'PENDIENTE'
+                """, (accion.id_solicitud,))
+                solicitud = cursor.fetchone()
+                if not solicitud or (accion.accion == "aprobar" and accion.id_solicitud not in aprobables):
+                    resultados_bloque.append(ResultadoAccion(
+                        id_solicitud=accion.id_solicitud, accion=accion.accion, ok=False,
+                        mensaje="Solicitud no encontrada o ya procesada."))
+                    continue
+
+                if accion.accion == "rechazar":
+                    cursor.execute("""
+                        UPDATE solicitudes_registro
+                        SET estado = 'RECHAZADA', id_usuario_aprobador = ?, fecha_respuesta = ?, mensaje_solicitud = ?
+                        WHERE id_solicitud = ?
+                    """, (admin.id_usuario, ahora,
+                          accion.motivo or "Solicitud rechazada por el administrador de IHCAFE.", accion.id_solicitud))
+                    eventos.append(("solicitud_rechazada", accion.id_solicitud, "RECHAZADA",
+                                    {"motivo": accion.motivo or "Solicitud rechazada por el administrador de IHCAFE."}))
+                    resultados_bloque.append(ResultadoAccion(
+                        id_solicitud=accion.id_solicitud, accion="rechazar", ok=True,
+                        mensaje=f"✅ Solicitud {accion.id_solicitud} rechazada."))
+                    continue
+
+                nombre_completo, email, nombre_organizacion = solicitud
+                cursor.execute("SAVEPOINT aprobar_en_lote")
+                try:
+                    id_entidad = resolver_entidad(conn, nombre_organizacion)
+                    cursor.execute("""
+                        INSERT INTO usuarios (nombre_completo, email, contraseña_hash, id_rol, id_entidad)
+                        VALUES (?, ?, ?, ?, ?)
+                    """, (nombre_completo, email, hash_temporal, 2, id_entidad))
+                    id_usuario_creado = cursor.lastrowid
+                    cursor.execute("""
+                        UPDATE solicitudes_registro
+                        SET estado = 'APROBADA', id_usuario_aprobador = ?, fecha_respuesta = ?
+                        WHERE id_solicitud = ?
+                    """, (admin.id_usuario, ahora, accion.id_solicitud))
+                    cursor.execute("RELEASE aprobar_en_lote")
+                except (sqlite3.IntegrityError, ValueError) as e:
+                    # Se deshace también la entidad, si se creó aquí (la caché solo guarda ids confirmados)
+                    cursor.execute("ROLLBACK TO aprobar_en_lote")
+                    cursor.execute("RELEASE aprobar_en_lote")
+                    resultados_bloque.append(ResultadoAccion(
+                        id_solicitud=accion.id_solicitud, accion="aprobar", ok=False,
+                        mensaje=f"No se pudo crear el usuario: {e}"))
+                    continue
+                usuarios_creados.append((id_usuario_creado, email))
+                eventos.append(("solicitud_aprobada", accion.id_solicitud, "APROBADA", {
+                    "email": email, "nombre_organizacion": nombre_organizacion, "id_usuario_creado": id_usuario_creado}))
+                resultados_bloque.append(ResultadoAccion(
+                    id_solicitud=accion.id_solicitud, accion="aprobar", ok=True, id_usuario_creado=id_usuario_creado,
+                    mensaje=f"✅ Solicitud aprobada. Usuario '{nombre_completo}' creado con ID {id_usuario_creado}."))
+
+            if any(r.ok for r in resultados_bloque):
+                siguiente_numero(conn, VERSION_SOLICITUDES)
+
+            def _despues_del_commit():
+                for id_usuario, email in usuarios_creados:
+                    cache_usuarios.invalidar(id_usuario, email)
+                for tipo, id_solicitud, estado, datos in eventos:
+                    publicar_solicitud(tipo, id_solicitud, estado, **datos)
+            escritor.despues_del_commit(_despues_del_commit)
+            return resultados_bloque
+        return _trabajo
+
+    # Los bloques se encolan juntos y el escritor los agrupa en el mismo COMMIT: cada
+    # bloque es atómico solo por su SAVEPOINT. Si un bloque falla se deshace solo él y
+    # los demás se confirman; si falla el COMMIT compartido, el escritor resuelve todos
+    # los futuros del grupo con ese error. En ambos casos cada futuro refleja si su
+    # bloque quedó guardado, y los ids de un bloque fallido se informan con ok=False
+    # (no como un 500 que ocultaría los bloques que sí se confirmaron).
+    bloques = list(_en_bloques(acciones, TAMAÑO_BLOQUE))
+    futuros = [escritor.enviar(_procesar_bloque(bloque)) for bloque in bloques]
+    resultados: Dict[int, ResultadoAccion] = {}
+    for bloque, futuro in zip(bloques, futuros):
+        try:
+            for resultado in futuro.result():
+                resultados[resultado.id_solicitud] = resultado
+        except Exception as e:
+            print(f"⚠️ Falló un bloque del lote de solicitudes: {e}")
+            for accion in bloque:
+                resultados[accion.id_solicitud] = ResultadoAccion(
+                    id_solicitud=accion.id_solicitud, accion=accion.accion, ok=False,
+                    mensaje=f"Error al procesar la solicitud: {str(e)}")
+
+    lista = [resultados[a.id_solicitud] for a in acciones]
+    return RespuestaLote(
+        aprobadas=sum(1 for r in lista if r.ok and r.accion == "aprobar"),
+        rechazadas=sum(1 for r in lista if r.ok and r.accion == "rechazar"),
+        fallidas=sum(1 for r in lista if not r.ok),
+        resultados=lista,
+    )
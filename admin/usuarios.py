@@ -0,0 +1,75 @@
+# ==admin/usuarios.py #044
+from fastapi import APIRouter, HTTPException, Depends
+from pydantic import BaseModel
+
+from auth.seguridad import get_admin_ihcafe_actual
+from auth.revocacion import revocar_tokens
+from usuarios.modelos import UsuarioToken
+from usuarios.crud import desactivar_usuario, activar_usuario
+from usuarios.cache import cache_usuarios
+from usuarios.actividad import actividad_usuarios
+from auth.hash_pool import pool_hash
+from auth.calibracion import politica_bcrypt
+from base_datos.escritor import escritor
+
+router = APIRouter(prefix="/admin/usuarios", tags=["Administración - Usuarios"])
+
+
+class RespuestaUsuario(BaseModel):
+    mensaje: str
+    id_usuario: int
+
+
+@router.get("/cache")
+def estadisticas_cache(admin: UsuarioToken = Depends(get_admin_ihcafe_actual)):
+    """Aciertos / fallos de la caché de usuarios (usuarios/cache.py) de este proceso."""
+    return cache_usuarios.estadisticas()
+
+
+@router.get("/actividad")
+def estadisticas_actividad(admin: UsuarioToken = Depends(get_admin_ihcafe_actual)):
+    """Búfer de ultimo_login / ultima_actividad (usuarios/actividad.py) de este proceso."""
+    return actividad_usuarios.estadisticas()
+
+
+@router.get("/hash")
+def metricas_hash(admin: UsuarioToken = Depends(get_admin_ihcafe_actual)):
+    """Espera en cola y duración de bcrypt del pool de hashing (auth/hash_pool.py) de este proceso."""
+    return pool_hash.metricas()
+
+
+@router.get("/bcrypt")
+def politica_de_hash(admin: UsuarioToken = Depends(get_admin_ihcafe_actual)):
+    """Costo de bcrypt vigente, última calibración y rehashes al iniciar sesión (auth/calibracion.py)."""
+    return politica_bcrypt()
+
+
+@router.post("/{id_usuario}/desactivar", response_model=RespuestaUsuario)
+def desactivar(id_usuario: int, admin: UsuarioToken = Depends(get_admin_ihcafe_actual)):
+    """Desactiva un usuario; sus tokens vigentes dejan de valer de inmediato."""
+    if id_usuario == admin.id_usuario:
+        raise HTTPException(status_code=400, detail="No puede desactivar su propio usuario.")
+    if not desactivar_usuario(id_usuario):
+        raise HTTPException(status_code=404, detail="Usuario no encontrado.")
+    return RespuestaUsuario(mensaje="✅ Usuario desactivado.", id_usuario=id_usuario)
+
+
+@router.post("/{id_usuario}/activar", response_model=RespuestaUsuario)
+def activar(id_usuario: int, admin: UsuarioToken = Depends(get_admin_ihcafe_actual)):
+    """Reactiva un usuario. Deberá iniciar sesión de nuevo."""
+    if not activar_usuario(id_usuario):
+        raise HTTPException(status_code=404, detail="Usuario no encontrado.")
+    return RespuestaUsuario(mensaje="✅ Usuario activado.", id_usuario=id_usuario)
+
+
+@router.post("/{id_usuario}/revocar_sesiones", response_model=RespuestaUsuario)
+def revocar_sesiones(id_usuario: int, admin: UsuarioToken = Depends(get_admin_ihcafe_actual)):
+    """Cierra todas las sesiones del usuario: invalida los tokens emitidos hasta ahora."""
+    def _revocar(conn):
+        if conn.execute("SELECT 1 FROM usuarios WHERE id_usuario = ?", (id_usuario,)).fetchone() is None:
+            return False
+        revocar_tokens(conn, id_usuario)
+        return True
+    if not escritor.ejecutar(_revocar):
+        raise HTTPException(status_code=404, detail="Usuario no encontrado.")
+    return RespuestaUsuario(mensaje="✅ Sesiones revocadas.", id_usuario=id_usuario)
@@ -0,0 +1,221 @@
+# ==auth/calibracion.py #052
+"""
+Costo de bcrypt: calibración contra el hardware y rehash transparente al iniciar sesión.
+
+El costo (rounds) define cuánto tarda cada verificación de /login: cada +1 duplica
+el tiempo. En lugar de usar el valor por defecto de passlib sin medirlo, se elige
+el costo cuya verificación se acerca más a BCRYPT_OBJETIVO_MS en esta máquina.
+
+- BCRYPT_ROUNDS vacío: valor por defecto de passlib (12).
+- BCRYPT_ROUNDS=<n>: costo fijo (el que sugirió la calibración por CLI).
+- BCRYPT_ROUNDS=auto: se calibra al iniciar la aplicación.
+
+Si un login correcto trae un hash con un costo MENOR al vigente, se recalcula en el
+pool de bcrypt y se guarda con el escritor único, sin demorar la respuesta. Nunca se
+baja el costo de un hash: una calibración lenta al iniciar no debe debilitar los
+hashes ya guardados.
+
+Uso (CLI): python -m auth.calibracion [objetivo_ms] [costo_min] [costo_max]
+"""
+import re
+import sqlite3
+import sys
+import threading
+import time
+from statistics import median
+from typing import Dict, NamedTuple, Optional
+
+from passlib.hash import bcrypt
+
+from config.settings import BCRYPT_ROUNDS, BCRYPT_OBJETIVO_MS
+from auth.seguridad import pwd_context, hash_password
+from auth.hash_pool import pool_hash, PoolSaturado
+from base_datos.escritor import escritor
+from usuarios.cache import cache_usuarios
+
+COSTO_MINIMO = 10   # Por debajo de 10 no se considera seguro
+COSTO_MAXIMO = 16
+_PATRON_COSTO = re.compile(r"^\$2[abxy]?\$(\d{2})\$")
+
+
+class Calibracion(NamedTuple):
+    costo: int
+    ms: float                       # Verificación medida con el costo elegido
+    objetivo_ms: float
+    mediciones: Dict[int, float]    # costo -> ms por verificación
+
+
+def costo_de_hash(hash_guardado: str) -> Optional[int]:
+    """Costo de un hash bcrypt ('$2b$12$...' -> 12); None si no es bcrypt."""
+    coincidencia = _PATRON_COSTO.match(hash_guardado or "")
+    return int(coincidencia.group(1)) if coincidencia else None
+
+
+def costo_actual() -> int:
+    """Costo con el que hash_password() genera los hashes nuevos."""
+    return pwd_context.handler("bcrypt").default_rounds
+
+
+def aplicar_costo(costo: int):
+    """Cambia el costo de los hashes nuevos (llamar al iniciar, antes de atender peticiones)."""
+    pwd_context.update(bcrypt__rounds=costo)
+
+
+def medir_verificacion(costo: int, repeticiones: int = 3) -> float:
+    """Mediana, en ms, de verificar una contraseña contra un hash del costo dado."""
+    hash_prueba = bcrypt.using(rounds=costo).hash("calibracion-cafehnd")
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        bcrypt.verify("calibracion-cafehnd", hash_prueba)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return median(tiempos)
+
+
+def calibrar(objetivo_ms: float = BCRYPT_OBJETIVO_MS, costo_min: int = COSTO_MINIMO,
+             costo_max: int = COSTO_MAXIMO, repeticiones: int = 3) -> Calibracion:
+    """
+    Mide desde costo_min hacia arriba hasta pasar el objetivo (cada paso duplica
+    el tiempo, así que se mide a lo sumo un costo "de más") y elige el costo cuya
+    verificación queda más cerca del objetivo en escala logarítmica.
+    """
+    if not 4 <= costo_min <= costo_max <= 31:
+        raise ValueError("Se requiere 4 <= costo_min <= costo_max <= 31.")
+    mediciones = {}
+    for costo in range(costo_min, costo_max + 1):
+        mediciones[costo] = medir_verificacion(costo, repeticiones)
+        if mediciones[costo] >= objetivo_ms:
+            break
+
+    def distancia(costo):
+        return abs(mediciones[costo] / objetivo_ms - 1) if mediciones[costo] >= objetivo_ms \
+            else abs(objetivo_ms / mediciones[costo] - 1)
+
+    costo = min(mediciones, key=distancia)
+    return Calibracion(costo, round(mediciones[costo], 2), objetivo_ms,
+                       {c: round(ms, 2) for c, ms in mediciones.items()})
+
+
+ultima_calibracion: Optional[Calibracion] = None
+
+
+def configurar_costo(valor: str = BCRYPT_ROUNDS) -> int:
+    """Aplica BCRYPT_ROUNDS al iniciar la aplicación. Devuelve el costo vigente."""
+    global ultima_calibracion
+    if valor == "auto":
+        inicio = time.perf_counter()
+        ultima_calibracion = calibrar()
+        aplicar_costo(ultima_calibracion.costo)
+        print(f"🔐 bcrypt calibrado: costo {ultima_calibracion.costo} "
+              f"({ultima_calibracion.ms} ms por verificación, objetivo {ultima_calibracion.objetivo_ms:g} ms; "
+              f"calibración en {time.perf_counter() - inicio:.1f} s).")
+    elif valor:
+        aplicar_costo(int(valor))
+    return costo_actual()
+
+
+# --- Rehash al iniciar sesión ---
+
+class RehashAlIniciarSesion:
+    """
+    Recalcula en segundo plano los hashes con un costo menor al de la política vigente.
+    El hash nuevo se calcula en el pool de bcrypt (sin forzar: si está saturado,
+    se intenta en el próximo login) y se guarda solo si el hash no cambió mientras tanto.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._en_curso = set()  # id_usuario con un rehash pendiente
+        self.programados = 0
+        self.completados = 0
+        self.omitidos = 0       # Pool saturado o rehash ya en curso
+        self.descartados = 0    # El hash cambió antes de guardar, o hubo un error
+        self._ms_total = 0.0
+
+    def necesita_rehash(self, hash_guardado: str) -> bool:
+        costo = costo_de_hash(hash_guardado)
+        return costo is not None and costo < costo_actual()
+
+    def programar(self, id_usuario: int, email: str, contraseña: str, hash_anterior: str) -> bool:
+        """Encola el rehash; devuelve False si no se programó (no bloquea nunca)."""
+        with self._lock:
+            if id_usuario in self._en_curso:
+                self.omitidos += 1
+                return False
+            self._en_curso.add(id_usuario)
+        inicio = time.perf_counter()
+        try:
+            futuro_hash = pool_hash.enviar(hash_password, contraseña)
+        except PoolSaturado:
+            self._terminar(id_usuario, "omitidos")
+            return False
+        with self._lock:
+            self.programados += 1
+
+        def guardar(conn: sqlite3.Connection) -> bool:
+            cursor = conn.execute(
+                "UPDATE usuarios SET contraseña_hash = ? WHERE id_usuario = ? AND contraseña_hash = ?",
+                (futuro_hash.result(), id_usuario, hash_anterior),
+            )
+            if cursor.rowcount:
+                escritor.despues_del_commit(lambda: cache_usuarios.invalidar(id_usuario, email))
+            return cursor.rowcount > 0
+
+        def hash_listo(futuro):
+            if futuro.exception() is not None:
+                self._terminar(id_usuario, "descartados")
+                return
+            escritor.enviar(guardar).add_done_callback(
+                lambda f: self._terminar(id_usuario, "completados" if not f.exception() and f.result() else "descartados",
+                                         time.perf_counter() - inicio)
+            )
+
+        futuro_hash.add_done_callback(hash_listo)
+        return True
+
+    def _terminar(self, id_usuario: int, resultado: str, segundos: float = 0.0):
+        with self._lock:
+            self._en_curso.discard(id_usuario)
+            setattr(self, resultado, getattr(self, resultado) + 1)
+            if resultado == "completados":
+                self._ms_total += segundos * 1000
+
+    def pendientes(self) -> int:
+        with self._lock:
+            return len(self._en_curso)
+
+    def metricas(self) -> dict:
+        with self._lock:
+            return {
+                "programados": self.programados,
+                "completados": self.completados,
+                "omitidos": self.omitidos,
+                "descartados": self.descartados,
+                "pendientes": len(self._en_curso),
+                "ms_promedio": round(self._ms_total / self.completados, 2) if self.completados else None,
+            }
+
+
+rehash = RehashAlIniciarSesion()
+
+
+def politica_bcrypt() -> dict:
+    """Costo vigente, última calibración y métricas de rehash (para /admin/usuarios/bcrypt)."""
+    return {
+        "costo": costo_actual(),
+        "objetivo_ms": BCRYPT_OBJETIVO_MS,
+        "calibracion": ultima_calibracion._asdict() if ultima_calibracion else None,
+        "rehash": rehash.metricas(),
+    }
+
+
+if __name__ == "__main__":
+    objetivo = float(sys.argv[1]) if len(sys.argv) > 1 else BCRYPT_OBJETIVO_MS
+    costo_min = int(sys.argv[2]) if len(sys.argv) > 2 else COSTO_MINIMO
+    costo_max = int(sys.argv[3]) if len(sys.argv) > 3 else COSTO_MAXIMO
+    print(f"Calibrando bcrypt (objetivo {objetivo:g} ms por verificación)...")
+    resultado = calibrar(objetivo, costo_min, costo_max)
+    for costo, ms in resultado.mediciones.items():
+        marca = "  <-" if costo == resultado.costo else ""
+        print(f"  costo {costo:>2}: {ms:9.2f} ms  (~{1000 / ms:7.1f} verificaciones/s por hilo){marca}")
+    print(f"✅ Sugerido: BCRYPT_ROUNDS={resultado.costo}")
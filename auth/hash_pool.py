@@ -0,0 +1,120 @@
+# ==auth/hash_pool.py #048
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+from config.settings import HASH_WORKERS, HASH_MAX_COLA
+
+# --- Pool acotado para bcrypt ---
+# bcrypt tarda decenas de milisegundos a propósito. Si corre en el threadpool de
+# anyio, una ráfaga de logins (apertura de mercado, credential stuffing) ocupa
+# todos sus hilos y frena a los demás endpoints. Aquí corre en hilos propios
+# (bcrypt libera el GIL) y con admisión: si ya hay HASH_MAX_COLA trabajos
+# esperando, el siguiente se rechaza de inmediato (HTTP 429 con Retry-After).
+
+
+class PoolSaturado(Exception):
+    """La cola de hashing está llena; reintentar después de 'reintentar_en' segundos."""
+
+    def __init__(self, reintentar_en: int):
+        super().__init__(f"Demasiadas solicitudes de autenticación; reintente en {reintentar_en} s.")
+        self.reintentar_en = reintentar_en
+
+
+class PoolHash:
+    def __init__(self, workers: int = HASH_WORKERS, max_cola: int = HASH_MAX_COLA):
+        self.workers = workers
+        self.max_cola = max_cola
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._pendientes = 0  # En cola + ejecutándose
+        # --- Métricas ---
+        self.completados = 0
+        self.rechazados = 0
+        self._espera_total = 0.0
+        self._espera_max = 0.0
+        self._hash_total = 0.0
+        self._hash_max = 0.0
+        self._recientes = deque(maxlen=512)  # (espera, hash) de los últimos trabajos
+
+    def enviar(self, funcion: Callable[..., Any], *args, forzar: bool = False) -> Future:
+        """
+        Encola funcion(*args) en el pool. Lanza PoolSaturado si la cola está llena,
+        salvo con forzar=True (operaciones administrativas que no deben rechazarse).
+        """
+        with self._lock:
+            if not forzar and self._pendientes >= self.workers + self.max_cola:
+                self.rechazados += 1
+                raise PoolSaturado(self._estimar_espera())
+            self._pendientes += 1
+        encolado = time.perf_counter()
+        try:
+            return self._executor.submit(self._medir, encolado, funcion, *args)
+        except BaseException:
+            with self._lock:
+                self._pendientes -= 1
+            raise
+
+    def ejecutar(self, funcion: Callable[..., Any], *args, forzar: bool = False) -> Any:
+        """Versión bloqueante de enviar() (para endpoints síncronos)."""
+        return self.enviar(funcion, *args, forzar=forzar).result()
+
+    async def ejecutar_async(self, funcion: Callable[..., Any], *args, forzar: bool = False) -> Any:
+        """Versión para endpoints async: no ocupa un hilo del threadpool mientras espera."""
+        return await asyncio.wrap_future(self.enviar(funcion, *args, forzar=forzar))
+
+    def _medir(self, encolado: float, funcion: Callable[..., Any], *args) -> Any:
+        inicio = time.perf_counter()
+        try:
+            return funcion(*args)
+        finally:
+            fin = time.perf_counter()
+            espera, duracion = inicio - encolado, fin - inicio
+            with self._lock:
+                self._pendientes -= 1
+                self.completados += 1
+                self._espera_total += espera
+                self._espera_max = max(self._espera_max, espera)
+                self._hash_total += duracion
+                self._hash_max = max(self._hash_max, duracion)
+                self._recientes.append((espera, duracion))
+
+    def _estimar_espera(self) -> int:
+        """Segundos aproximados para vaciar la cola actual (para Retry-After). Requiere el lock."""
+        duracion = self._hash_total / self.completados if self.completados else 0.25
+        return max(1, math.ceil(self._pendientes * duracion / self.workers))
+
+    def metricas(self) -> dict:
+        with self._lock:
+            recientes = list(self._recientes)
+            n = self.completados
+
+            def p95(valores):
+                if not valores:
+                    return None
+                valores = sorted(valores)
+                return round(valores[min(len(valores) - 1, int(len(valores) * 0.95))] * 1000, 2)
+
+            return {
+                "workers": self.workers,
+                "max_cola": self.max_cola,
+                "pendientes": self._pendientes,
+                "completados": n,
+                "rechazados": self.rechazados,
+                "espera_ms_promedio": round(self._espera_total / n * 1000, 2) if n else None,
+                "espera_ms_p95": p95([e for e, _ in recientes]),
+                "espera_ms_max": round(self._espera_max * 1000, 2),
+                "hash_ms_promedio": round(self._hash_total / n * 1000, 2) if n else None,
+                "hash_ms_p95": p95([d for _, d in recientes]),
+                "hash_ms_max": round(self._hash_max * 1000, 2),
+            }
+
+    def cerrar(self):
+        self._executor.shutdown(wait=True)
+
+
+pool_hash = PoolHash()
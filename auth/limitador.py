@@ -0,0 +1,215 @@
+# ==auth/limitador.py #050
+import math
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+from config.settings import LIMITADOR_BACKEND
+
+# --- Limitador de intentos de login (token bucket) ---
+# Cada intento fallido de /login cuesta un bcrypt completo. Antes de buscar al usuario
+# o calcular un hash, cada intento consume una ficha de dos cubetas: la del email y
+# la de la IP del cliente. Sin fichas -> 429 con Retry-After.
+#
+# Un login exitoso devuelve la ficha del email (solo los fallos gastan la cubeta de
+# la cuenta: un usuario que entra desde varios equipos no se queda sin fichas) y
+# reinicia sus fallos. La ficha de la IP no se devuelve: esa cubeta limita el volumen.
+#
+# Además, los fallos consecutivos de una clave activan una espera progresiva
+# (1 s, 2 s, 4 s, ...) y, al llegar a FALLOS_BLOQUEO, un bloqueo temporal.
+#
+# El estado vive en un backend intercambiable: en memoria (por defecto, por proceso)
+# o en SQLite (compartido entre workers de uvicorn), ver LIMITADOR_BACKEND.
+
+
+class Politica(NamedTuple):
+    capacidad: float        # Fichas máximas (ráfaga permitida)
+    recarga: float          # Fichas por segundo
+    fallos_espera: int      # Fallos consecutivos a partir de los cuales hay espera progresiva
+    fallos_bloqueo: int     # Fallos consecutivos que bloquean la clave
+    bloqueo: float          # Segundos de bloqueo
+
+
+POLITICAS = {
+    # 5 intentos seguidos por cuenta, luego 1 por minuto
+    "email": Politica(capacidad=5, recarga=1 / 60, fallos_espera=3, fallos_bloqueo=10, bloqueo=15 * 60),
+    # 30 intentos seguidos por IP (oficinas con NAT), luego 1 cada 2 s
+    "ip": Politica(capacidad=30, recarga=1 / 2, fallos_espera=10, fallos_bloqueo=50, bloqueo=15 * 60),
+}
+ESPERA_MAXIMA = 5 * 60
+
+
+class Estado(NamedTuple):
+    fichas: float
+    actualizado: float      # time.time() de la última actualización
+    fallos: int             # Fallos consecutivos
+    bloqueado_hasta: float  # time.time(); 0 si no hay espera ni bloqueo
+
+    def expira(self, politica: Politica) -> float:
+        """Momento desde el cual el estado equivale a uno nuevo (se puede borrar)."""
+        lleno = self.actualizado + (politica.capacidad - self.fichas) / politica.recarga
+        vence = max(lleno, self.bloqueado_hasta)
+        # Los fallos consecutivos se recuerdan un período de bloqueo más
+        return vence + politica.bloqueo if self.fallos else vence
+
+
+class LimiteExcedido(Exception):
+    def __init__(self, reintentar_en: float, motivo: str):
+        self.reintentar_en = max(1, math.ceil(reintentar_en))
+        super().__init__(f"{motivo}; reintente en {self.reintentar_en} s.")
+
+
+# --- Backends ---
+# actualizar(clave, funcion, expira) aplica funcion(estado_actual_o_None) -> (estado_nuevo, resultado)
+# de forma atómica y guarda estado_nuevo hasta 'expira' (time.time()).
+
+class BackendMemoria:
+    """Diccionario por proceso; las claves vencidas se purgan cada cierto número de operaciones."""
+
+    def __init__(self, max_claves: int = 100_000, purgar_cada: int = 1024):
+        self._lock = threading.Lock()
+        self._datos: Dict[str, Tuple[Estado, float]] = {}
+        self.max_claves = max_claves
+        self.purgar_cada = purgar_cada
+        self._operaciones = 0
+
+    def actualizar(self, clave: str, funcion: Callable, expira: Callable[[Estado], float]):
+        with self._lock:
+            ahora = time.time()
+            entrada = self._datos.get(clave)
+            actual = entrada[0] if entrada and entrada[1] > ahora else None
+            nuevo, resultado = funcion(actual)
+            self._datos[clave] = (nuevo, expira(nuevo))
+            self._operaciones += 1
+            if self._operaciones % self.purgar_cada == 0 or len(self._datos) > self.max_claves:
+                self._purgar(ahora)
+            return resultado
+
+    def _purgar(self, ahora: float):
+        for clave in [c for c, (_, vence) in self._datos.items() if vence <= ahora]:
+            del self._datos[clave]
+        if len(self._datos) > self.max_claves:  # Aún lleno: descartar los que vencen antes
+            for clave, _ in sorted(self._datos.items(), key=lambda par: par[1][1])[: len(self._datos) - self.max_claves]:
+                del self._datos[clave]
+
+    def __len__(self) -> int:
+        return len(self._datos)
+
+
+class BackendSQLite:
+    """
+    Estado en la tabla limitador_login (migración 6), compartido entre procesos.
+    Cada actualización es un trabajo del escritor único.
+    """
+
+    def __init__(self, purgar_cada: int = 1024):
+        self.purgar_cada = purgar_cada
+        self._operaciones = 0
+
+    def actualizar(self, clave: str, funcion: Callable, expira: Callable[[Estado], float]):
+        from base_datos.escritor import escritor
+
+        def _trabajo(conn: sqlite3.Connection):
+            ahora = time.time()
+            fila = conn.execute("""
+                SELECT fichas, actualizado, fallos, bloqueado_hasta FROM limitador_login
+                WHERE clave = ? AND expira > ?
+            """, (clave, ahora)).fetchone()
+            nuevo, resultado = funcion(Estado(*fila) if fila else None)
+            conn.execute("""
+                INSERT INTO limitador_login (clave, fichas, actualizado, fallos, bloqueado_hasta, expira)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(clave) DO UPDATE SET fichas = excluded.fichas, actualizado = excluded.actualizado,
+                    fallos = excluded.fallos, bloqueado_hasta = excluded.bloqueado_hasta, expira = excluded.expira
+            """, (clave, *nuevo, expira(nuevo)))
+            self._operaciones += 1  # Solo el hilo escritor lo modifica
+            if self._operaciones % self.purgar_cada == 0:
+                conn.execute("DELETE FROM limitador_login WHERE expira <= ?", (ahora,))
+            return resultado
+
+        return escritor.ejecutar(_trabajo)
+
+
+# --- Limitador ---
+
+class LimitadorLogin:
+    def __init__(self, backend=None, politicas: Dict[str, Politica] = POLITICAS):
+        self.backend = backend if backend is not None else BackendMemoria()
+        self.politicas = politicas
+        self.rechazados = 0
+
+    def _recargar(self, estado: Optional[Estado], politica: Politica, ahora: float) -> Estado:
+        if estado is None:
+            return Estado(politica.capacidad, ahora, 0, 0.0)
+        fichas = min(politica.capacidad, estado.fichas + (ahora - estado.actualizado) * politica.recarga)
+        return estado._replace(fichas=fichas, actualizado=ahora)
+
+    def _consumir(self, tipo: str, clave: str):
+        politica = self.politicas[tipo]
+
+        def aplicar(estado: Optional[Estado]):
+            ahora = time.time()
+            estado = self._recargar(estado, politica, ahora)
+            if estado.bloqueado_hasta > ahora:
+                return estado, (estado.bloqueado_hasta - ahora, "Demasiados intentos fallidos")
+            if estado.fichas < 1:
+                return estado, ((1 - estado.fichas) / politica.recarga, "Demasiados intentos de inicio de sesión")
+            return estado._replace(fichas=estado.fichas - 1), None
+
+        rechazo = self.backend.actualizar(f"{tipo}:{clave}", aplicar, lambda e: e.expira(politica))
+        if rechazo:
+            self.rechazados += 1
+            raise LimiteExcedido(*rechazo)
+
+    def admitir(self, email: str, ip: Optional[str]):
+        """Consume una ficha por email y por IP; lanza LimiteExcedido si alguna no alcanza."""
+        if ip:
+            self._consumir("ip", ip)
+        self._consumir("email", normalizar_email(email))
+
+    def registrar_fallo(self, email: str, ip: Optional[str]):
+        for tipo, clave in (("email", normalizar_email(email)), ("ip", ip)):
+            if not clave:
+                continue
+            politica = self.politicas[tipo]
+
+            def aplicar(estado: Optional[Estado], politica=politica):
+                ahora = time.time()
+                estado = self._recargar(estado, politica, ahora)
+                fallos = estado.fallos + 1
+                if fallos >= politica.fallos_bloqueo:
+                    hasta = ahora + politica.bloqueo
+                elif fallos >= politica.fallos_espera:
+                    hasta = ahora + min(ESPERA_MAXIMA, 2 ** (fallos - politica.fallos_espera))
+                else:
+                    hasta = estado.bloqueado_hasta
+                return estado._replace(fallos=fallos, bloqueado_hasta=hasta), None
+
+            self.backend.actualizar(f"{tipo}:{clave}", aplicar, lambda e, politica=politica: e.expira(politica))
+
+    def registrar_exito(self, email: str):
+        """Login correcto: se devuelve la ficha del email y se olvidan sus fallos (no los de la IP)."""
+        politica = self.politicas["email"]
+
+        def aplicar(estado: Optional[Estado]):
+            estado = self._recargar(estado, politica, time.time())
+            fichas = min(politica.capacidad, estado.fichas + 1)
+            return estado._replace(fichas=fichas, fallos=0, bloqueado_hasta=0.0), None
+
+        self.backend.actualizar(f"email:{normalizar_email(email)}", aplicar, lambda e: e.expira(politica))
+
+
+def normalizar_email(email: str) -> str:
+    return email.strip().lower()
+
+
+def crear_backend(nombre: str = LIMITADOR_BACKEND):
+    if nombre == "sqlite":
+        return BackendSQLite()
+    if nombre == "memoria":
+        return BackendMemoria()
+    raise ValueError(f"LIMITADOR_BACKEND desconocido: '{nombre}' (use 'memoria' o 'sqlite').")
+
+
+limitador_login = LimitadorLogin(crear_backend())
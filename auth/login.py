@@ -1,8 +1,13 @@
 # ==auth/login.py #004 (Versión actualizada)
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Request
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from usuarios.crud import obtener_usuario_por_email
-from auth.seguridad import verify_password, crear_token_acceso
+from auth.seguridad import verify_password, crear_token_acceso, claims_de_usuario
+from auth.hash_pool import pool_hash, PoolSaturado
+from auth.limitador import limitador_login, LimiteExcedido
+from auth.calibracion import rehash
+from usuarios.actividad import actividad_usuarios
 
 router = APIRouter(prefix="/login", tags=["Autenticación"])
 
@@ -11,17 +16,54 @@ class CredencialesLogin(BaseModel):
     contraseña: str
 
 @router.post("/", status_code=status.HTTP_200_OK)
-def login_usuario(credenciales: CredencialesLogin):
-    usuario = obtener_usuario_por_email(credenciales.email)
-    if not usuario or not verify_password(credenciales.contraseña, usuario.contraseña_hash):
+async def login_usuario(credenciales: CredencialesLogin, request: Request):
+    # 1. Limitador por email e IP: se rechaza antes de tocar la base o calcular un hash
+    ip = request.client.host if request.client else None
+    try:
+        await run_in_threadpool(limitador_login.admitir, credenciales.email, ip)
+    except LimiteExcedido as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.reintentar_en)},
+        )
+
+    usuario = await run_in_threadpool(obtener_usuario_por_email, credenciales.email)
+    try:
+        # bcrypt corre en el pool acotado (auth/hash_pool.py), no en el threadpool de anyio
+        valida = usuario is not None and await pool_hash.ejecutar_async(
+            verify_password, credenciales.contraseña, usuario.contraseña_hash
+        )
+    except PoolSaturado as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.reintentar_en)},
+        )
+    if not valida:
+        await run_in_threadpool(limitador_login.registrar_fallo, credenciales.email, ip)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Credenciales incorrectas",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Crear token de acceso
-    token_data = {"sub": str(usuario.id_usuario), "email": usuario.email, "rol_id": str(usuario.id_rol)}
-    token = crear_token_acceso(token_data)
+    await run_in_threadpool(limitador_login.registrar_exito, credenciales.email)
+
+    # Hash con un costo menor al vigente: se recalcula en segundo plano (auth/calibracion.py)
+    if rehash.necesita_rehash(usuario.contraseña_hash):
+        rehash.programar(usuario.id_usuario, usuario.email, credenciales.contraseña, usuario.contraseña_hash)
+
+    if not usuario.activo:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Usuario inactivo",
+        )
+    
+    # ultimo_login se escribe por lotes (usuarios/actividad.py), fuera de este camino
+    actividad_usuarios.registrar_login(usuario.id_usuario)
+
+    # Crear token de acceso (con rol, entidad y estado: ver auth/seguridad.require_role)
+    token = crear_token_acceso(claims_de_usuario(usuario))
     
     return {"mensaje": "✅ Login exitoso", "token": token, "token_type": "bearer"}
@@ -1,13 +1,15 @@
 # ==auth/registro.py #005 (Versión actualizada)
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, status, Depends
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 import sqlite3
 from datetime import datetime
 
-# Asumimos que DB_NAME está definido en un lugar común o lo definimos aquí
-# En una implementación más avanzada, esto debería venir de config/settings.py
-DB_NAME = "cafehnd.db"
+from base_datos.conexion import get_conexion
+from base_datos.escritor import escritor
+from base_datos.secuencias import siguiente_numero
+from admin.solicitudes import VERSION_SOLICITUDES
+from admin.eventos import publicar_solicitud
 
 router = APIRouter(prefix="/registro", tags=["Registro"])
 
@@ -22,7 +24,7 @@ class SolicitudAccesoExportador(BaseModel):
 
 # Endpoint para solicitar acceso
 @router.post("/solicitar_acceso", status_code=status.HTTP_201_CREATED)
-def solicitar_acceso_exportador(solicitud: SolicitudAccesoExportador):
+def solicitar_acceso_exportador(solicitud: SolicitudAccesoExportador, conn: sqlite3.Connection = Depends(get_conexion)):
     """
     Endpoint para que un representante autorizado de una exportadora
     registrada en IHCAFE solicite acceso al sistema CaféHND Digital.
@@ -30,7 +32,6 @@ def solicitar_acceso_exportador(solicitud: SolicitudAccesoExportador):
     verificada y aprobada por el equipo de CaféHND.
     """
     try:
-        conn = sqlite3.connect(DB_NAME)
         cursor = conn.cursor()
         
         # Verificar si ya existe una solicitud con ese email
@@ -55,34 +56,44 @@ def solicitar_acceso_exportador(solicitud: SolicitudAccesoExportador):
                 detail="Ya existe un usuario registrado con ese email corporativo."
             )
 
-        # Insertar la nueva solicitud
+        # Insertar la nueva solicitud (en el hilo escritor único)
         # Ahora incluimos clave_exportador en su columna específica
-        cursor.execute('''
-            INSERT INTO solicitudes_registro 
-            (nombre_completo, email, nombre_organizacion, tipo_entidad_solicitada, 
-             clave_exportador, mensaje_solicitud, fecha_solicitud, estado)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            solicitud.nombre_completo,
-            solicitud.email_corporativo,
-            solicitud.nombre_exportadora,
-            'EXPORTADOR', # Fijamos este valor según nuestro flujo
-            solicitud.clave_exportador, # Valor específico
-            f"Solicitud de acceso para {solicitud.nombre_exportadora} (Clave: {solicitud.clave_exportador}). "
-            f"Cargo/Relación: {solicitud.cargo_relacion or 'No especificado'}. "
-            f"Teléfono: {solicitud.telefono_contacto or 'No proporcionado'}.",
-            datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'PENDIENTE' # Estado inicial
-        ))
-        
-        conn.commit()
-        conn.close()
+        # Si dos peticiones pasan las verificaciones a la vez, el UNIQUE(email) rechaza la segunda.
+        def _insertar(conn: sqlite3.Connection):
+            cursor = conn.execute('''
+                INSERT INTO solicitudes_registro 
+                (nombre_completo, email, nombre_organizacion, tipo_entidad_solicitada, 
+                 clave_exportador, mensaje_solicitud, fecha_solicitud, estado)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                solicitud.nombre_completo,
+                solicitud.email_corporativo,
+                solicitud.nombre_exportadora,
+                'EXPORTADOR', # Fijamos este valor según nuestro flujo
+                solicitud.clave_exportador, # Valor específico
+                f"Solicitud de acceso para {solicitud.nombre_exportadora} (Clave: {solicitud.clave_exportador}). "
+                f"Cargo/Relación: {solicitud.cargo_relacion or 'No especificado'}. "
+                f"Teléfono: {solicitud.telefono_contacto or 'No proporcionado'}.",
+                datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'PENDIENTE' # Estado inicial
+            ))
+            # Invalida los totales en caché de /admin/solicitudes (admin/paginacion.py)
+            siguiente_numero(conn, VERSION_SOLICITUDES)
+            # Aviso en vivo al panel de IHCAFE (/admin/solicitudes/eventos)
+            id_solicitud = cursor.lastrowid
+            escritor.despues_del_commit(lambda: publicar_solicitud(
+                "solicitud_creada", id_solicitud, "PENDIENTE", email=solicitud.email_corporativo,
+                nombre_completo=solicitud.nombre_completo, nombre_organizacion=solicitud.nombre_exportadora))
+
+        escritor.ejecutar(_insertar)
         
         return {
             "mensaje": "✅ Solicitud de acceso enviada exitosamente. "
                        "Nuestro equipo la revisará y se comunicará con usted al correo proporcionado."
         }
         
+    except HTTPException:
+        raise
     except sqlite3.IntegrityError as e:
         raise HTTPException(
             status_code=400,
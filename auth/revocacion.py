@@ -0,0 +1,80 @@
+# ==auth/revocacion.py #043
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from base_datos.conexion import obtener_conexion
+from base_datos.escritor import escritor
+from base_datos.secuencias import siguiente_numero, valor_actual
+
+# --- Revocación de tokens JWT ---
+# Los tokens se autorizan solo con sus claims (auth/seguridad.py). Para que una
+# desactivación o un "cerrar sesión en todos lados" tenga efecto antes de que el
+# token expire, cada revocación se guarda en tokens_revocados y aumenta el contador
+# 'tokens_revocados' de la tabla secuencias.
+#
+# Cada proceso guarda el conjunto en memoria y, como mucho cada INTERVALO_REVISION
+# segundos, lee el contador (una búsqueda por clave primaria). Solo si cambió vuelve
+# a cargar la tabla. Las revocaciones hechas en este proceso se aplican al instante.
+#
+# require_role confía también en el claim de rol: hoy no hay ningún endpoint que
+# cambie id_rol, pero el que se agregue debe llamar a revocar_tokens() en el mismo
+# trabajo del escritor, o el token anterior conserva el rol viejo hasta expirar.
+
+AMBITO_VERSION = "tokens_revocados"
+INTERVALO_REVISION = 1.0  # segundos
+
+
+class RegistroRevocaciones:
+    def __init__(self, intervalo: float = INTERVALO_REVISION):
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._revocados: Dict[int, float] = {}  # id_usuario -> revocado_desde
+        self._version: Optional[int] = None
+        self._ultima_revision = 0.0
+
+    def token_vigente(self, id_usuario: int, emitido: float) -> bool:
+        """False si los tokens de id_usuario emitidos en 'emitido' (claim iat) fueron revocados."""
+        self._refrescar()
+        revocado_desde = self._revocados.get(id_usuario)
+        return revocado_desde is None or emitido >= revocado_desde
+
+    def _refrescar(self, forzar: bool = False):
+        ahora = time.monotonic()
+        if not forzar and ahora - self._ultima_revision < self.intervalo:
+            return
+        with self._lock:
+            if not forzar and ahora - self._ultima_revision < self.intervalo:
+                return
+            with obtener_conexion() as conn:
+                version = valor_actual(conn, AMBITO_VERSION)
+                if version != self._version:
+                    filas = conn.execute("SELECT id_usuario, revocado_desde FROM tokens_revocados").fetchall()
+                    self._revocados = {fila[0]: fila[1] for fila in filas}
+                    self._version = version
+            self._ultima_revision = ahora
+
+    def _aplicar_local(self, id_usuario: int, revocado_desde: float):
+        with self._lock:
+            self._revocados[id_usuario] = revocado_desde
+
+
+revocaciones = RegistroRevocaciones()
+
+
+def revocar_tokens(conn: sqlite3.Connection, id_usuario: int) -> float:
+    """
+    Invalida todos los tokens emitidos hasta ahora para id_usuario.
+    Debe ejecutarse dentro de un trabajo del escritor único.
+    """
+    # Sin redondear: el claim iat tiene milisegundos truncados, así que un token emitido antes
+    # de este instante queda invalidado y uno emitido después (desde el milisegundo siguiente) vale
+    revocado_desde = time.time()
+    conn.execute("""
+        INSERT INTO tokens_revocados (id_usuario, revocado_desde) VALUES (?, ?)
+        ON CONFLICT(id_usuario) DO UPDATE SET revocado_desde = excluded.revocado_desde
+    """, (id_usuario, revocado_desde))
+    siguiente_numero(conn, AMBITO_VERSION)
+    escritor.despues_del_commit(lambda: revocaciones._aplicar_local(id_usuario, revocado_desde))
+    return revocado_desde
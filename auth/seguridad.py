@@ -1,16 +1,18 @@
 # ==auth/seguridad.py #006
 from passlib.context import CryptContext
 import jwt
+import time
+from typing import Optional
 from datetime import datetime, timedelta
 from config.settings import SECRET_KEY, ALGORITHM
 
 # --- Importaciones para la nueva función de seguridad ---
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer # <-- Importar OAuth2PasswordBearer
 from jose import JWTError, jwt
-# Asumimos que tienes un CRUD para obtener usuarios
-from usuarios.crud import obtener_usuario_por_id
-from usuarios.modelos import Usuario
+from usuarios.modelos import Usuario, UsuarioToken
+from auth.revocacion import revocaciones
+from usuarios.actividad import actividad_usuarios
 # ---
 
 # Configuración para hash de contraseñas
@@ -18,6 +20,7 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # --- Definición de oauth2_scheme (DEBE estar antes de usarla) ---
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
+oauth2_scheme_opcional = OAuth2PasswordBearer(tokenUrl="login", auto_error=False)
 # ---------------------------------------------------------------
 
 def hash_password(password: str) -> str:
@@ -37,58 +40,119 @@ def crear_token_acceso(data: dict):
     return encoded_jwt
 
 
-# --- Nueva función de dependencia para verificar rol admin_ihcafe ---
+# --- Roles (ids sembrados por la migración 1, base_datos/migraciones.py) ---
+ROLES = {
+    "admin_ihcafe": 1,
+    "editor_exportador": 2,
+    "basico_gestor": 3,
+}
+NOMBRES_ROL = {id_rol: nombre for nombre, id_rol in ROLES.items()}
 
-async def get_admin_ihcafe_actual(token: str = Depends(oauth2_scheme)):
+
+def claims_de_usuario(usuario: Usuario) -> dict:
     """
-    Dependencia de FastAPI para verificar que el usuario actual:
-    1. Tiene un token JWT válido.
-    2. El token no ha expirado.
-    3. El ID de usuario en el token corresponde a un usuario real.
-    4. El usuario tiene el rol 'admin_ihcafe' (id_rol = 1).
-    
-    Si todo es correcto, devuelve el objeto Usuario.
-    Si hay algún problema, lanza una excepción HTTP 401 o 403.
+    Claims del token de acceso. Llevan todo lo necesario para autorizar
+    (rol, entidad, activo), así las peticiones protegidas no consultan la base.
     """
-    credentials_exception = HTTPException(
+    return {
+        "sub": str(usuario.id_usuario),
+        "email": usuario.email,
+        "rol_id": str(usuario.id_rol),
+        "rol": NOMBRES_ROL.get(usuario.id_rol, str(usuario.id_rol)),
+        "id_entidad": usuario.id_entidad,
+        "activo": bool(usuario.activo),
+        # Con milisegundos (truncados): se compara con revocado_desde (auth/revocacion.py) y un
+        # token emitido justo después de una revocación, en el mismo segundo, debe valer
+        "iat": int(time.time() * 1000) / 1000,
+    }
+
+
+# --- Dependencias de autorización ---
+
+def _credenciales_invalidas() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="No se pudieron validar las credenciales",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    forbidden_exception = HTTPException(
-        status_code=status.HTTP_403_FORBIDDEN,
-        detail="Se requiere rol de administrador de IHCAFE",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        # 1. Verificar y decodificar el token
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
+
+
+def require_role(*roles: str, token_en_query: bool = False):
+    """
+    Crea una dependencia de FastAPI que exige un token válido de alguno de los roles indicados.
+    Uso: admin: UsuarioToken = Depends(require_role("admin_ihcafe"))
+
+    token_en_query=True acepta además ?token=... (EventSource del navegador no puede
+    enviar la cabecera Authorization). Solo para endpoints de lectura como los de SSE.
+
+    Autoriza solo con los claims del token: no consulta al usuario en la base.
+    Las desactivaciones y revocaciones se aplican con el registro en memoria de
+    auth/revocacion.py (que lee la base solo cuando cambió su contador de versión).
+    """
+    desconocidos = [rol for rol in roles if rol not in ROLES]
+    if desconocidos:
+        raise ValueError(f"Roles desconocidos: {', '.join(desconocidos)}")
+    ids_permitidos = {ROLES[rol] for rol in roles}
+    detalle_prohibido = f"Se requiere rol: {' o '.join(roles)}"
+
+    def validar(token: str) -> UsuarioToken:
+        credentials_exception = _credenciales_invalidas()
+        try:
+            # 1. Verificar firma y expiración del token
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            id_usuario = int(payload["sub"])
+            id_rol = int(payload["rol_id"])
+            activo = payload["activo"]  # Tokens emitidos antes de los claims de autorización: iniciar sesión de nuevo
+            emitido = float(payload["iat"])
+        except (JWTError, KeyError, TypeError, ValueError):
+            raise credentials_exception
+
+        # 2. Revocado (desactivación, cierre de sesión en todos lados)
+        if not revocaciones.token_vigente(id_usuario, emitido):
             raise credentials_exception
-        # Puedes verificar otros claims aquí si es necesario, como expiración
-        
-    except JWTError:
-        raise credentials_exception
-
-    # 2. Obtener el usuario de la base de datos
-    usuario = obtener_usuario_por_id(int(user_id)) # Asumimos que obtener_usuario_por_id existe y devuelve un objeto Usuario o None
-    if usuario is None:
-        raise credentials_exception
-        
-    # 3. Verificar que el usuario esté activo
-    if not usuario.activo:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Usuario inactivo"
+
+        # 3. Usuario activo al momento de emitir el token
+        if not activo:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Usuario inactivo"
+            )
+
+        # 4. Verificar el rol
+        if id_rol not in ids_permitidos:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=detalle_prohibido,
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+        # 5. Última actividad (en memoria; se escribe por lotes)
+        actividad_usuarios.registrar_actividad(id_usuario)
+
+        return UsuarioToken(
+            id_usuario=id_usuario,
+            email=payload.get("email"),
+            id_rol=id_rol,
+            rol=payload.get("rol", NOMBRES_ROL.get(id_rol, str(id_rol))),
+            id_entidad=payload.get("id_entidad"),
+            activo=True,
         )
-        
-    # 4. Verificar el rol
-    # Asumimos que el rol 'admin_ihcafe' tiene id_rol = 1
-    # O podríamos verificar por nombre_rol directamente si es más seguro
-    if usuario.id_rol != 1: # id_rol para 'admin_ihcafe'
-        raise forbidden_exception
-        
-    # Si todo pasó, devolvemos el usuario
-    return usuario
 
+    # Funciones normales (no async): FastAPI las corre en el threadpool. validar() puede
+    # consultar SQLite (recarga de revocaciones) y no debe bloquear el event loop.
+    def dependencia(token: str = Depends(oauth2_scheme)) -> UsuarioToken:
+        return validar(token)
+
+    def dependencia_con_query(
+        token_cabecera: Optional[str] = Depends(oauth2_scheme_opcional),
+        token: Optional[str] = Query(None),
+    ) -> UsuarioToken:
+        if not (token_cabecera or token):
+            raise _credenciales_invalidas()
+        return validar(token_cabecera or token)
+
+    return dependencia_con_query if token_en_query else dependencia
+
+
+# Dependencia para verificar rol admin_ihcafe (id_rol = 1); devuelve un UsuarioToken
+get_admin_ihcafe_actual = require_role("admin_ihcafe")
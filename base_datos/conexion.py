@@ -1,166 +1,116 @@
 # ==base_datos/conexion.py #013
 import sqlite3
 import os
+import queue
+from contextlib import contextmanager
+
+# Nombre de la base de datos (definido en config/settings.py)
+from config.settings import DB_NAME
+
+# --- Pool de conexiones ---
+# PRAGMAs aplicados a cada conexión nueva del pool.
+# journal_mode=WAL es persistente en el archivo; los demás son por conexión.
+PRAGMAS_CONEXION = (
+    "PRAGMA journal_mode = WAL",        # Lectores no bloquean al escritor (y viceversa)
+    "PRAGMA synchronous = NORMAL",      # Seguro con WAL, evita un fsync por commit
+    "PRAGMA busy_timeout = 5000",       # Esperar hasta 5 s por el lock en vez de fallar
+    "PRAGMA mmap_size = 268435456",     # 256 MB de lectura por memoria mapeada
+    "PRAGMA cache_size = -16000",       # ~16 MB de caché de páginas por conexión
+    "PRAGMA temp_store = MEMORY",
+)
+
+TAMAÑO_POOL = 16
+
+
+def abrir_conexion(db_name: str = DB_NAME, check_same_thread: bool = True) -> sqlite3.Connection:
+    """Abre una conexión nueva con los PRAGMAs de rendimiento y filas tipo sqlite3.Row."""
+    conn = sqlite3.connect(db_name, check_same_thread=check_same_thread)
+    conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS_CONEXION:
+        conn.execute(pragma)
+    return conn
+
+
+class PoolConexiones:
+    """
+    Pool de conexiones SQLite reutilizables.
+    Cada conexión se abre una sola vez (con los PRAGMAs ya aplicados) y se presta
+    en exclusiva a un hilo del threadpool durante una petición.
+    """
+
+    def __init__(self, db_name: str = DB_NAME, tamaño_maximo: int = TAMAÑO_POOL):
+        self.db_name = db_name
+        self.tamaño_maximo = tamaño_maximo
+        # LIFO: se reutiliza primero la conexión más "caliente" (caché de páginas llena)
+        self._libres = queue.LifoQueue(maxsize=tamaño_maximo)
+
+    def _nueva_conexion(self) -> sqlite3.Connection:
+        # check_same_thread=False: FastAPI puede abrir la dependencia en un hilo del
+        # threadpool y ejecutar el endpoint en otro. El préstamo es exclusivo, así
+        # que nunca hay dos hilos usando la misma conexión a la vez.
+        return abrir_conexion(self.db_name, check_same_thread=False)
+
+    def tomar(self) -> sqlite3.Connection:
+        """Presta una conexión libre o abre una nueva si no hay."""
+        try:
+            return self._libres.get_nowait()
+        except queue.Empty:
+            return self._nueva_conexion()
+
+    def devolver(self, conn: sqlite3.Connection):
+        """Devuelve una conexión al pool, descartando cualquier transacción abierta."""
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._libres.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    @contextmanager
+    def conexion(self):
+        conn = self.tomar()
+        try:
+            yield conn
+        finally:
+            self.devolver(conn)
+
+    def cerrar_todas(self):
+        """Cierra todas las conexiones libres (al apagar la aplicación)."""
+        while True:
+            try:
+                self._libres.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+pool = PoolConexiones()
+
+
+def obtener_conexion():
+    """Context manager para usar una conexión del pool fuera de un endpoint."""
+    return pool.conexion()
+
+
+def get_conexion():
+    """
+    Dependencia de FastAPI que presta una conexión del pool durante la petición.
+    Uso: conn: sqlite3.Connection = Depends(get_conexion)
+    """
+    conn = pool.tomar()
+    try:
+        yield conn
+    finally:
+        pool.devolver(conn)
 
-# Nombre de la base de datos
-DB_NAME = "cafehnd.db"
 
 def crear_base_datos():
-    """Crea la base de datos y las tablas si no existen."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-
-    # Tabla: ROLES
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS roles (
-            id_rol INTEGER PRIMARY KEY AUTOINCREMENT,
-            nombre_rol TEXT UNIQUE NOT NULL,
-            nivel INTEGER NOT NULL,
-            permisos TEXT
-        )
-    ''')
-
-    # Tabla: ENTIDADES
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS entidades (
-            id_entidad INTEGER PRIMARY KEY AUTOINCREMENT,
-            tipo TEXT CHECK(tipo IN ('IHCAFE', 'EXPORTADOR', 'GESTOR')) NOT NULL,
-            nombre TEXT NOT NULL,
-            direccion TEXT,
-            telefono TEXT,
-            contacto_principal TEXT
-        )
-    ''')
-
-    # Tabla: USUARIOS
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS usuarios (
-            id_usuario INTEGER PRIMARY KEY AUTOINCREMENT,
-            nombre_completo TEXT NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            contraseña_hash TEXT NOT NULL,
-            id_rol INTEGER NOT NULL,
-            id_entidad INTEGER,
-            activo BOOLEAN DEFAULT 1,
-            fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
-            ultimo_login DATETIME,
-            FOREIGN KEY (id_rol) REFERENCES roles(id_rol),
-            FOREIGN KEY (id_entidad) REFERENCES entidades(id_entidad)
-        )
-    ''')
-
-    # Tabla: SOLICITUDES_REGISTRO
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS solicitudes_registro (
-            id_solicitud INTEGER PRIMARY KEY AUTOINCREMENT,
-            nombre_completo TEXT NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            nombre_organizacion TEXT,
-            tipo_entidad_solicitada TEXT CHECK(tipo_entidad_solicitada IN ('EXPORTADOR', 'GESTOR')) NOT NULL,
-            clave_exportador TEXT, -- Columna añadida
-            mensaje_solicitud TEXT,
-            fecha_solicitud DATETIME DEFAULT CURRENT_TIMESTAMP,
-            estado TEXT DEFAULT 'PENDIENTE' CHECK(estado IN ('PENDIENTE', 'APROBADA', 'RECHAZADA')),
-            id_usuario_aprobador INTEGER,
-            fecha_respuesta DATETIME,
-            FOREIGN KEY (id_usuario_aprobador) REFERENCES usuarios(id_usuario)
-        )
-    ''')
-
-    # --- Nueva Tabla: CIERRE_NY_ICE_BCH ---
-# ==base_datos/conexion.py #013 (Fragmento actualizado)
-# ... (resto del código existente: importaciones, DB_NAME, otras tablas) ...
-
-    # --- Nueva Tabla: CIERRE_NY_ICE_BCH (Actualizada con columnas de posiciones) ---
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS cierre_ny_ice_bch (
-            id_registro INTEGER PRIMARY KEY AUTOINCREMENT,
-            fecha DATE NOT NULL UNIQUE, -- Fecha del cierre/reportado
-            
-            -- Campos principales
-            precio_usd_saco REAL, -- Precio principal por saco en USD (NY ICE)
-            tasa_cambio_bch REAL, -- Tasa de cambio Lempiras por Dólar (BCH)
-            
-            -- Posiciones ICE - Precios de Cierre (Close#)
-            precio_posicion_dic24 REAL, -- Diciembre 2024
-            precio_posicion_mar25 REAL, -- Marzo 2025
-            precio_posicion_may25 REAL, -- Mayo 2025
-            precio_posicion_jul25 REAL, -- Julio 2025
-            precio_posicion_sep25 REAL, -- Septiembre 2025
-            precio_posicion_dic25 REAL, -- Diciembre 2025
-            precio_posicion_mar26 REAL, -- Marzo 2026
-            precio_posicion_may26 REAL, -- Mayo 2026
-            precio_posicion_jul26 REAL, -- Julio 2026
-            precio_posicion_sep26 REAL, -- Septiembre 2026
-            
-            -- Metadatos
-            fuente_precio TEXT DEFAULT "ICE Futures", -- Fuente del precio
-            fuente_tasa TEXT DEFAULT "Banco Central de Honduras", -- Fuente de la tasa
-            fecha_registro DATETIME DEFAULT CURRENT_TIMESTAMP -- Fecha de registro/actualización en el sistema
-        )
-    ''')
-
-# ==base_datos/conexion.py # Fragmento actualizado ==
-# ... (resto del código existente) ...
-
-# ==base_datos/conexion.py # Fragmento actualizado ==
-# ... (resto del código existente) ...
-
-    # --- Tabla Reemplazada: REGISTRO_COMPRAS_NACIONALES (Formato de la imagen) ---
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS registro_compras_nacionales (
-            id_registro INTEGER PRIMARY KEY AUTOINCREMENT,
-            reg_compa TEXT,          -- Número de serie del reporte (ej: '020/048')
-            registro TEXT,          -- Número de registro dentro del reporte (ej: '020')
-            exp_qic TEXT,            -- Número de Licencia/Registro del Exportador ante OIC
-            cosecha TEXT,            -- Año de cosecha (ej: '2024-2025')
-            fecha DATE,              -- Fecha del reporte/registro
-            sacos46l REAL,           -- Total acumulado anterior de sacos de café lavado
-            valorlemp REAL,          -- Valor Lempiras asociado al acumulado anterior (lavado)
-            sacos46c REAL,           -- Total acumulado anterior de sacos de café corriente
-            valorelemp REAL,         -- Valor Lempiras asociado al acumulado anterior (corriente)
-            clase TEXT,              -- Tipo de café (ej: 'LAVADO', 'CORRIENTE')
-            sede TEXT,               -- Sede o región de origen
-            -- Campos calculados para ESTE REGISTRO (la compra actual que se está registrando)
-            este_registro_sacos REAL GENERATED ALWAYS AS (sacos46l + sacos46c) STORED, -- Total sacos en este registro
-            -- Campo para el nuevo acumulado total (se calcularía en la aplicación)
-            nuevo_acumulado_sacos REAL,
-            -- Metadatos
-            fecha_registro DATETIME DEFAULT CURRENT_TIMESTAMP,
-            observaciones TEXT
-        )
-    ''')
-    # ------------------------------------
-
-# ... (resto del código existente: inserts de roles, entidades, etc.) ...
-
-
-
-    # ------------------------------------
-
-# ... (resto del código existente: inserts de roles, entidades, etc.) ...
-    # ------------------------------------
-
-    # Insertar roles base (ejemplo)
-    roles_base = [
-        ('admin_ihcafe', 1, '{"permisos": ["total"]}'),
-        ('editor_exportador', 2, '{"permisos": ["editar", "ver"]}'),
-        ('basico_gestor', 3, '{"permisos": ["ver"]}')
-    ]
-    cursor.executemany('''
-        INSERT OR IGNORE INTO roles (nombre_rol, nivel, permisos)
-        VALUES (?, ?, ?)
-    ''', roles_base)
-
-    # Insertar entidad base (IHCAFE como ejemplo)
-    cursor.execute('''
-        INSERT OR IGNORE INTO entidades (id_entidad, tipo, nombre)
-        VALUES (1, 'IHCAFE', 'Instituto Hondureño del Café')
-    ''')
-
-    conn.commit()
-    conn.close()
-    print(f"✅ Base de datos '{DB_NAME}' lista.")
+    """
+    Crea la base de datos o la actualiza a la última versión del esquema.
+    Las tablas e índices se definen como migraciones numeradas en base_datos/migraciones.py.
+    """
+    from base_datos.migraciones import aplicar_migraciones  # Import diferido: migraciones importa este módulo
+    version = aplicar_migraciones(DB_NAME)
+    print(f"✅ Base de datos '{DB_NAME}' lista (esquema v{version}).")
 
 if __name__ == "__main__":
     crear_base_datos()
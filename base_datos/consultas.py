@@ -0,0 +1,50 @@
+# ==base_datos/consultas.py #029
+import sqlite3
+from typing import Any, Dict, Iterable, Optional
+
+# INSERT ... RETURNING existe desde SQLite 3.35.0 (marzo 2021).
+# Con versiones anteriores se usa el camino clásico: INSERT + SELECT de lectura.
+SOPORTA_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+
+def insertar_retornando(
+    conn: sqlite3.Connection,
+    tabla: str,
+    datos: Dict[str, Any],
+    clave_conflicto: Optional[str] = None,
+    set_extra: Iterable[str] = (),
+) -> Optional[Dict[str, Any]]:
+    """
+    Inserta una fila y devuelve la fila completa tal como quedó guardada
+    (incluye id autoincremental, DEFAULTs y columnas GENERATED) en una sola sentencia.
+
+    Si se indica 'clave_conflicto', hace un upsert: ON CONFLICT(clave) DO UPDATE
+    de todas las demás columnas de 'datos', más las asignaciones de 'set_extra'
+    (ej: "fecha_registro = CURRENT_TIMESTAMP").
+
+    'tabla' y las claves de 'datos' deben ser nombres fijos del código, nunca texto del usuario.
+    """
+    campos = list(datos.keys())
+    valores = tuple(datos.values())
+    placeholders = ", ".join(["?" for _ in campos])
+    sql = f"INSERT INTO {tabla} ({', '.join(campos)}) VALUES ({placeholders})"
+
+    if clave_conflicto:
+        set_parts = [f"{campo} = excluded.{campo}" for campo in campos if campo != clave_conflicto]
+        set_parts.extend(set_extra)
+        sql += f" ON CONFLICT({clave_conflicto}) DO UPDATE SET " + ", ".join(set_parts)
+
+    if SOPORTA_RETURNING:
+        # fetchall() finaliza la sentencia (necesario antes de liberar un SAVEPOINT)
+        filas = conn.execute(sql + " RETURNING *", valores).fetchall()
+        return dict(filas[0]) if filas else None
+
+    # --- Respaldo para SQLite < 3.35: una lectura adicional ---
+    cursor = conn.execute(sql, valores)
+    if clave_conflicto:
+        # En un upsert que actualiza, lastrowid no es fiable: leer por la clave
+        cursor.execute(f"SELECT * FROM {tabla} WHERE {clave_conflicto} = ?", (datos[clave_conflicto],))
+    else:
+        cursor.execute(f"SELECT * FROM {tabla} WHERE rowid = ?", (cursor.lastrowid,))
+    fila = cursor.fetchone()
+    return dict(fila) if fila else None
@@ -0,0 +1,214 @@
+# ==base_datos/escritor.py #025
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable
+
+from config.settings import DB_NAME
+from base_datos.conexion import abrir_conexion
+
+# Señal interna para detener el hilo escritor
+_ALTO = object()
+
+
+class EscritorUnico:
+    """
+    Hilo dedicado que ejecuta TODAS las escrituras de la aplicación.
+
+    SQLite admite un solo escritor a la vez; en lugar de que cada petición compita
+    por el lock (y falle con "database is locked"), los endpoints envían su trabajo
+    a una cola. El hilo agrupa los trabajos pendientes en una sola transacción por
+    ventana de commit (group commit) y resuelve el Future de cada llamador cuando
+    el COMMIT termina.
+
+    Un "trabajo" es una función que recibe la conexión de escritura y devuelve
+    cualquier valor (lastrowid, filas, etc.). NO debe llamar a conn.commit():
+    cada trabajo corre dentro de su propio SAVEPOINT, así que si lanza una
+    excepción solo se deshacen sus cambios y los demás trabajos del lote siguen.
+
+    Si un trabajo necesita actualizar algo fuera de la base (cachés en memoria),
+    registra la acción con despues_del_commit(): se ejecuta en el hilo escritor,
+    en orden de commit, solo si el trabajo se confirmó.
+    """
+
+    def __init__(self, db_name: str = DB_NAME, ventana_ms: float = 2.0, max_lote: int = 64):
+        self.db_name = db_name
+        self.ventana = ventana_ms / 1000.0
+        self.max_lote = max_lote
+        self._cola = queue.Queue()
+        self._hilo = None
+        self._lock = threading.Lock()
+        self._acciones_trabajo = None  # Acciones del trabajo en curso (solo hilo escritor)
+
+    # --- Ciclo de vida ---
+
+    def iniciar(self):
+        with self._lock:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._bucle, name="escritor-sqlite", daemon=True)
+                self._hilo.start()
+
+    def detener(self, timeout: float = 5.0):
+        """Procesa lo que quede en la cola y detiene el hilo (al apagar la aplicación)."""
+        with self._lock:
+            hilo = self._hilo
+            self._hilo = None
+        if hilo is not None and hilo.is_alive():
+            self._cola.put(_ALTO)
+            hilo.join(timeout)
+
+    # --- API para los endpoints ---
+
+    def enviar(self, trabajo: Callable[[sqlite3.Connection], Any]) -> Future:
+        """Encola un trabajo de escritura y devuelve su Future."""
+        if self._hilo is None or not self._hilo.is_alive():
+            self.iniciar()
+        futuro = Future()
+        self._cola.put((trabajo, futuro))
+        return futuro
+
+    def ejecutar(self, trabajo: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Encola un trabajo y espera su resultado (o relanza su excepción)."""
+        return self.enviar(trabajo).result()
+
+    def despues_del_commit(self, accion: Callable[[], Any]):
+        """
+        Desde un trabajo: ejecuta 'accion' después del COMMIT que lo confirma
+        (y antes de despertar a su llamador). Si el trabajo falla, se descarta.
+        """
+        if self._acciones_trabajo is None:
+            raise RuntimeError("despues_del_commit() solo puede llamarse desde un trabajo del escritor.")
+        self._acciones_trabajo.append(accion)
+
+    def ejecutar_sql(self, sql: str, parametros=()) -> int:
+        """Atajo para una sola sentencia; devuelve el lastrowid."""
+        return self.ejecutar(lambda conn: conn.execute(sql, parametros).lastrowid)
+
+    # --- Hilo escritor ---
+
+    def _bucle(self):
+        conn = abrir_conexion(self.db_name)
+        # Modo autocommit: las transacciones se controlan explícitamente en _procesar_lote
+        conn.isolation_level = None
+        try:
+            detener = False
+            while not detener:
+                item = self._cola.get()
+                if item is _ALTO:
+                    break
+                lote = [item]
+                limite = time.monotonic() + self.ventana
+                # Juntar los trabajos que lleguen durante la ventana de commit
+                while len(lote) < self.max_lote:
+                    restante = limite - time.monotonic()
+                    try:
+                        item = self._cola.get(timeout=restante) if restante > 0 else self._cola.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _ALTO:
+                        detener = True
+                        break
+                    lote.append(item)
+                try:
+                    self._procesar_lote(conn, lote)
+                except Exception as e:
+                    # Último recurso: un error inesperado no debe matar el hilo (las llamadas
+                    # pendientes y futuras quedarían esperando para siempre)
+                    print(f"⚠️ Error en el hilo escritor: {e}")
+                    try:
+                        if conn.in_transaction:
+                            conn.execute("ROLLBACK")
+                    except sqlite3.Error as error_rollback:
+                        print(f"⚠️ No se pudo deshacer el lote: {error_rollback}")
+                    for _, futuro in lote:
+                        # Pueden estar pendientes o ya en RUNNING: set_exception sirve para ambos
+                        if not futuro.done():
+                            futuro.set_exception(e)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _deshacer_trabajo(conn: sqlite3.Connection) -> bool:
+        """Deshace el SAVEPOINT del trabajo; False si ya no existe (la transacción terminó)."""
+        try:
+            conn.execute("ROLLBACK TO trabajo")
+            conn.execute("RELEASE trabajo")
+            return True
+        except sqlite3.Error:
+            return False
+
+    @staticmethod
+    def _fallar(lote, error: BaseException):
+        for _, futuro in lote:
+            if futuro.set_running_or_notify_cancel():
+                futuro.set_exception(error)
+
+    def _procesar_lote(self, conn: sqlite3.Connection, lote):
+        resultados = []
+        acciones = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except Exception as e:
+            self._fallar(lote, e)
+            return
+
+        error_lote = None
+        for posicion, (trabajo, futuro) in enumerate(lote):
+            if not futuro.set_running_or_notify_cancel():
+                continue
+            try:
+                conn.execute("SAVEPOINT trabajo")
+            except Exception as e:
+                error_lote = e
+                resultados.append((futuro, None, e))
+                self._fallar(lote[posicion + 1:], e)
+                break
+            self._acciones_trabajo = []
+            try:
+                resultado = trabajo(conn)
+                conn.execute("RELEASE trabajo")
+                resultados.append((futuro, resultado, None))
+                acciones.extend(self._acciones_trabajo)
+            except BaseException as e:
+                resultados.append((futuro, None, e))
+                if not self._deshacer_trabajo(conn):
+                    # El trabajo terminó la transacción (COMMIT propio, o SQLite la deshizo
+                    # por SQLITE_FULL / IOERR): no se sabe qué quedó guardado del lote
+                    error_lote = e
+                    self._fallar(lote[posicion + 1:], e)
+                    break
+            finally:
+                self._acciones_trabajo = None
+
+        if error_lote is not None:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            error = RuntimeError(f"Lote de escritura interrumpido: {error_lote}")
+            resultados = [(futuro, None, e or error) for futuro, _, e in resultados]
+            acciones = []
+        else:
+            try:
+                conn.execute("COMMIT")
+            except Exception as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                resultados = [(futuro, None, e) for futuro, _, _ in resultados]
+                acciones = []
+
+        for accion in acciones:
+            try:
+                accion()
+            except Exception as e:
+                print(f"⚠️ Error en acción posterior al commit: {e}")
+
+        # Los llamadores se despiertan solo cuando sus datos ya son durables
+        for futuro, resultado, error in resultados:
+            if error is not None:
+                futuro.set_exception(error)
+            else:
+                futuro.set_result(resultado)
+
+
+escritor = EscritorUnico()
@@ -0,0 +1,690 @@
+# ==base_datos/migraciones.py #032
+import os
+import re
+import socket
+import sqlite3
+import time
+import unicodedata
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from config.settings import DB_NAME
+from base_datos.conexion import abrir_conexion
+
+# --- Motor de migraciones ---
+# Cada migración tiene un número consecutivo. La versión aplicada se guarda en
+# PRAGMA user_version, así que al iniciar solo se ejecutan las migraciones pendientes.
+#
+# Migración normal: se ejecuta completa dentro de una transacción (el DDL de SQLite
+# es transaccional): o se aplica todo, o nada.
+# Migración "en línea" (en_linea=True): maneja sus propias transacciones cortas
+# (p. ej. reconstruir_tabla_en_linea) para no bloquear a la aplicación; debe poder
+# reanudarse si se interrumpe a medias.
+#
+# Como corre en varias transacciones, con varios procesos iniciando a la vez solo
+# uno puede ejecutarla: antes de empezar, el proceso la reclama con una fila en
+# 'migraciones_en_curso' (dentro de BEGIN IMMEDIATE). Los demás esperan a que la
+# versión avance. Un reclamo se considera abandonado si su proceso ya no existe
+# (mismo equipo) o si pasó MIGRACION_ABANDONADA_S sin terminar.
+
+MIGRACION_ABANDONADA_S = 3600
+ESPERA_MIGRACION_S = 0.2
+
+MIGRACIONES: List[Tuple[int, str, Callable[[sqlite3.Connection], None], bool]] = []
+
+
+def migracion(numero: int, descripcion: str, en_linea: bool = False):
+    """Decorador que registra una migración numerada."""
+    def registrar(funcion):
+        if MIGRACIONES and numero != MIGRACIONES[-1][0] + 1:
+            raise ValueError(f"Migración {numero} fuera de orden (última: {MIGRACIONES[-1][0]}).")
+        MIGRACIONES.append((numero, descripcion, funcion, en_linea))
+        return funcion
+    return registrar
+
+
+def version_actual(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def version_esperada() -> int:
+    return MIGRACIONES[-1][0] if MIGRACIONES else 0
+
+
+def aplicar_migraciones(db_name: str = DB_NAME) -> int:
+    """
+    Aplica las migraciones pendientes y devuelve la versión final del esquema.
+    Seguro con varios procesos iniciando a la vez: la versión se vuelve a leer
+    dentro de BEGIN IMMEDIATE antes de aplicar cada migración, y las migraciones
+    en línea se reclaman antes de empezar (ver _reclamar_migracion).
+    """
+    conn = abrir_conexion(db_name)
+    conn.isolation_level = None  # Transacciones explícitas
+    try:
+        version = version_actual(conn)
+        if version > version_esperada():
+            raise RuntimeError(
+                f"La base de datos '{db_name}' está en la versión {version}, "
+                f"más nueva que la del código ({version_esperada()})."
+            )
+        for numero, descripcion, funcion, en_linea in MIGRACIONES:
+            if numero <= version:
+                continue
+            inicio = time.perf_counter()
+            if en_linea:
+                if not _reclamar_migracion(conn, numero):  # Otro proceso la aplicó
+                    version = numero
+                    continue
+                try:
+                    funcion(conn)
+                except BaseException:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    _liberar_migracion(conn, numero)
+                    raise
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute("DELETE FROM migraciones_en_curso WHERE numero = ?", (numero,))
+                if version_actual(conn) >= numero:  # Reclamo tomado por abandonado y terminado por otro
+                    conn.execute("COMMIT")
+                    version = numero
+                    continue
+            else:
+                conn.execute("BEGIN IMMEDIATE")
+                if version_actual(conn) >= numero:  # Otro proceso ya la aplicó
+                    conn.execute("COMMIT")
+                    version = numero
+                    continue
+                try:
+                    funcion(conn)
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+            conn.execute(f"PRAGMA user_version = {numero}")
+            conn.execute("COMMIT")
+            version = numero
+            print(f"✅ Migración {numero:03d} aplicada: {descripcion} ({time.perf_counter() - inicio:.2f} s)")
+        return version
+    finally:
+        conn.close()
+
+
+def _proceso_vivo(equipo: str, pid: int) -> bool:
+    if equipo != socket.gethostname():
+        return True  # No se puede comprobar: se confía en MIGRACION_ABANDONADA_S
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _reclamar_migracion(conn: sqlite3.Connection, numero: int) -> bool:
+    """
+    Reclama la migración en línea 'numero' para este proceso. Devuelve False si ya
+    está aplicada (la aplicó otro proceso, posiblemente mientras se esperaba).
+    """
+    while True:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if version_actual(conn) >= numero:
+                conn.execute("COMMIT")
+                return False
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS migraciones_en_curso (
+                    numero INTEGER PRIMARY KEY,
+                    equipo TEXT NOT NULL,
+                    pid INTEGER NOT NULL,
+                    desde REAL NOT NULL
+                )
+            """)
+            fila = conn.execute(
+                "SELECT equipo, pid, desde FROM migraciones_en_curso WHERE numero = ?", (numero,)
+            ).fetchone()
+            if fila is None or time.time() - fila[2] > MIGRACION_ABANDONADA_S or not _proceso_vivo(fila[0], fila[1]):
+                conn.execute(
+                    "INSERT OR REPLACE INTO migraciones_en_curso (numero, equipo, pid, desde) VALUES (?, ?, ?, ?)",
+                    (numero, socket.gethostname(), os.getpid(), time.time()),
+                )
+                conn.execute("COMMIT")
+                return True
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        time.sleep(ESPERA_MIGRACION_S)
+
+
+def _liberar_migracion(conn: sqlite3.Connection, numero: int):
+    conn.execute("BEGIN IMMEDIATE")
+    conn.execute("DELETE FROM migraciones_en_curso WHERE numero = ?", (numero,))
+    conn.execute("COMMIT")
+
+
+# --- Utilidades para las migraciones ---
+
+def columnas_tabla(conn: sqlite3.Connection, tabla: str, incluir_generadas: bool = True) -> List[str]:
+    """Columnas de la tabla en orden. table_xinfo marca las generadas con hidden = 2 ó 3."""
+    filas = conn.execute(f"PRAGMA table_xinfo({tabla})").fetchall()
+    return [fila[1] for fila in filas if incluir_generadas or fila[6] not in (2, 3)]
+
+
+def existe_tabla(conn: sqlite3.Connection, tabla: str) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (tabla,)
+    ).fetchone() is not None
+
+
+def reconstruir_tabla_en_linea(
+    conn: sqlite3.Connection,
+    tabla: str,
+    ddl: str,
+    indices: Sequence[Tuple[str, str]] = (),
+    lote: int = 5000,
+    progreso: Optional[Callable[[int], None]] = None,
+):
+    """
+    Reconstruye 'tabla' con un nuevo esquema sin bloquear la aplicación por minutos.
+
+    'ddl' es el CREATE TABLE de la tabla nueva con '{tabla}' en lugar del nombre.
+    'indices' son pares (nombre, columnas) que tendrá la tabla nueva; se crean antes
+    de copiar, así el costo de construirlos se reparte entre los lotes.
+
+    1. Se crea la tabla nueva y unos triggers que anotan en '<tabla>__cambios' cada
+       fila de la tabla vieja que la aplicación inserte, modifique o borre.
+    2. Las filas se copian por rangos de rowid, una transacción corta por lote: entre
+       lote y lote el hilo escritor de la aplicación sigue trabajando.
+    3. En una última transacción corta se vuelven a copiar las filas anotadas, se
+       borra la tabla vieja y la nueva toma su nombre.
+
+    Las columnas que existen en ambas tablas se copian; las GENERATED se recalculan.
+    Si se interrumpe, al volver a ejecutarse empieza de nuevo desde cero.
+    """
+    nueva = f"{tabla}__nueva"
+    cambios = f"{tabla}__cambios"
+    sufijos_triggers = ("ins", "upd", "del")
+
+    # --- 1. Preparación (limpia restos de un intento anterior) ---
+    conn.execute("BEGIN IMMEDIATE")
+    conn.execute(f"DROP TABLE IF EXISTS {nueva}")
+    conn.execute(f"DROP TABLE IF EXISTS {cambios}")
+    for sufijo in sufijos_triggers:
+        conn.execute(f"DROP TRIGGER IF EXISTS {tabla}__trg_{sufijo}")
+    conn.execute(ddl.format(tabla=nueva))
+    for nombre, columnas_indice in indices:
+        conn.execute(f"DROP INDEX IF EXISTS {nombre}")
+        conn.execute(f"CREATE INDEX {nombre} ON {nueva} ({columnas_indice})")
+    conn.execute(f"CREATE TABLE {cambios} (fila INTEGER PRIMARY KEY)")
+    conn.execute(f"""CREATE TRIGGER {tabla}__trg_ins AFTER INSERT ON {tabla}
+        BEGIN INSERT OR IGNORE INTO {cambios} (fila) VALUES (NEW.rowid); END""")
+    conn.execute(f"""CREATE TRIGGER {tabla}__trg_upd AFTER UPDATE ON {tabla}
+        BEGIN INSERT OR IGNORE INTO {cambios} (fila) VALUES (OLD.rowid); END""")
+    conn.execute(f"""CREATE TRIGGER {tabla}__trg_del AFTER DELETE ON {tabla}
+        BEGIN INSERT OR IGNORE INTO {cambios} (fila) VALUES (OLD.rowid); END""")
+    conn.execute("COMMIT")
+
+    destino = set(columnas_tabla(conn, nueva, incluir_generadas=False))
+    comunes = [c for c in columnas_tabla(conn, tabla, incluir_generadas=False) if c in destino]
+    lista = ", ".join(comunes)
+
+    # --- 2. Copia por lotes ---
+    ultimo = None
+    copiadas = 0
+    while True:
+        conn.execute("BEGIN IMMEDIATE")
+        if ultimo is None:
+            limite = conn.execute(
+                f"SELECT rowid FROM {tabla} ORDER BY rowid LIMIT 1 OFFSET ?", (lote - 1,)
+            ).fetchone()
+        else:
+            limite = conn.execute(
+                f"SELECT rowid FROM {tabla} WHERE rowid > ? ORDER BY rowid LIMIT 1 OFFSET ?", (ultimo, lote - 1)
+            ).fetchone()
+        hasta = limite[0] if limite else None
+        condiciones, parametros = [], []
+        if ultimo is not None:
+            condiciones.append("rowid > ?")
+            parametros.append(ultimo)
+        if hasta is not None:
+            condiciones.append("rowid <= ?")
+            parametros.append(hasta)
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        cursor = conn.execute(
+            f"INSERT OR REPLACE INTO {nueva} ({lista}) SELECT {lista} FROM {tabla} {where}", parametros
+        )
+        copiadas += max(cursor.rowcount, 0)
+        conn.execute("COMMIT")
+        if progreso:
+            progreso(copiadas)
+        if hasta is None:
+            break
+        ultimo = hasta
+
+    # --- 3. Ponerse al día y hacer el cambio de nombre ---
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(f"DELETE FROM {nueva} WHERE rowid IN (SELECT fila FROM {cambios})")
+        conn.execute(
+            f"INSERT INTO {nueva} ({lista}) SELECT {lista} FROM {tabla} WHERE rowid IN (SELECT fila FROM {cambios})"
+        )
+        for sufijo in sufijos_triggers:
+            conn.execute(f"DROP TRIGGER {tabla}__trg_{sufijo}")
+        conn.execute(f"DROP TABLE {cambios}")
+        # Sin esto, SQLite intentaría reescribir vistas que aún apuntan a la tabla vieja
+        conn.execute("PRAGMA legacy_alter_table = ON")
+        conn.execute(f"DROP TABLE {tabla}")
+        conn.execute(f"ALTER TABLE {nueva} RENAME TO {tabla}")
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.execute("PRAGMA legacy_alter_table = OFF")
+
+
+# =====================================================================
+# Migraciones
+# =====================================================================
+
+@migracion(1, "Esquema base")
+def _m001_esquema_base(conn: sqlite3.Connection):
+    # Tabla: ROLES
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS roles (
+            id_rol INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre_rol TEXT UNIQUE NOT NULL,
+            nivel INTEGER NOT NULL,
+            permisos TEXT
+        )
+    ''')
+
+    # Tabla: ENTIDADES
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS entidades (
+            id_entidad INTEGER PRIMARY KEY AUTOINCREMENT,
+            tipo TEXT CHECK(tipo IN ('IHCAFE', 'EXPORTADOR', 'GESTOR')) NOT NULL,
+            nombre TEXT NOT NULL,
+            direccion TEXT,
+            telefono TEXT,
+            contacto_principal TEXT
+        )
+    ''')
+
+    # Tabla: USUARIOS
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id_usuario INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre_completo TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            contraseña_hash TEXT NOT NULL,
+            id_rol INTEGER NOT NULL,
+            id_entidad INTEGER,
+            activo BOOLEAN DEFAULT 1,
+            fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+            ultimo_login DATETIME,
+            FOREIGN KEY (id_rol) REFERENCES roles(id_rol),
+            FOREIGN KEY (id_entidad) REFERENCES entidades(id_entidad)
+        )
+    ''')
+
+    # Tabla: SOLICITUDES_REGISTRO
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS solicitudes_registro (
+            id_solicitud INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre_completo TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            nombre_organizacion TEXT,
+            tipo_entidad_solicitada TEXT CHECK(tipo_entidad_solicitada IN ('EXPORTADOR', 'GESTOR')) NOT NULL,
+            clave_exportador TEXT,
+            mensaje_solicitud TEXT,
+            fecha_solicitud DATETIME DEFAULT CURRENT_TIMESTAMP,
+            estado TEXT DEFAULT 'PENDIENTE' CHECK(estado IN ('PENDIENTE', 'APROBADA', 'RECHAZADA')),
+            id_usuario_aprobador INTEGER,
+            fecha_respuesta DATETIME,
+            FOREIGN KEY (id_usuario_aprobador) REFERENCES usuarios(id_usuario)
+        )
+    ''')
+
+    # Tabla: CIERRE_NY_ICE_BCH (forma canónica: ver migración 3)
+    conn.execute(DDL_CIERRE_NY_ICE_BCH.format(tabla="IF NOT EXISTS cierre_ny_ice_bch"))
+
+    # Tabla: REGISTRO_COMPRAS_NACIONALES
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS registro_compras_nacionales (
+            id_registro INTEGER PRIMARY KEY AUTOINCREMENT,
+            reg_compa TEXT,          -- Número de serie del reporte (ej: '020/048')
+            registro TEXT,           -- Número de registro dentro del reporte (ej: '020')
+            exp_qic TEXT,            -- Número de Licencia/Registro del Exportador ante OIC
+            cosecha TEXT,            -- Año de cosecha (ej: '2024-2025')
+            fecha DATE,              -- Fecha del reporte/registro
+            sacos46l REAL,           -- Total acumulado anterior de sacos de café lavado
+            valorlemp REAL,          -- Valor Lempiras asociado al acumulado anterior (lavado)
+            sacos46c REAL,           -- Total acumulado anterior de sacos de café corriente
+            valorelemp REAL,         -- Valor Lempiras asociado al acumulado anterior (corriente)
+            clase TEXT,              -- Tipo de café (ej: 'LAVADO', 'CORRIENTE')
+            sede TEXT,               -- Sede o región de origen
+            este_registro_sacos REAL GENERATED ALWAYS AS (sacos46l + sacos46c) STORED, -- Total sacos en este registro
+            nuevo_acumulado_sacos REAL, -- Nuevo acumulado total (calculado en la aplicación)
+            fecha_registro DATETIME DEFAULT CURRENT_TIMESTAMP,
+            observaciones TEXT
+        )
+    ''')
+
+    # Tabla: COMPRAS_NACIONALES_EXPORTADOR (usada por modulo_compras_nac)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS compras_nacionales_exportador (
+            id_compra INTEGER PRIMARY KEY AUTOINCREMENT,
+            fecha_registro DATETIME DEFAULT CURRENT_TIMESTAMP,
+
+            -- Relaciones --
+            id_exportador INTEGER NOT NULL, -- FK a la tabla usuarios/entidades (rol exportador)
+            id_intermediario INTEGER, -- FK a la tabla intermediarios (puede ser NULL si es compra directa, aunque raro)
+            id_productor INTEGER, -- FK a la tabla productores (el productor final)
+
+            -- Datos de la Compra --
+            fecha_compra DATE NOT NULL,
+            tipo_cafe TEXT CHECK(tipo_cafe IN ('Pergamino Humedo', 'Pergamino Seco', 'Guacuco', 'Natural', 'Lavado', 'Resaca')) NOT NULL,
+            numero_sacos INTEGER NOT NULL,
+            peso_kg REAL GENERATED ALWAYS AS (numero_sacos * 69) STORED, -- Peso calculado
+            precio_por_saco REAL,
+            precio_total REAL GENERATED ALWAYS AS (numero_sacos * precio_por_saco) STORED, -- Total calculado
+            retencion_lps REAL GENERATED ALWAYS AS (numero_sacos * 10.50) STORED, -- Retención calculada L 10.50/saco
+
+            -- Documentación --
+            numero_comprobante TEXT, -- Número del comprobante del intermediario
+            numero_constancia_compra TEXT UNIQUE, -- Número generado por el sistema (único)
+            numero_constancia_venta TEXT, -- Número de la constancia de venta del intermediario
+
+            -- Ubicación de archivos (rutas relativas) --
+            ruta_archivo_comprobante TEXT, -- Ruta al PDF/JPG del comprobante subido
+            ruta_archivo_constancia_venta TEXT, -- Ruta al PDF/JPG de la constancia de venta subida
+
+            -- Estado del registro --
+            estado TEXT DEFAULT 'Pendiente' CHECK(estado IN ('Pendiente', 'Validada', 'Enviada_a_IHCAFE')),
+
+            -- Metadatos --
+            observaciones TEXT,
+
+            FOREIGN KEY (id_exportador) REFERENCES usuarios(id_usuario) ON DELETE CASCADE, -- O entidades, según tu modelo
+            FOREIGN KEY (id_intermediario) REFERENCES intermediarios(id_intermediario),
+            FOREIGN KEY (id_productor) REFERENCES productores(id_productor)
+        )
+    ''')
+
+    # Tabla: SECUENCIAS (numeración atómica, ver base_datos/secuencias.py)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS secuencias (
+            ambito TEXT PRIMARY KEY, -- Ej: 'reg_compa' o 'reg_compa:048:2024-2025'
+            valor INTEGER NOT NULL   -- Último número asignado
+        ) WITHOUT ROWID
+    ''')
+
+    # Insertar roles base (ejemplo)
+    roles_base = [
+        ('admin_ihcafe', 1, '{"permisos": ["total"]}'),
+        ('editor_exportador', 2, '{"permisos": ["editar", "ver"]}'),
+        ('basico_gestor', 3, '{"permisos": ["ver"]}')
+    ]
+    conn.executemany('''
+        INSERT OR IGNORE INTO roles (nombre_rol, nivel, permisos)
+        VALUES (?, ?, ?)
+    ''', roles_base)
+
+    # Insertar entidad base (IHCAFE como ejemplo)
+    conn.execute('''
+        INSERT OR IGNORE INTO entidades (id_entidad, tipo, nombre)
+        VALUES (1, 'IHCAFE', 'Instituto Hondureño del Café')
+    ''')
+
+
+# --- Índices administrados ---
+# (nombre, tabla, columnas). Cada uno respalda una consulta caliente de los routers;
+# test_planes_consulta.py verifica con EXPLAIN QUERY PLAN que ninguna recorra la tabla completa.
+INDICES = (
+    # /registro_compras_nac/por_fecha: WHERE fecha = ? AND exp_qic = ?  (y ORDER BY fecha del listado)
+    ("idx_registro_compras_fecha_exp", "registro_compras_nacionales", "fecha, exp_qic"),
+    # /compras_nacionales/: WHERE id_exportador = ? [AND fecha_compra = ?] ORDER BY fecha_compra
+    ("idx_compras_exportador_fecha", "compras_nacionales_exportador", "id_exportador, fecha_compra"),
+    # /admin/solicitudes/pendientes: WHERE estado = ? ORDER BY fecha_solicitud
+    ("idx_solicitudes_estado_fecha", "solicitudes_registro", "estado, fecha_solicitud"),
+)
+
+
+@migracion(2, "Índices de las consultas frecuentes")
+def _m002_indices(conn: sqlite3.Connection):
+    for nombre, tabla, columnas in INDICES:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {nombre} ON {tabla} ({columnas})")
+
+
+# La base en producción tiene columnas extra (mes_embarque, posicion_ice) y en otro
+# orden que el código; esta es la forma canónica que ambas comparten desde la migración 3.
+DDL_CIERRE_NY_ICE_BCH = '''
+        CREATE TABLE {tabla} (
+            id_registro INTEGER PRIMARY KEY AUTOINCREMENT,
+            fecha DATE NOT NULL UNIQUE, -- Fecha del cierre/reportado
+
+            -- Campos principales
+            precio_usd_saco REAL, -- Precio principal por saco en USD (NY ICE)
+            tasa_cambio_bch REAL, -- Tasa de cambio Lempiras por Dólar (BCH)
+            mes_embarque TEXT,    -- Mes de embarque asociado (ej: "Marzo", "Mayo")
+            posicion_ice TEXT,    -- Posición del contrato en ICE (ej: "KCZ24")
+
+            -- Posiciones ICE - Precios de Cierre (Close#)
+            precio_posicion_dic24 REAL, -- Diciembre 2024
+            precio_posicion_mar25 REAL, -- Marzo 2025
+            precio_posicion_may25 REAL, -- Mayo 2025
+            precio_posicion_jul25 REAL, -- Julio 2025
+            precio_posicion_sep25 REAL, -- Septiembre 2025
+            precio_posicion_dic25 REAL, -- Diciembre 2025
+            precio_posicion_mar26 REAL, -- Marzo 2026
+            precio_posicion_may26 REAL, -- Mayo 2026
+            precio_posicion_jul26 REAL, -- Julio 2026
+            precio_posicion_sep26 REAL, -- Septiembre 2026
+
+            -- Metadatos
+            fuente_precio TEXT DEFAULT "ICE Futures", -- Fuente del precio
+            fuente_tasa TEXT DEFAULT "Banco Central de Honduras", -- Fuente de la tasa
+            fecha_registro DATETIME DEFAULT CURRENT_TIMESTAMP -- Fecha de registro/actualización en el sistema
+        )
+'''
+
+
+@migracion(3, "cierre_ny_ice_bch en su forma canónica", en_linea=True)
+def _m003_cierre_canonico(conn: sqlite3.Connection):
+    canonicas = ["id_registro", "fecha", "precio_usd_saco", "tasa_cambio_bch", "mes_embarque", "posicion_ice"]
+    canonicas += [f"precio_posicion_{p}" for p in (
+        "dic24", "mar25", "may25", "jul25", "sep25", "dic25", "mar26", "may26", "jul26", "sep26")]
+    canonicas += ["fuente_precio", "fuente_tasa", "fecha_registro"]
+    if columnas_tabla(conn, "cierre_ny_ice_bch") == canonicas:
+        return
+    reconstruir_tabla_en_linea(conn, "cierre_ny_ice_bch", DDL_CIERRE_NY_ICE_BCH)
+
+
+# Columnas anchas de posiciones -> contrato 'YYYY-MM' (ver modulo_cierre/posiciones.py)
+_COLUMNAS_POSICION = {
+    "precio_posicion_dic24": "2024-12", "precio_posicion_mar25": "2025-03",
+    "precio_posicion_may25": "2025-05", "precio_posicion_jul25": "2025-07",
+    "precio_posicion_sep25": "2025-09", "precio_posicion_dic25": "2025-12",
+    "precio_posicion_mar26": "2026-03", "precio_posicion_may26": "2026-05",
+    "precio_posicion_jul26": "2026-07", "precio_posicion_sep26": "2026-09",
+}
+
+
+@migracion(4, "Posiciones ICE en formato largo (cierre_posiciones)", en_linea=True)
+def _m004_cierre_posiciones(conn: sqlite3.Connection):
+    # --- Tabla larga: una fila por (contrato, fecha), agrupada por contrato ---
+    conn.execute("BEGIN IMMEDIATE")
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS cierre_posiciones (
+            fecha DATE NOT NULL,      -- Fecha del cierre (cierre_ny_ice_bch.fecha)
+            contrato TEXT NOT NULL,   -- Mes de vencimiento 'YYYY-MM' (ej: '2025-03' = KCH25)
+            precio REAL NOT NULL,     -- Precio de cierre (Close#)
+            PRIMARY KEY (contrato, fecha)
+        ) WITHOUT ROWID
+    ''')
+    # Todas las posiciones de una fecha (GET /cierre_ny_bch/por_fecha, /ultimo)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_cierre_posiciones_fecha ON cierre_posiciones (fecha)")
+    existentes = set(columnas_tabla(conn, "cierre_ny_ice_bch"))
+    for columna, contrato in _COLUMNAS_POSICION.items():
+        if columna in existentes:
+            conn.execute(f"""
+                INSERT OR REPLACE INTO cierre_posiciones (fecha, contrato, precio)
+                SELECT fecha, ?, {columna} FROM cierre_ny_ice_bch WHERE {columna} IS NOT NULL
+            """, (contrato,))
+    conn.execute("COMMIT")
+
+    # --- cierre_ny_ice_bch sin las columnas anchas ---
+    if existentes & set(_COLUMNAS_POSICION):
+        reconstruir_tabla_en_linea(conn, "cierre_ny_ice_bch", '''
+            CREATE TABLE {tabla} (
+                id_registro INTEGER PRIMARY KEY AUTOINCREMENT,
+                fecha DATE NOT NULL UNIQUE, -- Fecha del cierre/reportado
+                precio_usd_saco REAL, -- Precio principal por saco en USD (NY ICE)
+                tasa_cambio_bch REAL, -- Tasa de cambio Lempiras por Dólar (BCH)
+                mes_embarque TEXT,    -- Mes de embarque asociado (ej: "Marzo", "Mayo")
+                posicion_ice TEXT,    -- Posición del contrato en ICE (ej: "KCZ24")
+                fuente_precio TEXT DEFAULT "ICE Futures", -- Fuente del precio
+                fuente_tasa TEXT DEFAULT "Banco Central de Honduras", -- Fuente de la tasa
+                fecha_registro DATETIME DEFAULT CURRENT_TIMESTAMP -- Fecha de registro/actualización en el sistema
+            )
+        ''')
+
+    # --- Vista de compatibilidad con la forma ancha anterior ---
+    posiciones = ",\n".join(
+        f"(SELECT p.precio FROM cierre_posiciones p WHERE p.contrato = '{contrato}' AND p.fecha = c.fecha) AS {columna}"
+        for columna, contrato in _COLUMNAS_POSICION.items()
+    )
+    conn.execute("BEGIN IMMEDIATE")
+    conn.execute("DROP VIEW IF EXISTS cierre_ny_ice_bch_ancho")
+    conn.execute(f"""
+        CREATE VIEW cierre_ny_ice_bch_ancho AS
+        SELECT c.*,
+        {posiciones}
+        FROM cierre_ny_ice_bch c
+    """)
+    conn.execute("COMMIT")
+
+
+@migracion(5, "Revocación de tokens JWT (tokens_revocados)")
+def _m005_tokens_revocados(conn: sqlite3.Connection):
+    # Tokens de un usuario emitidos antes de 'revocado_desde' dejan de valer
+    # (desactivación o cierre de sesión en todos los equipos). Ver auth/revocacion.py
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS tokens_revocados (
+            id_usuario INTEGER PRIMARY KEY,
+            revocado_desde REAL NOT NULL, -- Segundos desde epoch (UTC)
+            FOREIGN KEY (id_usuario) REFERENCES usuarios(id_usuario)
+        )
+    ''')
+
+
+@migracion(6, "Estado compartido del limitador de login (limitador_login)")
+def _m006_limitador_login(conn: sqlite3.Connection):
+    # Solo se usa con LIMITADOR_BACKEND = "sqlite" (ver auth/limitador.py)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS limitador_login (
+            clave TEXT PRIMARY KEY,        -- 'email:<email>' o 'ip:<dirección>'
+            fichas REAL NOT NULL,
+            actualizado REAL NOT NULL,     -- Segundos desde epoch
+            fallos INTEGER NOT NULL,
+            bloqueado_hasta REAL NOT NULL,
+            expira REAL NOT NULL           -- Desde este momento la fila puede borrarse
+        ) WITHOUT ROWID
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_limitador_login_expira ON limitador_login (expira)")
+
+
+@migracion(7, "Última actividad de usuarios (usuarios.ultima_actividad)")
+def _m007_ultima_actividad(conn: sqlite3.Connection):
+    # La escribe el búfer de usuarios/actividad.py, por lotes, junto con ultimo_login
+    if "ultima_actividad" not in columnas_tabla(conn, "usuarios"):
+        conn.execute("ALTER TABLE usuarios ADD COLUMN ultima_actividad DATETIME")
+
+
+@migracion(8, "Índices de la paginación de solicitudes_registro")
+def _m008_indices_solicitudes(conn: sqlite3.Connection):
+    # /admin/solicitudes: filtro por tipo de entidad, y listado sin filtro de estado.
+    # El id_solicitud (rowid) va implícito al final de cada índice: la clave del cursor
+    # (fecha_solicitud, id_solicitud) sigue el orden del índice sin ordenar en memoria.
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_solicitudes_estado_tipo_fecha
+        ON solicitudes_registro (estado, tipo_entidad_solicitada, fecha_solicitud)
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_solicitudes_fecha ON solicitudes_registro (fecha_solicitud)")
+
+
+def _normalizar_nombre_m009(nombre: str) -> str:
+    """
+    Copia congelada de usuarios.entidades.normalizar_nombre tal como era al escribir la
+    migración 9: la migración debe dar el mismo resultado aunque la de la app cambie.
+    """
+    sin_tildes = "".join(
+        c for c in unicodedata.normalize("NFKD", nombre) if not unicodedata.combining(c)
+    )
+    return re.sub(r"\s+", " ", sin_tildes.casefold()).strip()
+
+
+@migracion(9, "Nombre normalizado único en entidades")
+def _m009_entidades_nombre_normalizado(conn: sqlite3.Connection):
+    # Ver usuarios/entidades.py. Las aprobaciones anteriores creaban una entidad nueva
+    # cuando el nombre difería solo en mayúsculas o tildes: la primera (id menor) queda
+    # como canónica, sus usuarios se reasignan a ella y las demás quedan sin nombre
+    # normalizado (no se borran, pero ya no se resuelven por nombre).
+    if "nombre_normalizado" not in columnas_tabla(conn, "entidades"):
+        conn.execute("ALTER TABLE entidades ADD COLUMN nombre_normalizado TEXT")
+    canonicas = {}
+    for id_entidad, nombre in conn.execute("SELECT id_entidad, nombre FROM entidades ORDER BY id_entidad").fetchall():
+        clave = _normalizar_nombre_m009(nombre or "") or None
+        if clave is not None and clave in canonicas:
+            conn.execute("UPDATE usuarios SET id_entidad = ? WHERE id_entidad = ?", (canonicas[clave], id_entidad))
+            clave = None
+        elif clave is not None:
+            canonicas[clave] = id_entidad
+        conn.execute("UPDATE entidades SET nombre_normalizado = ? WHERE id_entidad = ?", (clave, id_entidad))
+    conn.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_entidades_nombre_normalizado
+        ON entidades (nombre_normalizado)
+    """)
+    # Las entidades ya no se buscan por 'nombre': el índice de la migración 2 sobra
+    conn.execute("DROP INDEX IF EXISTS idx_entidades_nombre")
+
+
+@migracion(10, "Búsqueda de texto completo (FTS5) en solicitudes y entidades")
+def _m010_busqueda_texto(conn: sqlite3.Connection):
+    # Índices FTS5 de contenido externo: guardan solo los términos; el texto sigue en la
+    # tabla original. Los triggers los mantienen al día en la misma transacción de cada
+    # escritura. remove_diacritics: "cafe" encuentra "Café". Ver admin/busqueda.py
+    tablas = (
+        ("solicitudes_fts", "solicitudes_registro", "id_solicitud",
+         ("nombre_completo", "email", "nombre_organizacion", "clave_exportador", "mensaje_solicitud")),
+        ("entidades_fts", "entidades", "id_entidad", ("nombre",)),
+    )
+    for fts, tabla, clave, columnas in tablas:
+        lista = ", ".join(columnas)
+        nuevos = ", ".join(f"new.{c}" for c in columnas)
+        viejos = ", ".join(f"old.{c}" for c in columnas)
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                {lista}, content='{tabla}', content_rowid='{clave}',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {tabla} BEGIN
+                INSERT INTO {fts} (rowid, {lista}) VALUES (new.{clave}, {nuevos});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {tabla} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {lista}) VALUES ('delete', old.{clave}, {viejos});
+            END
+        """)
+        # Solo cuando cambia una columna indexada (no en cada cambio de estado)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {lista} ON {tabla} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {lista}) VALUES ('delete', old.{clave}, {viejos});
+                INSERT INTO {fts} (rowid, {lista}) VALUES (new.{clave}, {nuevos});
+            END
+        """)
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
@@ -0,0 +1,75 @@
+# ==base_datos/secuencias.py #026
+import sqlite3
+from typing import Callable, Optional
+
+# --- Ámbitos de numeración ---
+# Cada ámbito es una fila de la tabla 'secuencias' (ambito TEXT PRIMARY KEY, valor INTEGER).
+# Pedir un número es un UPDATE por clave primaria: O(1), sin recorrer la tabla de registros.
+
+AMBITO_REG_COMPA_GLOBAL = "reg_compa"
+
+
+def ambito_reg_compa(exp_qic: Optional[str] = None, cosecha: Optional[str] = None) -> str:
+    """Devuelve el ámbito global o el ámbito por exportador y cosecha."""
+    if exp_qic is None:
+        return AMBITO_REG_COMPA_GLOBAL
+    return f"{AMBITO_REG_COMPA_GLOBAL}:{exp_qic}:{cosecha or ''}"
+
+
+def semilla_reg_compa(exp_qic: Optional[str] = None, cosecha: Optional[str] = None) -> Callable[[sqlite3.Connection], int]:
+    """
+    Valor inicial de un ámbito que aún no existe: el mayor 'registro' ya guardado.
+    Solo se ejecuta la primera vez que se usa el ámbito.
+    """
+    def _semilla(conn: sqlite3.Connection) -> int:
+        if exp_qic is None:
+            fila = conn.execute(
+                "SELECT MAX(CAST(registro AS INTEGER)) FROM registro_compras_nacionales"
+            ).fetchone()
+        else:
+            # Mismo criterio que ambito_reg_compa(): sin cosecha (NULL o '') es un solo ámbito.
+            # 'IS' porque 'cosecha = NULL' nunca coincide.
+            fila = conn.execute(
+                "SELECT MAX(CAST(registro AS INTEGER)) FROM registro_compras_nacionales WHERE exp_qic = ? AND NULLIF(cosecha, '') IS ?",
+                (exp_qic, cosecha or None),
+            ).fetchone()
+        return fila[0] or 0
+    return _semilla
+
+
+# --- API del asignador ---
+
+def reservar_rango(conn: sqlite3.Connection, ambito: str, cantidad: int = 1,
+                   semilla: Optional[Callable[[sqlite3.Connection], int]] = None) -> range:
+    """
+    Reserva 'cantidad' números consecutivos del ámbito y devuelve el rango reservado.
+    Debe llamarse dentro de una transacción de escritura (p. ej. en el hilo escritor):
+    el UPDATE toma el lock de escritura, así que dos llamadores nunca reciben el mismo número.
+    """
+    if cantidad < 1:
+        raise ValueError("La cantidad a reservar debe ser al menos 1.")
+    cursor = conn.execute(
+        "UPDATE secuencias SET valor = valor + ? WHERE ambito = ?", (cantidad, ambito)
+    )
+    if cursor.rowcount == 0:
+        inicial = semilla(conn) if semilla else 0
+        conn.execute(
+            "INSERT INTO secuencias (ambito, valor) VALUES (?, ?)", (ambito, inicial + cantidad)
+        )
+    fin = conn.execute("SELECT valor FROM secuencias WHERE ambito = ?", (ambito,)).fetchone()[0]
+    return range(fin - cantidad + 1, fin + 1)
+
+
+def siguiente_numero(conn: sqlite3.Connection, ambito: str,
+                     semilla: Optional[Callable[[sqlite3.Connection], int]] = None) -> int:
+    """Asigna el siguiente número del ámbito."""
+    return reservar_rango(conn, ambito, 1, semilla)[0]
+
+
+def valor_actual(conn: sqlite3.Connection, ambito: str,
+                 semilla: Optional[Callable[[sqlite3.Connection], int]] = None) -> int:
+    """Último número asignado del ámbito, sin consumir ninguno (solo lectura)."""
+    fila = conn.execute("SELECT valor FROM secuencias WHERE ambito = ?", (ambito,)).fetchone()
+    if fila is not None:
+        return fila[0]
+    return semilla(conn) if semilla else 0
@@ -0,0 +1,69 @@
+# ==bench_conexiones.py #024
+"""
+Benchmark: conexión nueva por petición vs. pool de conexiones (base_datos/conexion.py).
+Simula peticiones concurrentes en el threadpool de anyio, igual que FastAPI con
+endpoints síncronos. Trabaja sobre una copia de cafehnd.db para no modificarla.
+
+Uso: python bench_conexiones.py [peticiones] [concurrencia]
+"""
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from functools import partial
+
+import anyio
+import anyio.to_thread
+
+from base_datos.conexion import PoolConexiones
+
+CONSULTA = "SELECT * FROM cierre_ny_ice_bch ORDER BY fecha DESC LIMIT 1"
+
+
+def peticion_sin_pool(db_name: str):
+    conn = sqlite3.connect(db_name)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    cursor.execute(CONSULTA)
+    cursor.fetchone()
+    conn.close()
+
+
+def peticion_con_pool(pool: PoolConexiones):
+    with pool.conexion() as conn:
+        cursor = conn.cursor()
+        cursor.execute(CONSULTA)
+        cursor.fetchone()
+
+
+async def medir(trabajo, peticiones: int, concurrencia: int) -> float:
+    limitador = anyio.CapacityLimiter(concurrencia)
+    inicio = time.perf_counter()
+    async with anyio.create_task_group() as tg:
+        for _ in range(peticiones):
+            tg.start_soon(partial(anyio.to_thread.run_sync, trabajo, limiter=limitador))
+    return peticiones / (time.perf_counter() - inicio)
+
+
+async def main(peticiones: int, concurrencia: int):
+    with tempfile.TemporaryDirectory() as carpeta:
+        db_name = os.path.join(carpeta, "bench.db")
+        shutil.copy("cafehnd.db", db_name)
+
+        rps_antes = await medir(partial(peticion_sin_pool, db_name), peticiones, concurrencia)
+        pool = PoolConexiones(db_name)
+        rps_despues = await medir(partial(peticion_con_pool, pool), peticiones, concurrencia)
+        pool.cerrar_todas()
+
+    print(f"Peticiones: {peticiones} | Concurrencia: {concurrencia}")
+    print(f"  Sin pool (connect por petición): {rps_antes:10.0f} req/s")
+    print(f"  Con pool (WAL + PRAGMAs):        {rps_despues:10.0f} req/s")
+    print(f"  Mejora: x{rps_despues / rps_antes:.2f}")
+
+
+if __name__ == "__main__":
+    peticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    concurrencia = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    anyio.run(main, peticiones, concurrencia)
@@ -0,0 +1,99 @@
+# ==bench_historial.py #037
+"""
+Benchmark: consultas de cierre_ny_ice_bch por SQL (pool) vs. historial en memoria
+(modulo_cierre/historial.py). Trabaja sobre una copia de cafehnd.db, ampliada con
+cierres sintéticos para simular varios años de historia.
+
+Uso: python bench_historial.py [repeticiones] [dias_sinteticos]
+"""
+import itertools
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from base_datos.conexion import PoolConexiones
+from base_datos.migraciones import aplicar_migraciones
+from modulo_cierre.historial import HistorialCierres
+from modulo_cierre.posiciones import leer_posiciones
+
+
+def medir(nombre: str, funcion, repeticiones: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    microsegundos = (time.perf_counter() - inicio) / repeticiones * 1e6
+    print(f"  {nombre:<38} {microsegundos:10.2f} µs/consulta")
+    return microsegundos
+
+
+def main(repeticiones: int, dias: int):
+    with tempfile.TemporaryDirectory() as carpeta:
+        db_name = os.path.join(carpeta, "bench.db")
+        shutil.copy("cafehnd.db", db_name)
+        aplicar_migraciones(db_name)
+        pool = PoolConexiones(db_name)
+
+        inicio = date(2010, 1, 4)
+        with pool.conexion() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO cierre_ny_ice_bch (fecha, precio_usd_saco, tasa_cambio_bch) VALUES (?, ?, ?)",
+                [((inicio + timedelta(days=i)).isoformat(), 150 + random.random() * 50, 24 + random.random())
+                 for i in range(dias)],
+            )
+            conn.commit()
+            historial = HistorialCierres()
+            t = time.perf_counter()
+            historial.cargar(conn)
+            print(f"Historial: {len(historial)} cierres cargados en {(time.perf_counter() - t) * 1000:.1f} ms")
+
+        fechas = [inicio + timedelta(days=random.randrange(dias)) for _ in range(1024)]
+        siguiente = itertools.cycle(fechas).__next__
+
+        def sql_ultimo():
+            with pool.conexion() as conn:
+                row = conn.execute("SELECT * FROM cierre_ny_ice_bch ORDER BY fecha DESC LIMIT 1").fetchone()
+                leer_posiciones(conn, [row["fecha"]])
+
+        def sql_por_fecha():
+            with pool.conexion() as conn:
+                fecha = siguiente().isoformat()
+                conn.execute("SELECT * FROM cierre_ny_ice_bch WHERE fecha = ?", (fecha,)).fetchone()
+                leer_posiciones(conn, [fecha])
+
+        def sql_tasa():
+            with pool.conexion() as conn:
+                conn.execute("SELECT tasa_cambio_bch FROM cierre_ny_ice_bch WHERE fecha = ?",
+                             (siguiente().isoformat(),)).fetchone()
+
+        def sql_rango():
+            with pool.conexion() as conn:
+                desde = siguiente()
+                conn.execute("SELECT fecha, tasa_cambio_bch FROM cierre_ny_ice_bch WHERE fecha BETWEEN ? AND ?",
+                             (desde.isoformat(), (desde + timedelta(days=30)).isoformat())).fetchall()
+
+        def memoria_rango():
+            desde = siguiente()
+            historial.serie("tasa_cambio_bch", desde, desde + timedelta(days=30))
+
+        print(f"Repeticiones: {repeticiones}")
+        pares = (
+            ("último cierre", sql_ultimo, historial.ultimo),
+            ("cierre por fecha", sql_por_fecha, lambda: historial.por_fecha(siguiente())),
+            ("tasa por fecha", sql_tasa, lambda: historial.por_fecha(siguiente())["tasa_cambio_bch"]),
+            ("rango de 30 días (serie tasa)", sql_rango, memoria_rango),
+        )
+        for nombre, sql, memoria in pares:
+            antes = medir(f"SQL      - {nombre}", sql, repeticiones)
+            despues = medir(f"Memoria  - {nombre}", memoria, repeticiones)
+            print(f"  {'Mejora':<38} x{antes / despues:9.1f}")
+        pool.cerrar_todas()
+
+
+if __name__ == "__main__":
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    dias = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    main(repeticiones, dias)
@@ -7,5 +7,22 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 # --- Nueva línea añadida ---
-DB_NAME = "cafehnd.db"
+DB_NAME = os.environ.get("CAFEHND_DB") or "cafehnd.db"
 # --------------------------
+
+# Numeración de reportes reg_compa: "global" (un solo contador) o "exportador" (por exp_qic y cosecha)
+AMBITO_REG_COMPA = os.environ.get("AMBITO_REG_COMPA") or "global"
+
+# Pool de bcrypt (auth/hash_pool.py): hilos dedicados y máximo de peticiones en espera
+HASH_WORKERS = int(os.environ.get("HASH_WORKERS") or min(4, os.cpu_count() or 1))
+HASH_MAX_COLA = int(os.environ.get("HASH_MAX_COLA") or 32)
+
+# Estado del limitador de /login (auth/limitador.py): "memoria" (por proceso) o "sqlite" (compartido entre workers)
+LIMITADOR_BACKEND = os.environ.get("LIMITADOR_BACKEND") or "memoria"
+
+# Costo de bcrypt (auth/calibracion.py): vacío = defecto de passlib, un número, o "auto" (calibrar al iniciar)
+BCRYPT_ROUNDS = (os.environ.get("BCRYPT_ROUNDS") or "").strip().lower()
+BCRYPT_OBJETIVO_MS = float(os.environ.get("BCRYPT_OBJETIVO_MS") or 100)
+
+# Búfer de ultimo_login / ultima_actividad (usuarios/actividad.py): segundos entre escrituras por lote
+ACTIVIDAD_INTERVALO = float(os.environ.get("ACTIVIDAD_INTERVALO") or 5)
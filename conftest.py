@@ -0,0 +1,43 @@
+# ==conftest.py #027
+# Configuración común de pytest: todas las pruebas usan una base de datos temporal,
+# nunca cafehnd.db. La variable se define antes de importar cualquier módulo de la app.
+import os
+import tempfile
+
+_carpeta_pruebas = tempfile.mkdtemp(prefix="cafehnd_pruebas_")
+os.environ["CAFEHND_DB"] = os.path.join(_carpeta_pruebas, "cafehnd_pruebas.db")
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="session")
+def cliente():
+    """Cliente HTTP contra la aplicación completa (ejecuta el ciclo de vida de main.py)."""
+    import main
+    with TestClient(main.app) as c:
+        yield c
+
+
+_tokens_por_rol = {}
+
+
+@pytest.fixture
+def cabeceras_admin(cliente, request):
+    """
+    Cabeceras Authorization con el token de un usuario de prueba (uno por rol, creado
+    la primera vez). Rol 1 (admin_ihcafe) por defecto; otro rol con
+    @pytest.mark.parametrize("cabeceras_admin", [2], indirect=True).
+    """
+    from auth.seguridad import crear_token_acceso, claims_de_usuario
+    from base_datos.escritor import escritor
+    from usuarios.crud import obtener_usuario_por_id
+
+    id_rol = getattr(request, "param", 1)
+    if id_rol not in _tokens_por_rol:
+        id_usuario = escritor.ejecutar_sql("""
+            INSERT INTO usuarios (nombre_completo, email, contraseña_hash, id_rol, id_entidad)
+            VALUES (?, ?, 'x', ?, 1)
+        """, (f"Pruebas Rol {id_rol}", f"pruebas.rol{id_rol}@ihcafe.hn", id_rol))
+        _tokens_por_rol[id_rol] = crear_token_acceso(claims_de_usuario(obtener_usuario_por_id(id_usuario)))
+    return {"Authorization": f"Bearer {_tokens_por_rol[id_rol]}"}
@@ -1,4 +1,5 @@
 # ==main.py #001 (Versión actualizada)
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 # Importar los routers
@@ -6,19 +7,48 @@ from usuarios.rutas import router as usuarios_router
 from auth.login import router as login_router
 from auth.registro import router as registro_router
 from admin.solicitudes import router as admin_solicitudes_router
+from admin.usuarios import router as admin_usuarios_router
 # --- Nuevo import ---
 from modulo_cierre.api import router as cierre_router # Importamos el nuevo router
 from modulo_compras_nac.api import router as compras_nac_router # Importar el nuevo router
 from modulo_registro_compras.api import router as registro_compras_router # Importar el nuevo router
 
-app = FastAPI(title="CaféHND Digital - Sistema de Usuarios, Solicitudes y Cierres")
+from base_datos.conexion import pool, crear_base_datos, obtener_conexion
+from base_datos.escritor import escritor
+from modulo_cierre.historial import historial
+from auth.hash_pool import pool_hash
+from auth.calibracion import configurar_costo
+from usuarios.actividad import actividad_usuarios
+from usuarios.entidades import cache_entidades
+
+@asynccontextmanager
+async def ciclo_de_vida(app: FastAPI):
+    # Al iniciar: asegurar que existan las tablas (idempotente)
+    crear_base_datos()
+    # Costo de bcrypt: fijo o calibrado contra este hardware (BCRYPT_ROUNDS)
+    configurar_costo()
+    # Historial de cierres y nombres de entidades en memoria (modulo_cierre/historial.py, usuarios/entidades.py)
+    with obtener_conexion() as conn:
+        historial.cargar(conn)
+        cache_entidades.cargar(conn)
+    yield
+    # Al apagar: volcar la actividad pendiente, vaciar la cola del escritor,
+    # cerrar las conexiones del pool y los hilos de bcrypt
+    actividad_usuarios.detener()
+    escritor.detener()
+    pool.cerrar_todas()
+    pool_hash.cerrar()
+
+app = FastAPI(title="CaféHND Digital - Sistema de Usuarios, Solicitudes y Cierres", lifespan=ciclo_de_vida)
 
 # Incluir los routers de la API
 app.include_router(usuarios_router)
 app.include_router(login_router)
 app.include_router(registro_router)
 app.include_router(admin_solicitudes_router)
+app.include_router(admin_usuarios_router)
 app.include_router(registro_compras_router)
+app.include_router(compras_nac_router)
 # --- Nuevo router ---
 app.include_router(cierre_router)
 
@@ -1,11 +1,23 @@
 # ==modulo_cierre/api.py #021
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, Response, UploadFile, File
 import sqlite3
-from datetime import date, datetime # Para manejar fechas
+from datetime import date, datetime, timezone # Para manejar fechas
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator, model_validator
 
-from config.settings import DB_NAME
+from base_datos.conexion import get_conexion, obtener_conexion
+from base_datos.escritor import escritor
+from base_datos.consultas import insertar_retornando
+from modulo_cierre.posiciones import normalizar_contrato, leer_posiciones, guardar_posiciones, serie_posiciones
+from modulo_cierre.historial import historial
+from modulo_cierre.cache_http import responder_con_cache, politica_cache
+from modulo_cierre.tasas import resolver_tasa, resolver_tasas, TasaNoDisponible, POLITICAS
+from modulo_cierre.importacion import importar_cierres, lineas_de_binario
+from modulo_cierre.calendario import calendario_kc, precio_nearby, serie_continua
+from modulo_cierre.curva import cache_curvas, precios_embarque, mes_de_indice
+from modulo_cierre.series import (
+    AGREGACIONES, CAMPOS, MAX_VENTANA, agregar, media_simple, media_exponencial, puntos_campo, puntos_posicion,
+)
 # from usuarios.modelos import Usuario  # Descomentar si se protege el endpoint
 # from auth.seguridad import get_admin_ihcafe_actual # Descomentar si se protege el endpoint
 
@@ -21,21 +33,33 @@ class CierreBase(BaseModel):
     precio_usd_saco: Optional[float] = None
     tasa_cambio_bch: Optional[float] = None
     
-    # Posiciones ICE - Precios de Cierre (Close#)
-    precio_posicion_dic24: Optional[float] = None
-    precio_posicion_mar25: Optional[float] = None
-    precio_posicion_may25: Optional[float] = None
-    precio_posicion_jul25: Optional[float] = None
-    precio_posicion_sep25: Optional[float] = None
-    precio_posicion_dic25: Optional[float] = None
-    precio_posicion_mar26: Optional[float] = None
-    precio_posicion_may26: Optional[float] = None
-    precio_posicion_jul26: Optional[float] = None
-    precio_posicion_sep26: Optional[float] = None
+    # Posiciones ICE - Precios de Cierre (Close#) por contrato 'YYYY-MM'
+    # Ej: {"2025-03": 150.25, "2025-05": 151.00}
+    posiciones: Dict[str, float] = {}
     
     fuente_precio: Optional[str] = "ICE Futures"
     fuente_tasa: Optional[str] = "Banco Central de Honduras"
 
+    @model_validator(mode="before")
+    @classmethod
+    def _posiciones_legadas(cls, datos: Any) -> Any:
+        """Acepta también los campos viejos precio_posicion_dic24 ... como posiciones."""
+        if not isinstance(datos, dict):
+            return datos
+        datos = dict(datos)
+        posiciones = dict(datos.get("posiciones") or {})
+        for campo in [c for c in datos if c.startswith("precio_posicion_")]:
+            valor = datos.pop(campo)
+            if valor is not None:
+                posiciones.setdefault(campo[len("precio_posicion_"):], valor)
+        datos["posiciones"] = posiciones
+        return datos
+
+    @field_validator("posiciones")
+    @classmethod
+    def _normalizar_posiciones(cls, posiciones: Dict[str, float]) -> Dict[str, float]:
+        return {normalizar_contrato(clave): precio for clave, precio in sorted(posiciones.items())}
+
 class CierreCreate(CierreBase):
     """Modelo para crear un nuevo registro de cierre."""
     pass
@@ -48,64 +72,145 @@ class Cierre(CierreBase):
     class Config:
         from_attributes = True # Para compatibilidad con datos de la BD
 
+class PrecioPosicion(BaseModel):
+    """Precio de cierre de un contrato en una fecha."""
+    fecha: date
+    contrato: str
+    precio: float
+
+class TasaCambio(BaseModel):
+    """Tasa BCH resuelta para una fecha según una política (modulo_cierre/tasas.py)."""
+    fecha: date
+    fecha_tasa: Optional[date] = None   # Fecha de publicación de la tasa usada
+    tasa_cambio_bch: Optional[float] = None  # None si no hay tasa para esa fecha
+    politica: str
+
+class SerieCierres(BaseModel):
+    """Serie agregada en arreglos paralelos: el índice i de cada lista es el período fechas[i]."""
+    serie: str                 # Campo del cierre o contrato 'YYYY-MM'
+    agregacion: str
+    fechas: List[str]
+    apertura: List[float]
+    maximo: List[float]
+    minimo: List[float]
+    cierre: List[float]
+    dias: List[int]
+    sma: Optional[List[Optional[float]]] = None   # Media simple de 'cierre' (null hasta completar la ventana)
+    ema: Optional[List[Optional[float]]] = None   # Media exponencial de 'cierre'
+
+class CurvaForwardRespuesta(BaseModel):
+    """Curva forward de una fecha: las posiciones guardadas y el precio interpolado de cada mes."""
+    fecha: date
+    contratos: List[str]            # Posiciones 'YYYY-MM' del cierre, ascendentes
+    precios: List[float]
+    meses: List[str]                # Cada mes desde la primera hasta la última posición
+    precios_mensuales: List[float]
+
+class SolicitudPreciosEmbarque(BaseModel):
+    fechas: List[date] = Field(..., min_length=1, max_length=500)
+    meses: List[str] = Field(..., min_length=1, max_length=1000)  # Meses de embarque 'YYYY-MM' (o 'abr25')
+
+    @field_validator("meses")
+    @classmethod
+    def _normalizar_meses(cls, meses: List[str]) -> List[str]:
+        return [normalizar_contrato(mes) for mes in meses]
+
+class PreciosEmbarque(BaseModel):
+    """precios[i][j] = precio de la fecha fechas[i] para el mes meses[j] (null si no hay)."""
+    fechas: List[date]
+    meses: List[str]
+    precios: List[List[Optional[float]]]
+
+class ContratoCalendario(BaseModel):
+    """Fechas de un contrato KC (modulo_cierre/calendario.py)."""
+    contrato: str                  # 'YYYY-MM'
+    codigo: str                    # Código ICE, ej: 'KCH25'
+    primer_aviso: date
+    ultimo_dia_negociacion: date
+    fecha_roll: date               # Desde esta fecha la posición activa es el contrato siguiente
+
+class PosicionActiva(BaseModel):
+    fecha: date
+    activo: ContratoCalendario
+    siguiente: Optional[ContratoCalendario] = None
+
+class SerieContinuaRespuesta(BaseModel):
+    """Posición activa día a día, ajustada hacia atrás en cada rotación (arreglos paralelos)."""
+    fechas: List[str]
+    contratos: List[str]
+    precios: List[float]           # Ajustados: sin saltos por rotación
+    precios_originales: List[float]
+
+class ErrorImportacion(BaseModel):
+    linea: int
+    motivo: str
+
+class ResumenImportacion(BaseModel):
+    """Resultado de POST /cierre_ny_bch/importar."""
+    insertados: int
+    actualizados: int
+    rechazados: int
+    errores: List[ErrorImportacion]  # Primeros rechazos (modulo_cierre/importacion.py: MAX_ERRORES)
+    segundos: float
+
+def _con_posiciones(conn: sqlite3.Connection, rows: List[sqlite3.Row]) -> List[Cierre]:
+    """Arma los modelos Cierre agregando las posiciones de cada fecha (una sola consulta)."""
+    posiciones = leer_posiciones(conn, [row["fecha"] for row in rows])
+    return [Cierre(**dict(row), posiciones=posiciones[row["fecha"]]) for row in rows]
+
 # --- Endpoints ---
 
+def _ultimo_registro() -> Optional[Dict[str, Any]]:
+    """Último cierre como dict: del historial en memoria o, si no está cargado, de la base."""
+    if historial.cargado:
+        return historial.ultimo()
+    with obtener_conexion() as conn:
+        row = conn.execute("""
+            SELECT * FROM cierre_ny_ice_bch
+            ORDER BY fecha DESC
+            LIMIT 1
+        """).fetchone()
+        return _con_posiciones(conn, [row])[0].model_dump() if row else None
+
+
+def _registro_por_fecha(fecha: date) -> Optional[Dict[str, Any]]:
+    """Cierre de una fecha como dict: del historial en memoria o, si no está cargado, de la base."""
+    if historial.cargado:
+        return historial.por_fecha(fecha)
+    with obtener_conexion() as conn:
+        row = conn.execute("""
+            SELECT * FROM cierre_ny_ice_bch
+            WHERE fecha = ?
+        """, (fecha.isoformat(),)).fetchone()
+        return _con_posiciones(conn, [row])[0].model_dump() if row else None
+
+
 @router.get("/ultimo", response_model=Optional[Cierre])
-def obtener_ultimo_cierre():
+def obtener_ultimo_cierre(request: Request, response: Response):
     """
     Obtiene el último registro de cierre ingresado.
     Útil para que los exportadores vean la información más reciente.
+    Se responde desde el historial en memoria (modulo_cierre/historial.py), con
+    ETag / Last-Modified para que los sondeos repetidos reciban un 304.
     """
     try:
-        conn = sqlite3.connect(DB_NAME)
-        conn.row_factory = sqlite3.Row # Permite acceder a columnas por nombre
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT * FROM cierre_ny_ice_bch
-            ORDER BY fecha DESC
-            LIMIT 1
-        """)
-        
-        row = cursor.fetchone()
-        conn.close()
-        
-        if row:
-            return Cierre(**dict(row))
-        else:
-            return None # O podrías devolver un 404 si prefieres
-            
+        return responder_con_cache(request, response, "ultimo", _ultimo_registro, politica_cache())
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener el último cierre: {str(e)}")
 
 
 @router.get("/por_fecha/{fecha}", response_model=Optional[Cierre])
-def obtener_cierre_por_fecha(fecha: date):
+def obtener_cierre_por_fecha(fecha: date, request: Request, response: Response):
     """
     Obtiene el registro de cierre para una fecha específica.
     Formato de fecha: YYYY-MM-DD
+    Las fechas pasadas se marcan como inmutables (Cache-Control), las recientes se revalidan con ETag.
     """
     try:
-        conn = sqlite3.connect(DB_NAME)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        # Asegurarse de que la fecha esté en formato string 'YYYY-MM-DD'
-        fecha_str = fecha.isoformat() 
-        
-        cursor.execute("""
-            SELECT * FROM cierre_ny_ice_bch
-            WHERE fecha = ?
-        """, (fecha_str,))
-        
-        row = cursor.fetchone()
-        conn.close()
-        
-        if row:
-            return Cierre(**dict(row))
-        else:
-            return None # O 404
-            
+        return responder_con_cache(
+            request, response, f"por_fecha:{fecha.isoformat()}",
+            lambda: _registro_por_fecha(fecha), politica_cache(fecha),
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener cierre para {fecha}: {str(e)}")
 
@@ -115,67 +220,41 @@ def obtener_cierre_por_fecha(fecha: date):
 def crear_o_actualizar_cierre(cierre: CierreCreate): # <- Para pruebas sin autenticación
     """
     Crea un nuevo registro de cierre o lo actualiza si la fecha ya existe.
+    La escritura se delega al hilo escritor único (base_datos/escritor.py).
     """
     try:
-        conn = sqlite3.connect(DB_NAME)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
         # Preparar los campos y valores para la consulta SQL
-        campos = [
-            "fecha", "precio_usd_saco", "tasa_cambio_bch",
-            "precio_posicion_dic24", "precio_posicion_mar25", "precio_posicion_may25",
-            "precio_posicion_jul25", "precio_posicion_sep25", "precio_posicion_dic25",
-            "precio_posicion_mar26", "precio_posicion_may26", "precio_posicion_jul26",
-            "precio_posicion_sep26", "fuente_precio", "fuente_tasa"
-        ]
-        
-        valores = (
-            cierre.fecha.isoformat(),
-            cierre.precio_usd_saco,
-            cierre.tasa_cambio_bch,
-            cierre.precio_posicion_dic24,
-            cierre.precio_posicion_mar25,
-            cierre.precio_posicion_may25,
-            cierre.precio_posicion_jul25,
-            cierre.precio_posicion_sep25,
-            cierre.precio_posicion_dic25,
-            cierre.precio_posicion_mar26,
-            cierre.precio_posicion_may26,
-            cierre.precio_posicion_jul26,
-            cierre.precio_posicion_sep26,
-            cierre.fuente_precio,
-            cierre.fuente_tasa
-        )
-        
-        placeholders = ", ".join(["?" for _ in campos])
-        campos_str = ", ".join(campos)
+        datos = {
+            "fecha": cierre.fecha.isoformat(),
+            # Sin precio principal: el de la posición activa ese día (modulo_cierre/calendario.py)
+            "precio_usd_saco": cierre.precio_usd_saco if cierre.precio_usd_saco is not None
+                               else precio_nearby(cierre.fecha, cierre.posiciones),
+            "tasa_cambio_bch": cierre.tasa_cambio_bch,
+            "fuente_precio": cierre.fuente_precio,
+            "fuente_tasa": cierre.fuente_tasa,
+        }
         
-        # Usar INSERT ... ON CONFLICT para crear o actualizar
+        # INSERT ... ON CONFLICT(fecha) DO UPDATE ... RETURNING *: crea o actualiza y
+        # devuelve el registro resultante en una sola sentencia.
         # NOTA: Esto requiere que 'fecha' tenga una restricción UNIQUE o sea PRIMARY KEY
-        sql = f"""
-            INSERT INTO cierre_ny_ice_bch 
-            ({campos_str})
-            VALUES ({placeholders})
-            ON CONFLICT(fecha) DO UPDATE SET
-        """
-        # Construir la parte SET del UPDATE, excluyendo 'fecha'
-        set_parts = [f"{campo} = excluded.{campo}" for campo in campos if campo != "fecha"]
-        sql += ", ".join(set_parts)
-        # Actualizar siempre la fecha de registro
-        sql += ", fecha_registro = CURRENT_TIMESTAMP" 
-        
-        cursor.execute(sql, valores)
-        conn.commit()
+        def _guardar(conn: sqlite3.Connection):
+            # Actualizar siempre la fecha de registro (UTC, con milisegundos: es parte del ETag,
+            # dos correcciones en el mismo segundo deben dar ETags distintos)
+            datos["fecha_registro"] = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+            registro = insertar_retornando(conn, "cierre_ny_ice_bch", datos, clave_conflicto="fecha")
+            # Las posiciones van en cierre_posiciones, en la misma transacción
+            guardar_posiciones(conn, datos["fecha"], cierre.posiciones)
+            # El historial en memoria (y la serie continua) se actualiza solo si el COMMIT se confirma
+            def _actualizar_memoria():
+                historial.actualizar(registro, cierre.posiciones)
+                serie_continua.actualizar(cierre.fecha, cierre.posiciones)
+            escritor.despues_del_commit(_actualizar_memoria)
+            return registro
         
-        # Recuperar el registro creado o actualizado
-        cursor.execute("SELECT * FROM cierre_ny_ice_bch WHERE fecha = ?", (cierre.fecha.isoformat(),))
-        nuevo_registro = cursor.fetchone()
-        
-        conn.close()
+        nuevo_registro = escritor.ejecutar(_guardar)
         
         if nuevo_registro:
-            return Cierre(**dict(nuevo_registro))
+            return Cierre(**nuevo_registro, posiciones=cierre.posiciones)
         else:
             raise HTTPException(status_code=500, detail="Error al recuperar el registro creado/actualizado.")
             
@@ -183,15 +262,38 @@ def crear_o_actualizar_cierre(cierre: CierreCreate): # <- Para pruebas sin auten
         raise HTTPException(status_code=500, detail=f"Error al crear/actualizar cierre: {str(e)}")
 
 
+@router.post("/importar", response_model=ResumenImportacion)
+# def importar_cierres_csv(archivo: UploadFile = File(...), admin: Usuario = Depends(get_admin_ihcafe_actual)): # <- Para proteger
+def importar_cierres_csv(archivo: UploadFile = File(...)): # <- Para pruebas sin autenticación
+    """
+    Carga masiva de cierres desde un CSV (ver el formato en modulo_cierre/importacion.py).
+    El archivo se procesa fila por fila y se guarda en lotes grandes, en pocas transacciones.
+    Las filas inválidas no detienen la carga: se cuentan en 'rechazados' con su línea y motivo.
+    """
+    try:
+        resultado = importar_cierres(lineas_de_binario(archivo.file))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="El archivo no está codificado en UTF-8.")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al importar cierres: {str(e)}")
+    return ResumenImportacion(
+        insertados=resultado.insertados,
+        actualizados=resultado.actualizados,
+        rechazados=resultado.rechazados,
+        errores=[ErrorImportacion(linea=linea, motivo=motivo) for linea, motivo in resultado.errores],
+        segundos=round(resultado.segundos, 3),
+    )
+
+
 # (Opcional) Endpoint para listar un rango de cierres, útil para reportes
 @router.get("/", response_model=List[Cierre])
-def listar_cierres(skip: int = 0, limit: int = 100):
+def listar_cierres(skip: int = 0, limit: int = 100, conn: sqlite3.Connection = Depends(get_conexion)):
     """
     Lista los registros de cierre, con paginación básica.
     """
     try:
-        conn = sqlite3.connect(DB_NAME)
-        conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -201,10 +303,192 @@ def listar_cierres(skip: int = 0, limit: int = 100):
         """, (limit, skip))
         
         rows = cursor.fetchall()
-        conn.close()
         
-        return [Cierre(**dict(row)) for row in rows]
+        return _con_posiciones(conn, rows)
             
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al listar cierres: {str(e)}")
 
+
+@router.get("/posiciones", response_model=List[PrecioPosicion])
+def listar_precios_posiciones(
+    contrato_desde: str,
+    contrato_hasta: Optional[str] = None,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    conn: sqlite3.Connection = Depends(get_conexion),
+):
+    """
+    Precios de cierre de uno o varios contratos, ordenados por contrato y fecha.
+    Contratos en formato 'YYYY-MM' (o 'dic24'); sin contrato_hasta se consulta solo contrato_desde.
+    Ej: /cierre_ny_bch/posiciones?contrato_desde=2025-03&contrato_hasta=2025-12&desde=2025-01-01
+    """
+    try:
+        contrato_desde = normalizar_contrato(contrato_desde)
+        contrato_hasta = normalizar_contrato(contrato_hasta) if contrato_hasta else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        rows = serie_posiciones(
+            conn, contrato_desde, contrato_hasta,
+            desde.isoformat() if desde else None,
+            hasta.isoformat() if hasta else None,
+        )
+        return [PrecioPosicion(**dict(row)) for row in rows]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener precios de posiciones: {str(e)}")
+
+
+@router.get("/serie", response_model=SerieCierres)
+def obtener_serie(
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    contrato: Optional[str] = Query(None, description="Posición ICE 'YYYY-MM' (o 'dic24'); sin contrato se usa 'campo'"),
+    campo: str = Query("precio_usd_saco", description=f"Campo del cierre: {', '.join(CAMPOS)}"),
+    agregacion: str = Query("dia", description=f"Período: {', '.join(AGREGACIONES)}"),
+    sma: Optional[int] = Query(None, ge=1, le=MAX_VENTANA, description="Ventana de la media móvil simple (en períodos)"),
+    ema: Optional[int] = Query(None, ge=1, le=MAX_VENTANA, description="Ventana de la media móvil exponencial (en períodos)"),
+    conn: sqlite3.Connection = Depends(get_conexion),
+):
+    """
+    Serie de cierres por día, semana o mes con apertura / máximo / mínimo / cierre
+    y medias móviles opcionales, calculada en el servidor en una sola pasada.
+    Ej: /cierre_ny_bch/serie?contrato=2025-03&agregacion=semana&desde=2024-01-01&sma=4&ema=12
+    """
+    if desde and hasta and desde > hasta:
+        raise HTTPException(status_code=400, detail="'desde' no puede ser posterior a 'hasta'.")
+    try:
+        if contrato:
+            contrato = normalizar_contrato(contrato)
+            puntos = puntos_posicion(conn, contrato, desde, hasta)
+        else:
+            puntos = puntos_campo(campo, desde, hasta, conn)
+        serie = agregar(puntos, agregacion)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al calcular la serie: {str(e)}")
+    return SerieCierres(
+        serie=contrato or campo,
+        agregacion=agregacion,
+        **serie._asdict(),
+        sma=media_simple(serie.cierre, sma) if sma else None,
+        ema=media_exponencial(serie.cierre, ema) if ema else None,
+    )
+
+
+@router.get("/curva/{fecha}", response_model=CurvaForwardRespuesta)
+def obtener_curva(fecha: date, conn: sqlite3.Connection = Depends(get_conexion)):
+    """
+    Curva forward ICE del cierre de una fecha (modulo_cierre/curva.py), con el precio
+    interpolado de cada mes entre la primera y la última posición.
+    """
+    try:
+        curva = cache_curvas.obtener([fecha], conn)[fecha]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al construir la curva: {str(e)}")
+    if curva is None:
+        raise HTTPException(status_code=404, detail=f"No hay posiciones ICE para la fecha {fecha}.")
+    return CurvaForwardRespuesta(
+        fecha=fecha,
+        contratos=[mes_de_indice(m) for m in curva.meses],
+        precios=list(curva.precios),
+        meses=[mes_de_indice(m) for m in range(curva.meses[0], curva.meses[-1] + 1)],
+        precios_mensuales=curva.mensual(),
+    )
+
+
+@router.post("/curva/precios", response_model=PreciosEmbarque)
+def calcular_precios_embarque(solicitud: SolicitudPreciosEmbarque, conn: sqlite3.Connection = Depends(get_conexion)):
+    """
+    Precio de varios meses de embarque para varias fechas en una sola llamada.
+    Ej: {"fechas": ["2025-04-07", "2025-04-08"], "meses": ["2025-04", "2025-06", "2025-10"]}
+    """
+    try:
+        precios = precios_embarque(solicitud.fechas, solicitud.meses, conn)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al calcular precios de embarque: {str(e)}")
+    return PreciosEmbarque(fechas=solicitud.fechas, meses=solicitud.meses, precios=precios)
+
+
+@router.get("/calendario", response_model=List[ContratoCalendario])
+def obtener_calendario(desde: Optional[date] = None, hasta: Optional[date] = None):
+    """
+    Contratos KC que son posición activa en algún día del rango, con su primer aviso,
+    último día de negociación y fecha de rotación. Por defecto: el año en curso.
+    """
+    desde = desde or date(date.today().year, 1, 1)
+    hasta = hasta or date(desde.year, 12, 31)
+    if desde > hasta:
+        raise HTTPException(status_code=400, detail="'desde' no puede ser posterior a 'hasta'.")
+    return [ContratoCalendario(**c._asdict()) for c in calendario_kc.entre(desde, hasta)]
+
+
+@router.get("/activo/{fecha}", response_model=PosicionActiva)
+def obtener_posicion_activa(fecha: date):
+    """Posición ICE activa ("nearby") en una fecha y la que le sigue."""
+    i = calendario_kc.indice_activo(fecha)
+    if i is None:
+        raise HTTPException(status_code=404, detail=f"La fecha {fecha} está fuera del calendario de contratos.")
+    contratos = calendario_kc.contratos
+    return PosicionActiva(
+        fecha=fecha,
+        activo=ContratoCalendario(**contratos[i]._asdict()),
+        siguiente=ContratoCalendario(**contratos[i + 1]._asdict()) if i + 1 < len(contratos) else None,
+    )
+
+
+@router.get("/continua", response_model=SerieContinuaRespuesta)
+def obtener_serie_continua(desde: Optional[date] = None, hasta: Optional[date] = None):
+    """
+    Serie continua de la posición activa, ajustada hacia atrás: los precios anteriores a
+    cada rotación se corren por el diferencial entre el contrato nuevo y el anterior.
+    """
+    try:
+        fechas, contratos, precios, originales = serie_continua.serie(desde, hasta)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener la serie continua: {str(e)}")
+    return SerieContinuaRespuesta(fechas=fechas, contratos=contratos, precios=precios, precios_originales=originales)
+
+
+@router.get("/tasa/{fecha}", response_model=TasaCambio)
+def obtener_tasa_a_fecha(
+    fecha: date,
+    politica: str = Query("anterior", description=f"Política: {', '.join(POLITICAS)}"),
+    conn: sqlite3.Connection = Depends(get_conexion),
+):
+    """
+    Tasa de cambio BCH vigente en una fecha. Con la política 'anterior' (por defecto)
+    los fines de semana y feriados usan la tasa del último día publicado.
+    """
+    try:
+        resuelta = resolver_tasa(fecha, politica, conn)
+    except TasaNoDisponible as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return TasaCambio(fecha=fecha, fecha_tasa=resuelta.fecha_tasa, tasa_cambio_bch=resuelta.tasa, politica=politica)
+
+
+@router.get("/tasas", response_model=List[TasaCambio])
+def obtener_tasas_a_fechas(
+    fechas: List[date] = Query(..., description="Fechas a resolver (repetir el parámetro)"),
+    politica: str = Query("anterior", description=f"Política: {', '.join(POLITICAS)}"),
+    conn: sqlite3.Connection = Depends(get_conexion),
+):
+    """
+    Resuelve varias fechas en una sola llamada, en el mismo orden (para reportes).
+    Ej: /cierre_ny_bch/tasas?fechas=2025-04-05&fechas=2025-04-07&politica=interpolada
+    Las fechas sin tasa vuelven con tasa_cambio_bch = null.
+    """
+    if len(fechas) > 1000:
+        raise HTTPException(status_code=422, detail="Máximo 1000 fechas por consulta.")
+    try:
+        resueltas = resolver_tasas(fechas, politica, conn)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return [
+        TasaCambio(fecha=fecha, fecha_tasa=r.fecha_tasa, tasa_cambio_bch=r.tasa, politica=politica) if r
+        else TasaCambio(fecha=fecha, politica=politica)
+        for fecha, r in zip(fechas, resueltas)
+    ]
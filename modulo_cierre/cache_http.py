@@ -0,0 +1,114 @@
+# ==modulo_cierre/cache_http.py #041
+import threading
+from datetime import date, datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+
+from modulo_cierre.historial import historial
+
+# --- Caché HTTP para los endpoints de lectura de cierres ---
+# Los tableros de los exportadores consultan /ultimo y /por_fecha una y otra vez,
+# pero un cierre cambia a lo sumo una vez al día. Cada respuesta lleva:
+#   ETag          -> '"<id_registro>-<fecha_registro>"' del cierre
+#   Last-Modified -> fecha_registro (CURRENT_TIMESTAMP de SQLite, en UTC)
+#   Cache-Control -> max-age de un día para fechas pasadas; 'no-cache' (revalidar) para el resto
+# Con If-None-Match / If-Modified-Since vigentes se responde 304 sin cuerpo.
+
+# Fechas con más de estos días de antigüedad casi nunca cambian, pero todavía se pueden
+# corregir (POST /cierre_ny_bch/ o la importación CSV reemplazan cualquier fecha): se
+# cachean un día y después se revalidan con el ETag. Nunca 'immutable', porque con eso
+# el cliente no vuelve a preguntar aunque el ETag del servidor haya cambiado.
+DIAS_EDITABLES = 7
+CACHE_HISTORICO = "public, max-age=86400"
+CACHE_REVALIDAR = "no-cache"
+
+# Validadores de la última respuesta por recurso: clave -> (historial.version, ETag, Last-Modified).
+# Si la versión del historial no cambió, el ETag sigue vigente y el 304 se responde sin buscar nada.
+_validadores: Dict[str, Tuple[int, Optional[str], Optional[str]]] = {}
+_lock = threading.Lock()
+_MAX_VALIDADORES = 4096
+
+
+def politica_cache(fecha: Optional[date] = None) -> str:
+    """Cache-Control para el cierre de 'fecha' (None = recurso que cambia, como /ultimo)."""
+    if fecha is not None and fecha < date.today() - timedelta(days=DIAS_EDITABLES):
+        return CACHE_HISTORICO
+    return CACHE_REVALIDAR
+
+
+def validadores(registro: Optional[Dict[str, Any]]) -> Tuple[Optional[str], Optional[str]]:
+    """(ETag, Last-Modified) de un cierre; (None, None) si no existe."""
+    if not registro:
+        return None, None
+    fecha_registro = str(registro.get("fecha_registro") or "")
+    etag = f'"{registro["id_registro"]}-{fecha_registro.replace(" ", "T")}"'
+    try:
+        modificado = datetime.fromisoformat(fecha_registro).replace(tzinfo=timezone.utc)
+        return etag, format_datetime(modificado, usegmt=True)
+    except ValueError:
+        return etag, None
+
+
+def _coincide_etag(if_none_match: str, etag: str) -> bool:
+    etiquetas = [e.strip().removeprefix("W/") for e in if_none_match.split(",")]
+    return "*" in etiquetas or etag in etiquetas
+
+
+def _no_modificado(request: Request, etag: Optional[str], ultima_modificacion: Optional[str]) -> bool:
+    if etag is None:
+        return False
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:  # Si viene, If-Modified-Since se ignora (RFC 9110)
+        return _coincide_etag(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and ultima_modificacion:
+        try:
+            return parsedate_to_datetime(ultima_modificacion) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _encabezados(etag: Optional[str], ultima_modificacion: Optional[str], cache_control: str) -> Dict[str, str]:
+    encabezados = {"Cache-Control": cache_control}
+    if etag:
+        encabezados["ETag"] = etag
+    if ultima_modificacion:
+        encabezados["Last-Modified"] = ultima_modificacion
+    return encabezados
+
+
+def responder_con_cache(
+    request: Request,
+    response: Response,
+    clave: str,
+    obtener: Callable[[], Optional[Dict[str, Any]]],
+    cache_control: str,
+):
+    """
+    Devuelve el registro de obtener() con ETag / Last-Modified / Cache-Control, o
+    un 304 si el cliente ya tiene la versión vigente. Si el historial no cambió
+    desde la última respuesta de 'clave', el 304 no consulta nada.
+    """
+    version = historial.version
+    if historial.cargado and request.headers.get("if-none-match"):
+        with _lock:
+            guardado = _validadores.get(clave)
+        if guardado and guardado[0] == version and _no_modificado(request, guardado[1], guardado[2]):
+            return Response(status_code=304, headers=_encabezados(guardado[1], guardado[2], cache_control))
+
+    registro = obtener()
+    etag, ultima_modificacion = validadores(registro)
+    if historial.cargado:
+        with _lock:
+            if len(_validadores) >= _MAX_VALIDADORES:
+                _validadores.clear()
+            _validadores[clave] = (version, etag, ultima_modificacion)
+
+    encabezados = _encabezados(etag, ultima_modificacion, cache_control if registro else CACHE_REVALIDAR)
+    if _no_modificado(request, etag, ultima_modificacion):
+        return Response(status_code=304, headers=encabezados)
+    response.headers.update(encabezados)
+    return registro
@@ -0,0 +1,211 @@
+# ==modulo_cierre/calendario.py #072
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+from modulo_cierre.historial import HistorialCierres, historial
+
+# --- Calendario de contratos ICE Coffee "C" (KC) ---
+# Meses de contrato: marzo (H), mayo (K), julio (N), septiembre (U) y diciembre (Z).
+# Reglas de ICE para cada contrato:
+#   primer aviso (FND)    -> 7 días hábiles antes del primer día hábil del mes de entrega
+#   último aviso          -> 7 días hábiles antes del último día hábil del mes de entrega
+#   último día de negociación -> 1 día hábil antes del último aviso
+# La posición activa ("nearby") de una fecha es el primer contrato cuya fecha de
+# rotación aún no llegó. Se rota DIAS_ROLL días hábiles antes del primer aviso:
+# desde fecha_roll (inclusive) la posición activa es la siguiente.
+#
+# Días hábiles = lunes a viernes menos 'feriados' (los feriados de ICE no están
+# cargados: si uno cae en la ventana, la fecha calculada se corre un día).
+#
+# Para resolver la posición activa en O(1), el calendario guarda un arreglo denso
+# con un elemento por día (desde el 1 de enero del primer año): el índice del
+# contrato activo ese día. Buscar es restar ordinales y leer una posición.
+
+MESES_CONTRATO = {3: "H", 5: "K", 7: "N", 9: "U", 12: "Z"}
+DIAS_ROLL = 1
+ANIO_INICIAL = 2000
+ANIO_FINAL = 2050
+
+
+class ContratoKC(NamedTuple):
+    contrato: str                   # 'YYYY-MM' (clave de cierre_posiciones)
+    codigo: str                     # Código ICE, ej: 'KCH25'
+    primer_aviso: date
+    ultimo_dia_negociacion: date
+    fecha_roll: date                # Primer día en que la posición activa es la siguiente
+
+
+def codigo_ice(contrato: str) -> str:
+    """'2025-03' -> 'KCH25'."""
+    anio, mes = contrato.split("-")
+    return f"KC{MESES_CONTRATO[int(mes)]}{anio[2:]}"
+
+
+class CalendarioKC:
+    def __init__(self, anio_inicial: int = ANIO_INICIAL, anio_final: int = ANIO_FINAL,
+                 dias_roll: int = DIAS_ROLL, feriados: Iterable[date] = ()):
+        self.dias_roll = dias_roll
+        self.feriados: FrozenSet[date] = frozenset(feriados)
+        self.contratos: List[ContratoKC] = [
+            self._contrato(anio, mes) for anio in range(anio_inicial, anio_final + 1) for mes in MESES_CONTRATO
+        ]
+        self._indice = {c.contrato: i for i, c in enumerate(self.contratos)}
+        self._rolls = [c.fecha_roll for c in self.contratos]
+        # Arreglo denso: _activo[ordinal - _base] = índice del contrato activo
+        self._base = date(anio_inicial, 1, 1).toordinal()
+        self._activo = array("H")
+        inicio = self._base
+        for i, contrato in enumerate(self.contratos):
+            fin = contrato.fecha_roll.toordinal()
+            self._activo.extend([i] * max(0, fin - inicio))
+            inicio = max(inicio, fin)
+
+    # --- Reglas de fechas ---
+
+    def es_habil(self, dia: date) -> bool:
+        return dia.weekday() < 5 and dia not in self.feriados
+
+    def _mover_habiles(self, dia: date, dias: int) -> date:
+        """'dias' días hábiles antes (negativo) o después de 'dia'."""
+        paso = timedelta(days=1 if dias > 0 else -1)
+        for _ in range(abs(dias)):
+            dia += paso
+            while not self.es_habil(dia):
+                dia += paso
+        return dia
+
+    def _contrato(self, anio: int, mes: int) -> ContratoKC:
+        primer_habil = date(anio, mes, 1)
+        while not self.es_habil(primer_habil):
+            primer_habil += timedelta(days=1)
+        siguiente_mes = date(anio + mes // 12, mes % 12 + 1, 1)
+        ultimo_habil = siguiente_mes - timedelta(days=1)
+        while not self.es_habil(ultimo_habil):
+            ultimo_habil -= timedelta(days=1)
+        primer_aviso = self._mover_habiles(primer_habil, -7)
+        ultimo_aviso = self._mover_habiles(ultimo_habil, -7)
+        contrato = f"{anio:04d}-{mes:02d}"
+        return ContratoKC(
+            contrato=contrato,
+            codigo=codigo_ice(contrato),
+            primer_aviso=primer_aviso,
+            ultimo_dia_negociacion=self._mover_habiles(ultimo_aviso, -1),
+            fecha_roll=self._mover_habiles(primer_aviso, -self.dias_roll),
+        )
+
+    # --- Consultas ---
+
+    def indice_activo(self, fecha: date) -> Optional[int]:
+        """Índice (en self.contratos) de la posición activa en 'fecha'; None fuera del calendario."""
+        desplazamiento = fecha.toordinal() - self._base
+        if 0 <= desplazamiento < len(self._activo):
+            return self._activo[desplazamiento]
+        return None
+
+    def activo(self, fecha: date) -> Optional[ContratoKC]:
+        i = self.indice_activo(fecha)
+        return self.contratos[i] if i is not None else None
+
+    def contrato(self, contrato: str) -> Optional[ContratoKC]:
+        i = self._indice.get(contrato)
+        return self.contratos[i] if i is not None else None
+
+    def entre(self, desde: date, hasta: date) -> List[ContratoKC]:
+        """Contratos cuyo período como posición activa se cruza con [desde, hasta]."""
+        return self.contratos[bisect_right(self._rolls, desde):bisect_right(self._rolls, hasta) + 1]
+
+
+calendario_kc = CalendarioKC()
+
+
+def precio_nearby(fecha: date, posiciones: Dict[str, float]) -> Optional[float]:
+    """Precio de la posición activa en 'fecha' según las posiciones del cierre (None si no está)."""
+    activo = calendario_kc.activo(fecha)
+    return posiciones.get(activo.contrato) if activo else None
+
+
+# --- Serie continua de la posición activa, ajustada hacia atrás ---
+# En cada rotación la posición nueva cotiza con un diferencial respecto a la
+# anterior; unir los precios crudos deja un salto que no es movimiento del mercado.
+# El ajuste hacia atrás suma ese diferencial (nueva - anterior, el mismo día de la
+# rotación) a todos los precios anteriores a la rotación, así el último tramo
+# conserva sus precios reales.
+#
+# Para no recalcular toda la serie con cada cierre, se guarda por punto el precio
+# crudo y la suma de diferenciales hasta ese punto (acumulado); el precio ajustado
+# es crudo + (acumulado_total - acumulado_punto). Un cierre nuevo al final es un
+# append O(1). Cualquier otro cambio del historial (corrección de una fecha pasada,
+# importación) se detecta por historial.version y reconstruye la serie al leerla.
+
+
+class SerieContinua:
+    def __init__(self, calendario: CalendarioKC = calendario_kc, fuente: HistorialCierres = historial):
+        self.calendario = calendario
+        self.fuente = fuente
+        self._lock = threading.Lock()
+        self._version = None
+        self._vaciar()
+
+    def _vaciar(self):
+        self._fechas = array("i")
+        self._contratos = array("H")   # Índice del contrato activo de cada punto
+        self._crudos = array("d")
+        self._acumulado = array("d")
+        self._total = 0.0
+
+    def _agregar(self, fecha: date, posiciones: Dict[str, float]):
+        i = self.calendario.indice_activo(fecha)
+        if i is None:
+            return
+        precio = posiciones.get(self.calendario.contratos[i].contrato)
+        if precio is None:
+            return
+        if self._contratos and self._contratos[-1] != i:
+            # Rotación: diferencial del mismo día; si el cierre ya no trae la posición
+            # anterior, contra su último precio conocido
+            anterior = posiciones.get(self.calendario.contratos[self._contratos[-1]].contrato, self._crudos[-1])
+            self._total += precio - anterior
+        self._fechas.append(fecha.toordinal())
+        self._contratos.append(i)
+        self._crudos.append(precio)
+        self._acumulado.append(self._total)
+
+    def _reconstruir(self):
+        self._vaciar()
+        version = self.fuente.version
+        for registro in self.fuente.rango():
+            self._agregar(date.fromisoformat(registro["fecha"]), registro["posiciones"])
+        self._version = version
+
+    def actualizar(self, fecha: date, posiciones: Dict[str, float]):
+        """
+        Llamar justo después de historial.actualizar() con el mismo cierre. Si es una
+        fecha nueva al final se agrega en O(1); si no, la serie queda para reconstruir.
+        """
+        with self._lock:
+            al_final = not self._fechas or fecha.toordinal() > self._fechas[-1]
+            if self._version == self.fuente.version - 1 and al_final:
+                self._agregar(fecha, posiciones)
+                self._version = self.fuente.version
+
+    def serie(self, desde: Optional[date] = None, hasta: Optional[date] = None
+              ) -> Tuple[List[str], List[str], List[float], List[float]]:
+        """(fechas, contratos, precios ajustados, precios crudos) entre dos fechas."""
+        with self._lock:
+            if self._version != self.fuente.version:
+                self._reconstruir()
+            inicio = bisect_left(self._fechas, desde.toordinal()) if desde else 0
+            fin = bisect_right(self._fechas, hasta.toordinal()) if hasta else len(self._fechas)
+            contratos = self.calendario.contratos
+            return (
+                [date.fromordinal(o).isoformat() for o in self._fechas[inicio:fin]],
+                [contratos[i].contrato for i in self._contratos[inicio:fin]],
+                [c + (self._total - a) for c, a in zip(self._crudos[inicio:fin], self._acumulado[inicio:fin])],
+                list(self._crudos[inicio:fin]),
+            )
+
+
+serie_continua = SerieContinua()
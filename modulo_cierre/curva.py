@@ -0,0 +1,158 @@
+# ==modulo_cierre/curva.py #070
+import sqlite3
+import threading
+from array import array
+from datetime import date
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+from modulo_cierre.historial import historial
+from modulo_cierre.posiciones import leer_posiciones
+
+# --- Curva forward ICE por fecha de cierre ---
+# Cada cierre guarda el precio de unas pocas posiciones (mar, may, jul, sep, dic).
+# Un exportador fija precio contra el mes de embarque, que puede no ser un mes de
+# contrato: el precio de ese mes se interpola linealmente entre las dos posiciones
+# vecinas de la curva de esa fecha. Antes de la primera posición se usa la primera
+# (el "nearby"); después de la última no hay precio (None).
+#
+# Los meses se manejan como índices enteros (año * 12 + mes - 1) y cada curva como
+# dos array paralelos ordenados. Para muchos meses a la vez, los meses se ordenan
+# una sola vez y cada curva se recorre en una sola pasada junto con ellos (merge),
+# en lugar de buscar mes por mes.
+
+MAX_CURVAS = 4096
+
+
+def indice_mes(mes: str) -> int:
+    """'2025-03' -> índice entero del mes."""
+    anio, numero = mes.split("-")
+    return int(anio) * 12 + int(numero) - 1
+
+
+def mes_de_indice(indice: int) -> str:
+    return f"{indice // 12:04d}-{indice % 12 + 1:02d}"
+
+
+class CurvaForward(NamedTuple):
+    fecha: date
+    meses: array     # array('i') de índices de mes, ascendente
+    precios: array   # array('d') paralelo
+
+    @classmethod
+    def desde_posiciones(cls, fecha: date, posiciones: Dict[str, float]) -> "CurvaForward":
+        ordenadas = sorted((indice_mes(contrato), precio) for contrato, precio in posiciones.items())
+        return cls(fecha, array("i", (m for m, _ in ordenadas)), array("d", (p for _, p in ordenadas)))
+
+    def precios_para(self, meses_ordenados: Sequence[int]) -> List[Optional[float]]:
+        """
+        Precio de cada mes (índices en orden ascendente) en una sola pasada sobre la curva.
+        """
+        resultado: List[Optional[float]] = []
+        nodos, precios = self.meses, self.precios
+        if not nodos:
+            return [None] * len(meses_ordenados)
+        j, ultimo = 0, len(nodos) - 1
+        for mes in meses_ordenados:
+            while j < ultimo and nodos[j + 1] <= mes:
+                j += 1
+            if mes <= nodos[0]:
+                resultado.append(precios[0])
+            elif mes == nodos[j]:
+                resultado.append(precios[j])
+            elif j == ultimo:
+                resultado.append(None)
+            else:
+                peso = (mes - nodos[j]) / (nodos[j + 1] - nodos[j])
+                resultado.append(precios[j] + (precios[j + 1] - precios[j]) * peso)
+        return resultado
+
+    def precio(self, mes: str) -> Optional[float]:
+        return self.precios_para([indice_mes(mes)])[0]
+
+    def mensual(self) -> List[float]:
+        """Precio de cada mes desde la primera hasta la última posición (inclusive)."""
+        if not self.meses:
+            return []
+        return self.precios_para(range(self.meses[0], self.meses[-1] + 1))
+
+
+class CacheCurvas:
+    """
+    Curvas ya construidas por fecha. Se vacía cuando cambia historial.version (un
+    cierre nuevo o corregido), igual que el índice de tasas de modulo_cierre/tasas.py.
+    """
+
+    def __init__(self, max_curvas: int = MAX_CURVAS):
+        self.max_curvas = max_curvas
+        self._lock = threading.Lock()
+        self._version = None
+        self._curvas: Dict[date, Optional[CurvaForward]] = {}
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, fechas: Iterable[date], conn: Optional[sqlite3.Connection] = None
+                ) -> Dict[date, Optional[CurvaForward]]:
+        """Curva de cada fecha (None si no hay cierre con posiciones); las que faltan se construyen juntas."""
+        fechas = list(dict.fromkeys(fechas))
+        with self._lock:
+            if self._version != historial.version:
+                self._curvas.clear()
+                self._version = historial.version
+            version = self._version
+            resultado = {f: self._curvas[f] for f in fechas if f in self._curvas}
+            self.aciertos += len(resultado)
+            self.fallos += len(fechas) - len(resultado)
+        faltantes = [f for f in fechas if f not in resultado]
+        if not faltantes:
+            return resultado
+
+        construidas = {}
+        if historial.cargado:
+            for fecha in faltantes:
+                registro = historial.por_fecha(fecha)
+                construidas[fecha] = self._curva(fecha, registro["posiciones"] if registro else {})
+        elif conn is not None:
+            posiciones = leer_posiciones(conn, [f.isoformat() for f in faltantes])
+            for fecha in faltantes:
+                construidas[fecha] = self._curva(fecha, posiciones[fecha.isoformat()])
+        else:
+            raise RuntimeError("El historial de cierres no está cargado y no se indicó una conexión.")
+
+        with self._lock:
+            if self._version == version:  # No guardar curvas de una versión anterior
+                if len(self._curvas) + len(construidas) > self.max_curvas:
+                    self._curvas.clear()
+                self._curvas.update(construidas)
+        resultado.update(construidas)
+        return resultado
+
+    @staticmethod
+    def _curva(fecha: date, posiciones: Dict[str, float]) -> Optional[CurvaForward]:
+        return CurvaForward.desde_posiciones(fecha, posiciones) if posiciones else None
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {"curvas": len(self._curvas), "aciertos": self.aciertos, "fallos": self.fallos}
+
+
+cache_curvas = CacheCurvas()
+
+
+def precios_embarque(fechas: Sequence[date], meses: Sequence[str],
+                     conn: Optional[sqlite3.Connection] = None) -> List[List[Optional[float]]]:
+    """
+    Matriz de precios: una fila por fecha (en el orden pedido) y una columna por mes
+    de embarque ('YYYY-MM', en el orden pedido). None donde no hay curva o precio.
+    """
+    indices = [indice_mes(mes) for mes in meses]
+    orden = sorted(set(indices))
+    curvas = cache_curvas.obtener(fechas, conn)
+    matriz = []
+    for fecha in fechas:
+        curva = curvas[fecha]
+        if curva is None:
+            matriz.append([None] * len(indices))
+            continue
+        por_mes = dict(zip(orden, curva.precios_para(orden)))
+        matriz.append([por_mes[i] for i in indices])
+    return matriz
@@ -0,0 +1,146 @@
+# ==modulo_cierre/historial.py #036
+import math
+import sqlite3
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from modulo_cierre.posiciones import leer_posiciones
+
+# Valor de las series para "sin dato" (NULL en la base)
+SIN_DATO = math.nan
+
+
+def _numero(valor: Optional[float]) -> float:
+    return SIN_DATO if valor is None else float(valor)
+
+
+def _opcional(valor: float) -> Optional[float]:
+    return None if math.isnan(valor) else valor
+
+
+class HistorialCierres:
+    """
+    Copia en memoria del historial de cierre_ny_ice_bch (unos pocos miles de filas
+    que cambian una vez al día) para responder sin ir a SQLite.
+
+    Las fechas se guardan como ordinales (date.toordinal) en un array('i') ordenado
+    y cada serie numérica en un array('d') paralelo, con NaN donde la base tiene NULL.
+    Los datos que no son series (fuentes, fecha_registro, posiciones) van en listas
+    paralelas. Así una consulta puntual o de rango es un bisect sobre enteros.
+
+    Se carga al iniciar la aplicación y se actualiza después de cada upsert
+    confirmado (ver crear_o_actualizar_cierre). Cada proceso tiene su propia copia:
+    con varios workers de uvicorn, un cierre guardado en otro proceso solo se ve
+    aquí al reiniciar o al llamar a cargar().
+    """
+
+    SERIES = ("precio_usd_saco", "tasa_cambio_bch")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.cargado = False
+        self.version = 0  # Aumenta con cada cambio; útil para validar cachés derivados
+        self._vaciar()
+
+    def _vaciar(self):
+        self._fechas = array("i")
+        self._ids = array("q")
+        self._series = {serie: array("d") for serie in self.SERIES}
+        self._extras: List[Dict[str, Any]] = []  # fecha_registro, fuentes, posiciones...
+
+    # --- Carga y actualización ---
+
+    def cargar(self, conn: sqlite3.Connection):
+        """Carga (o recarga) todo el historial desde la base."""
+        filas = conn.execute("SELECT * FROM cierre_ny_ice_bch ORDER BY fecha").fetchall()
+        posiciones = leer_posiciones(conn, [fila["fecha"] for fila in filas])
+        with self._lock:
+            self._vaciar()
+            for fila in filas:
+                self._agregar(len(self._fechas), dict(fila), posiciones[fila["fecha"]])
+            self.cargado = True
+            self.version += 1
+
+    def actualizar(self, registro: Dict[str, Any], posiciones: Dict[str, float]):
+        """Inserta o reemplaza el cierre de registro['fecha'] (fila tal como quedó en la base)."""
+        ordinal = date.fromisoformat(str(registro["fecha"])).toordinal()
+        with self._lock:
+            i = bisect_left(self._fechas, ordinal)
+            if i < len(self._fechas) and self._fechas[i] == ordinal:
+                self._ids[i] = registro["id_registro"]
+                for serie in self.SERIES:
+                    self._series[serie][i] = _numero(registro.get(serie))
+                self._extras[i] = self._extra(registro, posiciones)
+            else:
+                self._agregar(i, registro, posiciones)
+            self.version += 1
+
+    def _agregar(self, i: int, registro: Dict[str, Any], posiciones: Dict[str, float]):
+        self._fechas.insert(i, date.fromisoformat(str(registro["fecha"])).toordinal())
+        self._ids.insert(i, registro["id_registro"])
+        for serie in self.SERIES:
+            self._series[serie].insert(i, _numero(registro.get(serie)))
+        self._extras.insert(i, self._extra(registro, posiciones))
+
+    def _extra(self, registro: Dict[str, Any], posiciones: Dict[str, float]) -> Dict[str, Any]:
+        extra = {k: v for k, v in registro.items() if k not in self.SERIES and k not in ("fecha", "id_registro")}
+        extra["posiciones"] = dict(posiciones)
+        return extra
+
+    def _registro(self, i: int) -> Dict[str, Any]:
+        registro = {
+            "id_registro": self._ids[i],
+            "fecha": date.fromordinal(self._fechas[i]).isoformat(),
+        }
+        for serie in self.SERIES:
+            registro[serie] = _opcional(self._series[serie][i])
+        registro.update(self._extras[i])
+        registro["posiciones"] = dict(registro["posiciones"])
+        return registro
+
+    # --- Consultas ---
+
+    def __len__(self) -> int:
+        return len(self._fechas)
+
+    def ultimo(self) -> Optional[Dict[str, Any]]:
+        """El cierre más reciente (por fecha), o None si no hay datos."""
+        with self._lock:
+            return self._registro(len(self._fechas) - 1) if self._fechas else None
+
+    def por_fecha(self, fecha: date) -> Optional[Dict[str, Any]]:
+        """El cierre de una fecha exacta, o None."""
+        ordinal = fecha.toordinal()
+        with self._lock:
+            i = bisect_left(self._fechas, ordinal)
+            if i < len(self._fechas) and self._fechas[i] == ordinal:
+                return self._registro(i)
+            return None
+
+    def rango(self, desde: Optional[date] = None, hasta: Optional[date] = None) -> List[Dict[str, Any]]:
+        """Los cierres entre dos fechas (inclusive), en orden ascendente."""
+        with self._lock:
+            inicio, fin = self._indices(desde, hasta)
+            return [self._registro(i) for i in range(inicio, fin)]
+
+    def serie(
+        self, nombre: str, desde: Optional[date] = None, hasta: Optional[date] = None
+    ) -> Tuple[array, array]:
+        """
+        Copia de (ordinales, valores) de una serie entre dos fechas, sin convertir a
+        dicts: para cálculos sobre muchos puntos. Los valores NaN son días sin dato.
+        """
+        with self._lock:
+            inicio, fin = self._indices(desde, hasta)
+            return self._fechas[inicio:fin], self._series[nombre][inicio:fin]
+
+    def _indices(self, desde: Optional[date], hasta: Optional[date]) -> Tuple[int, int]:
+        inicio = bisect_left(self._fechas, desde.toordinal()) if desde else 0
+        fin = bisect_right(self._fechas, hasta.toordinal()) if hasta else len(self._fechas)
+        return inicio, max(inicio, fin)
+
+
+historial = HistorialCierres()
@@ -0,0 +1,239 @@
+# ==modulo_cierre/importacion.py #066
+import codecs
+import csv
+import math
+import sqlite3
+import sys
+import time
+from concurrent.futures import Future
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from base_datos.escritor import escritor
+from modulo_cierre.calendario import precio_nearby
+from modulo_cierre.historial import historial
+from modulo_cierre.posiciones import normalizar_contrato
+
+# --- Importación masiva de cierres desde CSV ---
+# Para cargar años de historial sin un POST /cierre_ny_bch/ por día. El archivo se
+# lee fila por fila (memoria constante): las filas válidas se juntan en lotes de
+# TAMAÑO_LOTE y cada lote se escribe como UN trabajo del escritor único, es decir
+# una sola transacción con executemany. Mientras el escritor guarda un lote, aquí
+# se valida el siguiente (como máximo un lote en vuelo).
+#
+# Formato (con encabezado; el orden de las columnas no importa):
+#   fecha,precio_usd_saco,tasa_cambio_bch,fuente_precio,fuente_tasa,2025-03,2025-05,...
+# - fecha es obligatoria (YYYY-MM-DD); el resto de columnas son opcionales.
+# - Cada columna de posición es un contrato: 'YYYY-MM', 'dic24' o 'precio_posicion_dic24'.
+# - Una celda vacía es NULL (o "sin precio" para una posición). Sin precio_usd_saco se
+#   usa el de la posición activa de la fecha (modulo_cierre/calendario.py), como en el POST.
+# Igual que el POST, cada fila reemplaza el cierre de su fecha y todas sus posiciones.
+# Si una fecha se repite en el archivo, gana la última fila.
+
+TAMAÑO_LOTE = 5000
+MAX_ERRORES = 100  # Detalle de rechazos que se devuelve (el conteo es siempre completo)
+
+COLUMNAS_CIERRE = ("precio_usd_saco", "tasa_cambio_bch")
+COLUMNAS_FUENTE = {"fuente_precio": "ICE Futures", "fuente_tasa": "Banco Central de Honduras"}
+
+
+class FilaCierre(NamedTuple):
+    fecha: str
+    precio_usd_saco: Optional[float]
+    tasa_cambio_bch: Optional[float]
+    fuente_precio: str
+    fuente_tasa: str
+    posiciones: Dict[str, float]
+
+
+class ResultadoImportacion(NamedTuple):
+    insertados: int
+    actualizados: int
+    rechazados: int
+    errores: List[Tuple[int, str]]  # (número de línea, motivo), hasta MAX_ERRORES
+    segundos: float
+
+
+class Encabezado(NamedTuple):
+    indices: Dict[str, int]                 # fecha / precio / tasa / fuentes -> columna
+    posiciones: List[Tuple[int, str]]       # (columna, contrato 'YYYY-MM')
+
+
+def leer_encabezado(columnas: List[str]) -> Encabezado:
+    """Interpreta la fila de encabezado; ValueError si falta 'fecha' o hay columnas desconocidas."""
+    campos = ("fecha", *COLUMNAS_CIERRE, *COLUMNAS_FUENTE)
+    indices: Dict[str, int] = {}
+    posiciones: List[Tuple[int, str]] = []
+    vistas = set()
+    for i, nombre in enumerate(columnas):
+        nombre = nombre.strip().lower()
+        if nombre in campos:
+            clave = nombre
+            indices[clave] = i
+        else:
+            try:
+                clave = normalizar_contrato(nombre.removeprefix("precio_posicion_"))
+            except ValueError:
+                raise ValueError(f"Columna desconocida: '{nombre}'.") from None
+            posiciones.append((i, clave))
+        if clave in vistas:
+            raise ValueError(f"Columna repetida: '{nombre}'.")
+        vistas.add(clave)
+    if "fecha" not in indices:
+        raise ValueError("Falta la columna 'fecha'.")
+    return Encabezado(indices, posiciones)
+
+
+def _numero(valor: str, campo: str) -> Optional[float]:
+    valor = valor.strip()
+    if not valor:
+        return None
+    try:
+        numero = float(valor)
+    except ValueError:
+        raise ValueError(f"{campo}: '{valor}' no es un número.") from None
+    if not math.isfinite(numero) or numero <= 0:
+        raise ValueError(f"{campo}: debe ser un número positivo.")
+    return numero
+
+
+def validar_fila(celdas: List[str], encabezado: Encabezado) -> FilaCierre:
+    """Convierte una fila del CSV; ValueError con el motivo si no es válida."""
+    def celda(i: Optional[int]) -> str:
+        return celdas[i] if i is not None and i < len(celdas) else ""
+
+    indices = encabezado.indices
+    texto_fecha = celda(indices["fecha"]).strip()
+    try:
+        fecha = date.fromisoformat(texto_fecha).isoformat()
+    except ValueError:
+        raise ValueError(f"fecha: '{texto_fecha}' no es una fecha YYYY-MM-DD.") from None
+    valores = {campo: _numero(celda(indices.get(campo)), campo) for campo in COLUMNAS_CIERRE}
+    fuentes = {campo: celda(indices.get(campo)).strip() or defecto for campo, defecto in COLUMNAS_FUENTE.items()}
+    posiciones = {}
+    for i, contrato in encabezado.posiciones:
+        precio = _numero(celda(i), contrato)
+        if precio is not None:
+            posiciones[contrato] = precio
+    if valores["precio_usd_saco"] is None:  # Igual que el POST: el de la posición activa
+        valores["precio_usd_saco"] = precio_nearby(date.fromisoformat(fecha), posiciones)
+    return FilaCierre(fecha, valores["precio_usd_saco"], valores["tasa_cambio_bch"],
+                      fuentes["fuente_precio"], fuentes["fuente_tasa"], posiciones)
+
+
+def _guardar_lote(filas: List[FilaCierre]):
+    """Trabajo del escritor: upsert de un lote completo. Devuelve (insertados, actualizados)."""
+    def _trabajo(conn: sqlite3.Connection) -> Tuple[int, int]:
+        fechas = list(dict.fromkeys(f.fecha for f in filas))
+        existentes = set()
+        for inicio in range(0, len(fechas), 500):
+            bloque = fechas[inicio:inicio + 500]
+            existentes.update(fila[0] for fila in conn.execute(
+                f"SELECT fecha FROM cierre_ny_ice_bch WHERE fecha IN ({','.join('?' * len(bloque))})", bloque))
+        insertados = actualizados = 0
+        for fila in filas:
+            if fila.fecha in existentes:
+                actualizados += 1
+            else:
+                insertados += 1
+                existentes.add(fila.fecha)
+
+        ultimas = list({f.fecha: f for f in filas}.values())  # Fecha repetida: gana la última
+        fecha_registro = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        conn.executemany("""
+            INSERT INTO cierre_ny_ice_bch (fecha, precio_usd_saco, tasa_cambio_bch, fuente_precio, fuente_tasa, fecha_registro)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(fecha) DO UPDATE SET
+                precio_usd_saco = excluded.precio_usd_saco,
+                tasa_cambio_bch = excluded.tasa_cambio_bch,
+                fuente_precio = excluded.fuente_precio,
+                fuente_tasa = excluded.fuente_tasa,
+                fecha_registro = excluded.fecha_registro
+        """, [(f.fecha, f.precio_usd_saco, f.tasa_cambio_bch, f.fuente_precio, f.fuente_tasa, fecha_registro)
+              for f in ultimas])
+        # Mismo reemplazo que guardar_posiciones(), para todo el lote
+        conn.executemany("DELETE FROM cierre_posiciones WHERE fecha = ?", [(f.fecha,) for f in ultimas])
+        conn.executemany(
+            "INSERT INTO cierre_posiciones (fecha, contrato, precio) VALUES (?, ?, ?)",
+            [(f.fecha, contrato, precio) for f in ultimas for contrato, precio in f.posiciones.items()],
+        )
+        # Una recarga del historial por lote (no una actualización por fila)
+        escritor.despues_del_commit(lambda: historial.cargar(conn))
+        return insertados, actualizados
+    return _trabajo
+
+
+def importar_cierres(lineas: Iterable[str], tamaño_lote: int = TAMAÑO_LOTE) -> ResultadoImportacion:
+    """
+    Importa cierres desde las líneas de un CSV (un archivo abierto en modo texto o
+    cualquier iterable de str). ValueError si el encabezado no es válido; las filas
+    inválidas se cuentan como rechazadas y no detienen la importación.
+    """
+    inicio = time.perf_counter()
+    lector = csv.reader(lineas)
+    try:
+        encabezado = leer_encabezado(next(lector))
+    except StopIteration:
+        raise ValueError("El archivo está vacío.") from None
+
+    insertados = actualizados = rechazados = 0
+    errores: List[Tuple[int, str]] = []
+    en_vuelo: Optional[Future] = None
+    lote: List[FilaCierre] = []
+
+    def _esperar():
+        nonlocal insertados, actualizados
+        if en_vuelo is not None:
+            nuevos, cambiados = en_vuelo.result()
+            insertados += nuevos
+            actualizados += cambiados
+
+    def _enviar():
+        nonlocal en_vuelo, lote
+        _esperar()
+        en_vuelo = escritor.enviar(_guardar_lote(lote))
+        lote = []
+
+    for celdas in lector:
+        if not any(c.strip() for c in celdas):
+            continue  # Líneas en blanco
+        try:
+            lote.append(validar_fila(celdas, encabezado))
+        except ValueError as e:
+            rechazados += 1
+            if len(errores) < MAX_ERRORES:
+                errores.append((lector.line_num, str(e)))
+            continue
+        if len(lote) >= tamaño_lote:
+            _enviar()
+    if lote:
+        _enviar()
+    _esperar()
+    return ResultadoImportacion(insertados, actualizados, rechazados, errores, time.perf_counter() - inicio)
+
+
+def lineas_de_binario(archivo) -> Iterable[str]:
+    """Líneas de texto (UTF-8, con o sin BOM) de un archivo binario, sin leerlo completo."""
+    return codecs.iterdecode(archivo, "utf-8-sig")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Uso: python -m modulo_cierre.importacion archivo.csv")
+        sys.exit(2)
+    from base_datos.conexion import crear_base_datos
+    crear_base_datos()
+    print(f"Importando cierres desde {sys.argv[1]}...")
+    try:
+        with open(sys.argv[1], encoding="utf-8-sig", newline="") as archivo:
+            resultado = importar_cierres(archivo)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        escritor.detener()
+    for linea, motivo in resultado.errores:
+        print(f"  ⚠️ línea {linea}: {motivo}")
+    print(f"✅ {resultado.insertados} insertados, {resultado.actualizados} actualizados, "
+          f"{resultado.rechazados} rechazados en {resultado.segundos:.2f} s")
+    print("ℹ️ Los servidores en ejecución ven los cierres nuevos al reiniciar (historial en memoria).")
@@ -0,0 +1,94 @@
+# ==modulo_cierre/posiciones.py #034
+import re
+import sqlite3
+from typing import Dict, Iterable, List, Optional
+
+# --- Posiciones ICE en formato largo ---
+# Cada precio de cierre es una fila de cierre_posiciones(fecha, contrato, precio).
+# El contrato se identifica por su mes de vencimiento 'YYYY-MM' (ej: '2025-03' = KCH25),
+# así un contrato nuevo no requiere cambiar el esquema ni el código.
+
+MESES_ABREVIADOS = ("ene", "feb", "mar", "abr", "may", "jun", "jul", "ago", "sep", "oct", "nov", "dic")
+
+# Posiciones que tenían columna propia (precio_posicion_dic24 ... precio_posicion_sep26)
+POSICIONES_LEGADAS = ("dic24", "mar25", "may25", "jul25", "sep25", "dic25", "mar26", "may26", "jul26", "sep26")
+
+_FORMATO_CONTRATO = re.compile(r"^(\d{4})-(\d{2})$")
+_FORMATO_LEGADO = re.compile(r"^([a-z]{3})(\d{2})$")
+
+
+def normalizar_contrato(clave: str) -> str:
+    """
+    Convierte la clave de una posición a 'YYYY-MM'.
+    Acepta 'YYYY-MM' o el nombre de las columnas viejas ('dic24' -> '2024-12').
+    """
+    clave = clave.strip().lower()
+    coincidencia = _FORMATO_CONTRATO.match(clave)
+    if coincidencia and 1 <= int(coincidencia.group(2)) <= 12:
+        return clave
+    coincidencia = _FORMATO_LEGADO.match(clave)
+    if coincidencia and coincidencia.group(1) in MESES_ABREVIADOS:
+        mes = MESES_ABREVIADOS.index(coincidencia.group(1)) + 1
+        return f"20{coincidencia.group(2)}-{mes:02d}"
+    raise ValueError(f"Contrato inválido: '{clave}'. Use 'YYYY-MM' (ej: '2025-03').")
+
+
+def nombre_legado(contrato: str) -> str:
+    """'2024-12' -> 'dic24' (sufijo de las columnas precio_posicion_*)."""
+    anio, mes = contrato.split("-")
+    return f"{MESES_ABREVIADOS[int(mes) - 1]}{anio[2:]}"
+
+
+def leer_posiciones(conn: sqlite3.Connection, fechas: Iterable[str]) -> Dict[str, Dict[str, float]]:
+    """Devuelve {fecha: {contrato: precio}} para las fechas pedidas (índice por fecha)."""
+    fechas = list(dict.fromkeys(fechas))
+    resultado: Dict[str, Dict[str, float]] = {fecha: {} for fecha in fechas}
+    if not fechas:
+        return resultado
+    marcadores = ", ".join("?" for _ in fechas)
+    filas = conn.execute(f"""
+        SELECT fecha, contrato, precio FROM cierre_posiciones
+        WHERE fecha IN ({marcadores})
+        ORDER BY fecha, contrato
+    """, fechas)
+    for fecha, contrato, precio in filas:
+        resultado[fecha][contrato] = precio
+    return resultado
+
+
+def guardar_posiciones(conn: sqlite3.Connection, fecha: str, posiciones: Dict[str, float]):
+    """
+    Reemplaza las posiciones de una fecha (igual que antes el upsert sobrescribía
+    todas las columnas). Debe ejecutarse dentro de un trabajo del escritor único.
+    """
+    conn.execute("DELETE FROM cierre_posiciones WHERE fecha = ?", (fecha,))
+    conn.executemany(
+        "INSERT INTO cierre_posiciones (fecha, contrato, precio) VALUES (?, ?, ?)",
+        [(fecha, contrato, precio) for contrato, precio in posiciones.items()],
+    )
+
+
+def serie_posiciones(
+    conn: sqlite3.Connection,
+    contrato_desde: str,
+    contrato_hasta: Optional[str] = None,
+    desde: Optional[str] = None,
+    hasta: Optional[str] = None,
+) -> List[sqlite3.Row]:
+    """
+    Precios de un rango de contratos (y opcionalmente de fechas), ordenados por
+    contrato y fecha: recorre solo ese tramo de la clave primaria (contrato, fecha).
+    """
+    condiciones = ["contrato BETWEEN ? AND ?"]
+    parametros = [contrato_desde, contrato_hasta or contrato_desde]
+    if desde:
+        condiciones.append("fecha >= ?")
+        parametros.append(desde)
+    if hasta:
+        condiciones.append("fecha <= ?")
+        parametros.append(hasta)
+    return conn.execute(f"""
+        SELECT fecha, contrato, precio FROM cierre_posiciones
+        WHERE {' AND '.join(condiciones)}
+        ORDER BY contrato, fecha
+    """, parametros).fetchall()
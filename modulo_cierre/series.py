@@ -0,0 +1,120 @@
+# ==modulo_cierre/series.py #068
+import math
+import sqlite3
+from datetime import date
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from modulo_cierre.historial import historial
+
+# --- Series agregadas de cierres (GET /cierre_ny_bch/serie) ---
+# Los gráficos necesitan una serie por día, semana o mes con apertura / máximo /
+# mínimo / cierre (OHLC) de los cierres diarios del período, y medias móviles.
+# Todo se calcula en UNA pasada sobre puntos ya ordenados por fecha:
+#   - campos del cierre (precio_usd_saco, tasa_cambio_bch): el historial en memoria
+#     (o, si no está cargado, el índice UNIQUE de cierre_ny_ice_bch.fecha);
+#   - posiciones ICE: el tramo (contrato, fecha) de la clave primaria de cierre_posiciones.
+# La respuesta son arreglos paralelos (uno por columna), no un objeto por día.
+
+AGREGACIONES = ("dia", "semana", "mes")
+CAMPOS = ("precio_usd_saco", "tasa_cambio_bch")
+MAX_VENTANA = 500
+
+
+class SerieAgregada(NamedTuple):
+    fechas: List[str]          # Inicio del período (el día; el lunes; el día 1 del mes)
+    apertura: List[float]      # Primer cierre del período
+    maximo: List[float]
+    minimo: List[float]
+    cierre: List[float]        # Último cierre del período
+    dias: List[int]            # Días con dato en el período
+
+
+def inicio_periodo(ordinal: int, agregacion: str) -> int:
+    """Ordinal del primer día del período (dia / semana ISO desde el lunes / mes) que contiene 'ordinal'."""
+    if agregacion == "dia":
+        return ordinal
+    if agregacion == "semana":
+        return ordinal - (ordinal - 1) % 7  # date.fromordinal(1) es lunes
+    return ordinal - date.fromordinal(ordinal).day + 1
+
+
+def agregar(puntos: Iterable[Tuple[int, float]], agregacion: str) -> SerieAgregada:
+    """Agrupa (ordinal, valor) ordenados por fecha en períodos; los NaN se omiten."""
+    if agregacion not in AGREGACIONES:
+        raise ValueError(f"Agregación inválida: '{agregacion}'. Opciones: {', '.join(AGREGACIONES)}.")
+    serie = SerieAgregada([], [], [], [], [], [])
+    periodo_actual = None
+    for ordinal, valor in puntos:
+        if valor is None or math.isnan(valor):
+            continue
+        periodo = inicio_periodo(ordinal, agregacion)
+        if periodo != periodo_actual:
+            periodo_actual = periodo
+            serie.fechas.append(date.fromordinal(periodo).isoformat())
+            serie.apertura.append(valor)
+            serie.maximo.append(valor)
+            serie.minimo.append(valor)
+            serie.cierre.append(valor)
+            serie.dias.append(1)
+        else:
+            if valor > serie.maximo[-1]:
+                serie.maximo[-1] = valor
+            if valor < serie.minimo[-1]:
+                serie.minimo[-1] = valor
+            serie.cierre[-1] = valor
+            serie.dias[-1] += 1
+    return serie
+
+
+def media_simple(valores: List[float], ventana: int) -> List[Optional[float]]:
+    """SMA con suma móvil (O(n)); None hasta completar la primera ventana."""
+    resultado: List[Optional[float]] = []
+    suma = 0.0
+    for i, valor in enumerate(valores):
+        suma += valor
+        if i >= ventana:
+            suma -= valores[i - ventana]
+        resultado.append(suma / ventana if i >= ventana - 1 else None)
+    return resultado
+
+
+def media_exponencial(valores: List[float], ventana: int) -> List[Optional[float]]:
+    """EMA con alfa = 2 / (ventana + 1), iniciada con la SMA de la primera ventana."""
+    resultado: List[Optional[float]] = [None] * min(len(valores), ventana - 1)
+    if len(valores) < ventana:
+        return resultado
+    alfa = 2.0 / (ventana + 1)
+    ema = sum(valores[:ventana]) / ventana
+    resultado.append(ema)
+    for valor in valores[ventana:]:
+        ema += alfa * (valor - ema)
+        resultado.append(ema)
+    return resultado
+
+
+def puntos_campo(campo: str, desde: Optional[date], hasta: Optional[date],
+                 conn: Optional[sqlite3.Connection] = None) -> Iterable[Tuple[int, float]]:
+    """(ordinal, valor) de un campo del cierre, en orden de fecha."""
+    if campo not in CAMPOS:
+        raise ValueError(f"Campo inválido: '{campo}'. Opciones: {', '.join(CAMPOS)}.")
+    if historial.cargado:
+        return zip(*historial.serie(campo, desde, hasta))
+    if conn is None:
+        raise RuntimeError("El historial de cierres no está cargado y no se indicó una conexión.")
+    filas = conn.execute(f"""
+        SELECT fecha, {campo} FROM cierre_ny_ice_bch
+        WHERE fecha BETWEEN ? AND ? AND {campo} IS NOT NULL
+        ORDER BY fecha
+    """, ((desde or date.min).isoformat(), (hasta or date.max).isoformat()))
+    return ((date.fromisoformat(fecha).toordinal(), valor) for fecha, valor in filas)
+
+
+def puntos_posicion(conn: sqlite3.Connection, contrato: str, desde: Optional[date],
+                    hasta: Optional[date]) -> Iterable[Tuple[int, float]]:
+    """(ordinal, precio) de un contrato ICE, leídos en orden de la clave primaria sin cargarlos todos."""
+    filas = conn.execute("""
+        SELECT fecha, precio FROM cierre_posiciones
+        WHERE contrato = ? AND fecha BETWEEN ? AND ?
+        ORDER BY fecha
+    """, (contrato, (desde or date.min).isoformat(), (hasta or date.max).isoformat()))
+    return ((date.fromisoformat(fecha).toordinal(), precio) for fecha, precio in filas)
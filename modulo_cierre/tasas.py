@@ -0,0 +1,139 @@
+# ==modulo_cierre/tasas.py #039
+import math
+import sqlite3
+import threading
+from array import array
+from bisect import bisect_left
+from datetime import date
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from modulo_cierre.historial import historial
+
+# --- Resolución de la tasa de cambio BCH "a una fecha" ---
+# El BCH no publica tasa los fines de semana ni feriados; según la política:
+#   exacta      -> solo la tasa publicada ese mismo día
+#   anterior    -> la última tasa publicada en o antes de la fecha (día hábil previo)
+#   interpolada -> interpolación lineal entre la tasa anterior y la siguiente;
+#                  si aún no hay una tasa posterior, se usa la anterior
+POLITICAS = ("exacta", "anterior", "interpolada")
+
+# Máximo de días hacia atrás para 'anterior'/'interpolada' (cubre Semana Santa)
+MAX_DIAS_ANTERIOR = 7
+
+
+class TasaNoDisponible(LookupError):
+    """No hay una tasa que cumpla la política para la fecha pedida."""
+
+
+class TasaResuelta(NamedTuple):
+    fecha: date           # Fecha pedida
+    fecha_tasa: date      # Fecha de la tasa usada (la anterior, si fue interpolada)
+    tasa: float
+    politica: str
+
+
+class _IndiceTasas:
+    """
+    Fechas (ordinales) y tasas no nulas del historial en memoria, listas para bisect.
+    Se reconstruye solo cuando cambia historial.version.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._datos: Tuple[array, array] = (array("i"), array("d"))
+
+    def obtener(self) -> Tuple[array, array]:
+        with self._lock:
+            if self._version != historial.version:
+                fechas, tasas = historial.serie("tasa_cambio_bch")
+                validas = [i for i, tasa in enumerate(tasas) if not math.isnan(tasa)]
+                self._datos = (array("i", (fechas[i] for i in validas)), array("d", (tasas[i] for i in validas)))
+                self._version = historial.version
+            return self._datos
+
+
+_indice = _IndiceTasas()
+
+
+def _vecinas_memoria(ordinal: int) -> Tuple[Optional[Tuple[int, float]], Optional[Tuple[int, float]]]:
+    """(tasa en o antes de la fecha, tasa después de la fecha) desde el historial en memoria."""
+    fechas, tasas = _indice.obtener()
+    i = bisect_left(fechas, ordinal)
+    if i < len(fechas) and fechas[i] == ordinal:
+        return (fechas[i], tasas[i]), None
+    anterior = (fechas[i - 1], tasas[i - 1]) if i > 0 else None
+    siguiente = (fechas[i], tasas[i]) if i < len(fechas) else None
+    return anterior, siguiente
+
+
+def _vecinas_sql(conn: sqlite3.Connection, ordinal: int):
+    """Lo mismo que _vecinas_memoria, con consultas sobre el índice UNIQUE de 'fecha'."""
+    fecha = date.fromordinal(ordinal).isoformat()
+    row = conn.execute("""
+        SELECT fecha, tasa_cambio_bch FROM cierre_ny_ice_bch
+        WHERE fecha <= ? AND tasa_cambio_bch IS NOT NULL
+        ORDER BY fecha DESC LIMIT 1
+    """, (fecha,)).fetchone()
+    anterior = (date.fromisoformat(row[0]).toordinal(), row[1]) if row else None
+    if anterior and anterior[0] == ordinal:
+        return anterior, None
+    row = conn.execute("""
+        SELECT fecha, tasa_cambio_bch FROM cierre_ny_ice_bch
+        WHERE fecha > ? AND tasa_cambio_bch IS NOT NULL
+        ORDER BY fecha ASC LIMIT 1
+    """, (fecha,)).fetchone()
+    siguiente = (date.fromisoformat(row[0]).toordinal(), row[1]) if row else None
+    return anterior, siguiente
+
+
+def resolver_tasa(
+    fecha: date,
+    politica: str = "anterior",
+    conn: Optional[sqlite3.Connection] = None,
+    max_dias: int = MAX_DIAS_ANTERIOR,
+) -> TasaResuelta:
+    """
+    Tasa de cambio BCH para 'fecha' según la política. Usa el historial en memoria
+    si está cargado; si no, consulta la base con 'conn'.
+    Lanza TasaNoDisponible si no hay tasa que cumpla la política.
+    """
+    if politica not in POLITICAS:
+        raise ValueError(f"Política de tasa inválida: '{politica}'. Opciones: {', '.join(POLITICAS)}.")
+    ordinal = fecha.toordinal()
+    if historial.cargado:
+        anterior, siguiente = _vecinas_memoria(ordinal)
+    elif conn is not None:
+        anterior, siguiente = _vecinas_sql(conn, ordinal)
+    else:
+        raise RuntimeError("El historial de cierres no está cargado y no se indicó una conexión.")
+
+    if anterior and anterior[0] == ordinal:
+        return TasaResuelta(fecha, fecha, anterior[1], politica)
+    if politica == "exacta" or anterior is None or ordinal - anterior[0] > max_dias:
+        raise TasaNoDisponible(f"No se encontró una tasa de cambio para la fecha {fecha} (política '{politica}').")
+
+    tasa = anterior[1]
+    if politica == "interpolada" and siguiente is not None:
+        peso = (ordinal - anterior[0]) / (siguiente[0] - anterior[0])
+        tasa = anterior[1] + (siguiente[1] - anterior[1]) * peso
+    return TasaResuelta(fecha, date.fromordinal(anterior[0]), tasa, politica)
+
+
+def resolver_tasas(
+    fechas: Iterable[date],
+    politica: str = "anterior",
+    conn: Optional[sqlite3.Connection] = None,
+    max_dias: int = MAX_DIAS_ANTERIOR,
+) -> List[Optional[TasaResuelta]]:
+    """
+    Resuelve varias fechas en una llamada (en el mismo orden). Las fechas sin tasa
+    devuelven None en lugar de interrumpir el lote.
+    """
+    resultados = []
+    for fecha in fechas:
+        try:
+            resultados.append(resolver_tasa(fecha, politica, conn, max_dias))
+        except TasaNoDisponible:
+            resultados.append(None)
+    return resultados
@@ -1,5 +1,5 @@
 # ==modulo_compras_nac/api.py #023
-from fastapi import APIRouter, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, status, UploadFile, File, Form, Depends
 import sqlite3
 from datetime import date, datetime
 from typing import List, Optional, Dict, Any
@@ -7,7 +7,9 @@ from pydantic import BaseModel
 import os
 import uuid
 
-from config.settings import DB_NAME
+from base_datos.conexion import get_conexion
+from base_datos.escritor import escritor
+from base_datos.consultas import insertar_retornando
 
 router = APIRouter(prefix="/compras_nacionales", tags=["Compras Nacionales - Exportador"])
 
@@ -63,10 +65,6 @@ def registrar_compra(compra: CompraCreate): # , usuario_actual: Usuario = Depend
     (Por ahora, simulamos que cualquier usuario puede hacerlo, o lo protegemos más adelante).
     """
     try:
-        conn = sqlite3.connect(DB_NAME)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
         # TODO: Obtener el id_exportador del usuario autenticado
         # id_exportador = usuario_actual.id_usuario # O id_entidad
         # Por ahora, lo simulamos como 1 (ajusta según tu prueba)
@@ -78,28 +76,14 @@ def registrar_compra(compra: CompraCreate): # , usuario_actual: Usuario = Depend
         datos['numero_constancia_compra'] = generar_numero_constancia()
         # peso_kg, precio_total, retencion_lps se calculan en la BD
         
-        campos = list(datos.keys())
-        valores = tuple(datos.values())
-        placeholders = ', '.join(['?' for _ in campos])
-        campos_str = ', '.join(campos)
-        
-        sql = f"""
-            INSERT INTO compras_nacionales_exportador 
-            ({campos_str})
-            VALUES ({placeholders})
-        """
-        cursor.execute(sql, valores)
-        conn.commit()
+        # Un solo INSERT ... RETURNING * devuelve el registro con los campos calculados
+        def _guardar(conn: sqlite3.Connection):
+            return insertar_retornando(conn, "compras_nacionales_exportador", datos)
         
-        # Obtener el registro recién creado
-        id_nuevo = cursor.lastrowid
-        cursor.execute("SELECT * FROM compras_nacionales_exportador WHERE id_compra = ?", (id_nuevo,))
-        nuevo_registro = cursor.fetchone()
-        
-        conn.close()
+        nuevo_registro = escritor.ejecutar(_guardar)
         
         if nuevo_registro:
-            return Compra(**dict(nuevo_registro))
+            return Compra(**nuevo_registro)
         else:
             raise HTTPException(status_code=500, detail="Error al recuperar el registro creado.")
             
@@ -108,13 +92,11 @@ def registrar_compra(compra: CompraCreate): # , usuario_actual: Usuario = Depend
 
 
 @router.get("/", response_model=List[Compra])
-def listar_compras(skip: int = 0, limit: int = 100): # , usuario_actual: Usuario = Depends(get_exportador_actual)
+def listar_compras(skip: int = 0, limit: int = 100, conn: sqlite3.Connection = Depends(get_conexion)): # , usuario_actual: Usuario = Depends(get_exportador_actual)
     """
     Lista las compras nacionales registradas por el exportador.
     """
     try:
-        conn = sqlite3.connect(DB_NAME)
-        conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
         # TODO: Filtrar por id_exportador del usuario autenticado
@@ -130,7 +112,6 @@ def listar_compras(skip: int = 0, limit: int = 100): # , usuario_actual: Usuario
         """, (id_exportador_simulado, limit, skip))
         
         rows = cursor.fetchall()
-        conn.close()
         
         return [Compra(**dict(row)) for row in rows]
             
@@ -139,13 +120,11 @@ def listar_compras(skip: int = 0, limit: int = 100): # , usuario_actual: Usuario
 
 
 @router.get("/por_fecha/{fecha}", response_model=List[Compra])
-def listar_compras_por_fecha(fecha: date): # , usuario_actual: Usuario = Depends(get_exportador_actual)
+def listar_compras_por_fecha(fecha: date, conn: sqlite3.Connection = Depends(get_conexion)): # , usuario_actual: Usuario = Depends(get_exportador_actual)
     """
     Lista las compras nacionales registradas para una fecha específica.
     """
     try:
-        conn = sqlite3.connect(DB_NAME)
-        conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
         # TODO: Filtrar por id_exportador del usuario autenticado
@@ -158,7 +137,6 @@ def listar_compras_por_fecha(fecha: date): # , usuario_actual: Usuario = Depends
         """, (id_exportador_simulado, fecha.isoformat()))
         
         rows = cursor.fetchall()
-        conn.close()
         
         return [Compra(**dict(row)) for row in rows]
             
@@ -167,13 +145,11 @@ def listar_compras_por_fecha(fecha: date): # , usuario_actual: Usuario = Depends
 
 
 @router.get("/{id_compra}", response_model=Compra)
-def obtener_detalle_compra(id_compra: int): # , usuario_actual: Usuario = Depends(get_exportador_actual)
+def obtener_detalle_compra(id_compra: int, conn: sqlite3.Connection = Depends(get_conexion)): # , usuario_actual: Usuario = Depends(get_exportador_actual)
     """
     Obtiene el detalle de una compra nacional específica.
     """
     try:
-        conn = sqlite3.connect(DB_NAME)
-        conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
         # TODO: Verificar que la compra pertenece al exportador
@@ -185,7 +161,6 @@ def obtener_detalle_compra(id_compra: int): # , usuario_actual: Usuario = Depend
         """, (id_compra,))
         
         row = cursor.fetchone()
-        conn.close()
         
         if row:
             return Compra(**dict(row))
@@ -224,16 +199,12 @@ def subir_documento_compra(
             file_object.write(archivo.file.read())
 
         # Actualizar la base de datos con la ruta del archivo
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
         campo_actualizar = "ruta_archivo_comprobante" if tipo_documento == "comprobante" else "ruta_archivo_constancia_venta"
-        cursor.execute(f"""
+        escritor.ejecutar_sql(f"""
             UPDATE compras_nacionales_exportador
             SET {campo_actualizar} = ?
             WHERE id_compra = ?
         """, (ruta_completa, id_compra))
-        conn.commit()
-        conn.close()
 
         return {"mensaje": f"Documento '{tipo_documento}' subido exitosamente.", "ruta": ruta_completa}
 
@@ -1,10 +1,15 @@
 # === modulo_registro_compras/api.py (Versión Corregida, Completa y con Tasa de Cambio) ===
-from fastapi import APIRouter, HTTPException, status, Query
+from fastapi import APIRouter, HTTPException, status, Query, Depends
 import sqlite3
 from datetime import date
 from typing import List, Optional
 from pydantic import BaseModel
-from config.settings import DB_NAME
+from base_datos.conexion import get_conexion
+from base_datos.escritor import escritor
+from base_datos.consultas import insertar_retornando
+from base_datos.secuencias import ambito_reg_compa, semilla_reg_compa, siguiente_numero, valor_actual, reservar_rango
+from config.settings import AMBITO_REG_COMPA
+from modulo_cierre.tasas import resolver_tasa, TasaNoDisponible, POLITICAS
 
 router = APIRouter(prefix="/registro_compras_nac", tags=["Registro Compras Nacionales (Resumen)"])
 
@@ -43,6 +48,11 @@ class RegistroCompra(RegistroCompraBase):
 class ProximoRegCompaResponse(BaseModel):
     proximo_reg_compa: str
 
+# === Modelo para la Respuesta de una Reserva de Números (importaciones masivas) ===
+class ReservaNumerosResponse(BaseModel):
+    desde: int
+    hasta: int
+
 # === 04 - Modelo para Datos de Registro desde el Frontend (Agrupado) ===
 class RegistroCompraFrontendCreate(BaseModel):
     """Modelo para recibir datos de registro desde el frontend, que incluye ambos tipos de café."""
@@ -65,56 +75,80 @@ class DetallePagoResponse(BaseModel):
 
 # --- Funciones de Utilidad ---
 
-def obtener_tasa_cambio(fecha: date, conn: sqlite3.Connection) -> float:
+def obtener_tasa_cambio(fecha: date, conn: sqlite3.Connection, politica: str = "anterior") -> float:
+    """
+    Obtiene la tasa de cambio USD a HNL para una fecha (modulo_cierre/tasas.py).
+    Por defecto usa la última tasa publicada en o antes de la fecha, así los
+    registros de fin de semana o feriado usan la del día hábil anterior.
+    """
+    try:
+        return resolver_tasa(fecha, politica, conn).tasa
+    except TasaNoDisponible as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+def ambito_numeracion(exp_qic: str, cosecha: Optional[str] = None):
     """
-    Obtiene la tasa de cambio USD a HNL para una fecha específica desde la tabla cierre_ny_ice_bch.
+    Ámbito y semilla de la secuencia reg_compa según config.settings.AMBITO_REG_COMPA:
+    un contador global (comportamiento original) o uno por exportador y cosecha.
     """
-    cursor = conn.cursor()
-    cursor.execute("SELECT tasa_cambio_bch FROM cierre_ny_ice_bch WHERE strftime('%Y-%m-%d', fecha_cierre) = ?", (fecha.isoformat(),))
-    row = cursor.fetchone()
-    if row and row[0] is not None:
-        return float(row[0])
-    else:
-        raise HTTPException(status_code=400, detail=f"No se encontró una tasa de cambio para la fecha {fecha} en la tabla cierre_ny_ice_bch.")
+    if AMBITO_REG_COMPA == "exportador":
+        return ambito_reg_compa(exp_qic, cosecha), semilla_reg_compa(exp_qic, cosecha)
+    return ambito_reg_compa(), semilla_reg_compa()
 
 # --- Endpoints ---
 
 # === 03 - Endpoint para Obtener el Próximo Número de Reporte ===
 @router.get("/proximo_reg_compa", response_model=ProximoRegCompaResponse)
-def obtener_proximo_reg_compa(exp_qic: str = Query(..., description="Código del exportador (exp_qic)")):
+def obtener_proximo_reg_compa(
+    exp_qic: str = Query(..., description="Código del exportador (exp_qic)"),
+    cosecha: Optional[str] = Query(None, description="Cosecha (solo para numeración por exportador)"),
+    conn: sqlite3.Connection = Depends(get_conexion)
+):
     """
     Obtiene el próximo número de reporte (reg_compa) con formato 'NNNN/EXP_QIC'.
-    El número secuencial (NNNN) se incrementa basado en el último registro existente.
+    Es solo una vista previa: el número se asigna de forma atómica al crear el registro.
     """
     try:
-        conn = sqlite3.connect(DB_NAME)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT MAX(CAST(registro AS INTEGER)) as max_registro FROM registro_compras_nacionales")
-        row = cursor.fetchone()
-        ultimo_numero_global = row['max_registro'] if row['max_registro'] is not None else 0
-        proximo_numero_global = ultimo_numero_global + 1
+        ambito, semilla = ambito_numeracion(exp_qic, cosecha)
+        proximo_numero_global = valor_actual(conn, ambito, semilla) + 1
         
         proximo_reg_compa_formateado = f"{proximo_numero_global:04d}/{exp_qic}"
         
-        conn.close()
         return ProximoRegCompaResponse(proximo_reg_compa=proximo_reg_compa_formateado)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener el próximo número de reporte: {str(e)}")
 
+# === Endpoint para Reservar un Rango de Números (importaciones masivas) ===
+@router.post("/reservar_numeros", response_model=ReservaNumerosResponse)
+def reservar_numeros_reg_compa(
+    cantidad: int = Query(..., ge=1, le=10000, description="Cantidad de números a reservar"),
+    exp_qic: str = Query(..., description="Código del exportador (exp_qic)"),
+    cosecha: Optional[str] = Query(None, description="Cosecha (solo para numeración por exportador)")
+):
+    """
+    Reserva de una sola vez un bloque de números consecutivos para una importación masiva.
+    Los números reservados ya no se asignan a ningún otro registro.
+    """
+    try:
+        ambito, semilla = ambito_numeracion(exp_qic, cosecha)
+        rango = escritor.ejecutar(lambda conn: reservar_rango(conn, ambito, cantidad, semilla))
+        return ReservaNumerosResponse(desde=rango.start, hasta=rango.stop - 1)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al reservar números de reporte: {str(e)}")
+
 # === 06 - Endpoint para Cargar Datos por Fecha y Exportador ===
 @router.get("/por_fecha", response_model=List[RegistroCompra])
 def obtener_registros_por_fecha(
     fecha: date = Query(..., description="Fecha del reporte"),
-    exp_qic: str = Query(..., description="Código del exportador (exp_qic)")
+    exp_qic: str = Query(..., description="Código del exportador (exp_qic)"),
+    conn: sqlite3.Connection = Depends(get_conexion)
 ):
     """
     Obtiene los registros (Lavado y Corriente) para una fecha y exportador específicos.
     """
     try:
-        conn = sqlite3.connect(DB_NAME)
-        conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -124,7 +158,6 @@ def obtener_registros_por_fecha(
         """, (fecha.isoformat(), exp_qic))
         
         rows = cursor.fetchall()
-        conn.close()
         
         if not rows:
             raise HTTPException(status_code=404, detail="No se encontraron registros para la fecha y exportador proporcionados.")
@@ -137,20 +170,21 @@ def obtener_registros_por_fecha(
 
 # === 08 - Endpoint para Calcular Detalle de Pago ===
 @router.post("/calcular_detalle_pago", response_model=DetallePagoResponse)
-def calcular_detalle_pago(registro_frontend: RegistroCompraFrontendCreate):
+def calcular_detalle_pago(
+    registro_frontend: RegistroCompraFrontendCreate,
+    politica_tasa: str = Query("anterior", description=f"Política de tasa: {', '.join(POLITICAS)}"),
+    conn: sqlite3.Connection = Depends(get_conexion)
+):
     """
     Calcula el detalle de pago basado en el total de sacos y la tasa de cambio para la fecha.
     Formula: (sacos46l + sacos46c) * 10.50 * tasa_cambio_usd_hnl
     """
     try:
-        conn = sqlite3.connect(DB_NAME)
-        conn.row_factory = sqlite3.Row
         
         total_sacos = registro_frontend.sacos46l + registro_frontend.sacos46c
-        tasa_cambio = obtener_tasa_cambio(registro_frontend.fecha, conn)
+        tasa_cambio = obtener_tasa_cambio(registro_frontend.fecha, conn, politica_tasa)
         detalle_pago = total_sacos * 10.50 * tasa_cambio
         
-        conn.close()
         return DetallePagoResponse(
             total_sacos=total_sacos,
             tasa_cambio_usd_hnl=tasa_cambio,
@@ -163,94 +197,83 @@ def calcular_detalle_pago(registro_frontend: RegistroCompraFrontendCreate):
 
 # === 05 - Endpoint POST Modificado para Manejar Datos del Frontend y Tasa de Cambio ===
 @router.post("/", response_model=dict, status_code=status.HTTP_201_CREATED)
-def crear_registro_compra_agrupado(registro_frontend: RegistroCompraFrontendCreate):
+def crear_registro_compra_agrupado(
+    registro_frontend: RegistroCompraFrontendCreate,
+    politica_tasa: str = Query("anterior", description=f"Política de tasa: {', '.join(POLITICAS)}"),
+    conn: sqlite3.Connection = Depends(get_conexion)
+):
     """
     Crea registros resumidos de compra nacional para Lavado y/o Corriente desde datos agrupados del frontend.
     Calcula 'este_registro_sacos' y genera 'reg_compa' y 'registro' automáticamente.
     Valida la existencia de la tasa de cambio antes de guardar.
     """
     try:
-        conn = sqlite3.connect(DB_NAME)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-
         # --- Validación de Tasa de Cambio (antes de insertar) ---
         try:
-            tasa_cambio = obtener_tasa_cambio(registro_frontend.fecha, conn)
+            tasa_cambio = obtener_tasa_cambio(registro_frontend.fecha, conn, politica_tasa)
         except HTTPException:
             raise # Relanzar el error de tasa de cambio
 
-        # --- 1. Generar reg_compa ---
-        cursor.execute("SELECT MAX(CAST(registro AS INTEGER)) as max_registro FROM registro_compras_nacionales")
-        row = cursor.fetchone()
-        ultimo_numero_global = row['max_registro'] if row['max_registro'] is not None else 0
-        proximo_numero_global = ultimo_numero_global + 1
-        reg_compa = f"{proximo_numero_global:04d}/{registro_frontend.exp_qic}"
-        registro_numero = str(proximo_numero_global)
+        # Sin Lavado ni Corriente no se pide número: un rechazo no debe consumir (ni dejar
+        # un hueco en) la secuencia reg_compa
+        hay_lavado = registro_frontend.sacos46l > 0 or registro_frontend.valorlemp > 0
+        hay_corriente = registro_frontend.sacos46c > 0 or registro_frontend.valorelemp > 0
+        if not (hay_lavado or hay_corriente):
+            raise HTTPException(status_code=400, detail="No se proporcionaron datos válidos para Lavado o Corriente.")
 
-        # --- 2. Preparar datos comunes ---
-        datos_comunes = {
-            "reg_compa": reg_compa,
-            "registro": registro_numero,
-            "exp_qic": registro_frontend.exp_qic,
-            "cosecha": registro_frontend.cosecha,
-            "fecha": registro_frontend.fecha,
-            "sede": registro_frontend.sede,
-            "nuevo_acumulado_sacos": registro_frontend.nuevo_acumulado_sacos,
-            "observaciones": registro_frontend.observaciones,
-        }
+        # --- 1 a 3: numeración e inserciones en el hilo escritor único ---
+        def _guardar(conn: sqlite3.Connection):
+            # --- 1. Generar reg_compa (secuencia atómica, O(1)) ---
+            ambito, semilla = ambito_numeracion(registro_frontend.exp_qic, registro_frontend.cosecha)
+            proximo_numero_global = siguiente_numero(conn, ambito, semilla)
+            reg_compa = f"{proximo_numero_global:04d}/{registro_frontend.exp_qic}"
+            registro_numero = str(proximo_numero_global)
 
-        # --- 3. Insertar registros individuales ---
-        registros_creados = []
-        if registro_frontend.sacos46l > 0 or registro_frontend.valorlemp > 0:
-            datos_lavado = {
-                **datos_comunes,
-                "sacos46l": registro_frontend.sacos46l,
-                "valorlemp": registro_frontend.valorlemp,
-                "sacos46c": 0.0,
-                "valorelemp": 0.0,
-                "clase": "Lavado",
-                "este_registro_sacos": registro_frontend.sacos46l
+            # --- 2. Preparar datos comunes ---
+            datos_comunes = {
+                "reg_compa": reg_compa,
+                "registro": registro_numero,
+                "exp_qic": registro_frontend.exp_qic,
+                "cosecha": registro_frontend.cosecha,
+                "fecha": registro_frontend.fecha,
+                "sede": registro_frontend.sede,
+                "nuevo_acumulado_sacos": registro_frontend.nuevo_acumulado_sacos,
+                "observaciones": registro_frontend.observaciones,
             }
-            campos = list(datos_lavado.keys())
-            valores = tuple(datos_lavado.values())
-            placeholders = ', '.join(['?' for _ in campos])
-            campos_str = ', '.join(campos)
-            sql = f"INSERT INTO registro_compras_nacionales ({campos_str}) VALUES ({placeholders})"
-            cursor.execute(sql, valores)
-            id_nuevo_lavado = cursor.lastrowid
-            cursor.execute("SELECT * FROM registro_compras_nacionales WHERE id_registro = ?", (id_nuevo_lavado,))
-            nuevo_registro_lavado_row = cursor.fetchone()
-            if nuevo_registro_lavado_row:
-                registros_creados.append(dict(nuevo_registro_lavado_row))
 
-        if registro_frontend.sacos46c > 0 or registro_frontend.valorelemp > 0:
-            datos_corriente = {
-                **datos_comunes,
-                "sacos46l": 0.0,
-                "valorlemp": 0.0,
-                "sacos46c": registro_frontend.sacos46c,
-                "valorelemp": registro_frontend.valorelemp,
-                "clase": "Corriente",
-                "este_registro_sacos": registro_frontend.sacos46c
-            }
-            campos = list(datos_corriente.keys())
-            valores = tuple(datos_corriente.values())
-            placeholders = ', '.join(['?' for _ in campos])
-            campos_str = ', '.join(campos)
-            sql = f"INSERT INTO registro_compras_nacionales ({campos_str}) VALUES ({placeholders})"
-            cursor.execute(sql, valores)
-            id_nuevo_corriente = cursor.lastrowid
-            cursor.execute("SELECT * FROM registro_compras_nacionales WHERE id_registro = ?", (id_nuevo_corriente,))
-            nuevo_registro_corriente_row = cursor.fetchone()
-            if nuevo_registro_corriente_row:
-                 registros_creados.append(dict(nuevo_registro_corriente_row))
+            # --- 3. Insertar registros individuales ---
+            registros_creados = []
+            if hay_lavado:
+                datos_lavado = {
+                    **datos_comunes,
+                    "sacos46l": registro_frontend.sacos46l,
+                    "valorlemp": registro_frontend.valorlemp,
+                    "sacos46c": 0.0,
+                    "valorelemp": 0.0,
+                    "clase": "Lavado",
+                }
+                nuevo_registro_lavado = insertar_retornando(conn, "registro_compras_nacionales", datos_lavado)
+                if nuevo_registro_lavado:
+                    registros_creados.append(nuevo_registro_lavado)
 
-        conn.commit()
-        conn.close()
+            if hay_corriente:
+                datos_corriente = {
+                    **datos_comunes,
+                    "sacos46l": 0.0,
+                    "valorlemp": 0.0,
+                    "sacos46c": registro_frontend.sacos46c,
+                    "valorelemp": registro_frontend.valorelemp,
+                    "clase": "Corriente"
+                }
+                nuevo_registro_corriente = insertar_retornando(conn, "registro_compras_nacionales", datos_corriente)
+                if nuevo_registro_corriente:
+                    registros_creados.append(nuevo_registro_corriente)
+            if not registros_creados:
+                # Dentro del trabajo: el SAVEPOINT deshace también el número reservado
+                raise HTTPException(status_code=400, detail="No se proporcionaron datos válidos para Lavado o Corriente.")
+            return reg_compa, registros_creados
 
-        if not registros_creados:
-             raise HTTPException(status_code=400, detail="No se proporcionaron datos válidos para Lavado o Corriente.")
+        reg_compa, registros_creados = escritor.ejecutar(_guardar)
 
         # Calcular el detalle de pago para la respuesta
         total_sacos = registro_frontend.sacos46l + registro_frontend.sacos46c
@@ -270,19 +293,15 @@ def crear_registro_compra_agrupado(registro_frontend: RegistroCompraFrontendCrea
     except HTTPException:
         raise
     except Exception as e:
-        conn.rollback()
-        conn.close()
         raise HTTPException(status_code=500, detail=f"Error al crear los registros de compra: {str(e)}")
 
 # --- Endpoint GET (Listar) existente ---
 @router.get("/", response_model=List[RegistroCompra])
-def listar_registros_compras(skip: int = 0, limit: int = 100):
+def listar_registros_compras(skip: int = 0, limit: int = 100, conn: sqlite3.Connection = Depends(get_conexion)):
     """
     Lista los registros resumidos de compras nacionales.
     """
     try:
-        conn = sqlite3.connect(DB_NAME)
-        conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         cursor.execute("""
             SELECT * FROM registro_compras_nacionales
@@ -290,27 +309,23 @@ def listar_registros_compras(skip: int = 0, limit: int = 100):
             LIMIT ? OFFSET ?
         """, (limit, skip))
         rows = cursor.fetchall()
-        conn.close()
         return [RegistroCompra(**dict(row)) for row in rows]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al listar registros de compras: {str(e)}")
 
 # --- Endpoint GET (Detalle) existente ---
 @router.get("/{id_registro}", response_model=RegistroCompra)
-def obtener_detalle_registro_compra(id_registro: int):
+def obtener_detalle_registro_compra(id_registro: int, conn: sqlite3.Connection = Depends(get_conexion)):
     """
     Obtiene el detalle de un registro resumido de compra nacional específico.
     """
     try:
-        conn = sqlite3.connect(DB_NAME)
-        conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         cursor.execute("""
             SELECT * FROM registro_compras_nacionales
             WHERE id_registro = ?
         """, (id_registro,))
         row = cursor.fetchone()
-        conn.close()
         if row:
             return RegistroCompra(**dict(row))
         else:
@@ -0,0 +1,42 @@
+# ==test_actividad.py #055
+# Búfer de ultimo_login / ultima_actividad: coalescencia por usuario y volcado por lotes.
+from auth.seguridad import hash_password
+from base_datos.conexion import obtener_conexion
+from usuarios.actividad import BufferActividad, actividad_usuarios
+from usuarios.crud import crear_usuario, obtener_usuario_por_email
+
+
+def _marcas(id_usuario):
+    with obtener_conexion() as conn:
+        return tuple(conn.execute(
+            "SELECT ultimo_login, ultima_actividad FROM usuarios WHERE id_usuario = ?", (id_usuario,)
+        ).fetchone())
+
+
+def test_eventos_se_agrupan_en_un_volcado(cliente):
+    assert crear_usuario("Actividad", "actividad@exportadora.hn", "$2b$12$" + "x" * 53, 2, 1)
+    id_usuario = obtener_usuario_por_email("actividad@exportadora.hn").id_usuario
+    buffer = BufferActividad(intervalo=3600)
+    for _ in range(100):
+        buffer.registrar_actividad(id_usuario)
+    buffer.registrar_actividad(10**9)  # Usuario inexistente: no falla el lote
+    assert _marcas(id_usuario) == (None, None)  # Nada se escribe hasta el volcado
+
+    assert buffer.volcar() == 1
+    ultimo_login, ultima_actividad = _marcas(id_usuario)
+    assert ultimo_login is None and len(ultima_actividad) == 19
+    assert buffer.volcar() == 0  # Nada pendiente
+    estadisticas = buffer.estadisticas()
+    assert (estadisticas["eventos"], estadisticas["volcados"], estadisticas["pendientes"]) == (101, 1, 0)
+    buffer.detener()
+
+
+def test_login_registra_ultimo_login(cliente):
+    assert crear_usuario("Último Login", "ultimo.login@exportadora.hn", hash_password("clave-segura"), 2, 1)
+    id_usuario = obtener_usuario_por_email("ultimo.login@exportadora.hn").id_usuario
+    respuesta = cliente.post("/login/", json={"email": "ultimo.login@exportadora.hn", "contraseña": "clave-segura"})
+    assert respuesta.status_code == 200
+
+    actividad_usuarios.volcar()
+    ultimo_login, ultima_actividad = _marcas(id_usuario)
+    assert ultimo_login is not None and ultima_actividad == ultimo_login
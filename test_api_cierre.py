@@ -17,16 +17,18 @@ datos_cierre = {
     "tasa_cambio_bch": 24.5600,
     "precio_usd_saco": 152.00, # Este campo se mantiene por ahora
     # --- Precios de Posiciones ICE ---
-    "precio_posicion_dic24": 148.50,
-    "precio_posicion_mar25": 150.25,
-    "precio_posicion_may25": 151.00,
-    "precio_posicion_jul25": 151.75,
-    "precio_posicion_sep25": 152.50,
-    "precio_posicion_dic25": 153.25,
-    "precio_posicion_mar26": 154.00,
-    "precio_posicion_may26": 154.75,
-    "precio_posicion_jul26": 155.50,
-    "precio_posicion_sep26": 156.25,
+    "posiciones": {
+        "2024-12": 148.50,
+        "2025-03": 150.25,
+        "2025-05": 151.00,
+        "2025-07": 151.75,
+        "2025-09": 152.50,
+        "2025-12": 153.25,
+        "2026-03": 154.00,
+        "2026-05": 154.75,
+        "2026-07": 155.50,
+        "2026-09": 156.25,
+    },
     # --- Fuentes (opcionales, se llenan por defecto) ---
     "fuente_precio": "ICE Futures",
     "fuente_tasa": "Banco Central de Honduras"
@@ -44,8 +46,8 @@ try:
         print(f"     Tasa BCH: {datos_respuesta.get('tasa_cambio_bch')}")
         print(f"     Precio Principal: {datos_respuesta.get('precio_usd_saco')}")
         # Mostrar un par de precios de posición como ejemplo
-        print(f"     Precio DIC24: {datos_respuesta.get('precio_posicion_dic24')}")
-        print(f"     Precio MAR25: {datos_respuesta.get('precio_posicion_mar25')}")
+        print(f"     Precio DIC24: {datos_respuesta.get('posiciones', {}).get('2024-12')}")
+        print(f"     Precio MAR25: {datos_respuesta.get('posiciones', {}).get('2025-03')}")
         print(f"     Fuente Precio: {datos_respuesta.get('fuente_precio')}")
         print(f"     Fuente Tasa: {datos_respuesta.get('fuente_tasa')}")
     else:
@@ -67,8 +69,8 @@ try:
         print(f"     Tasa BCH: {datos_respuesta.get('tasa_cambio_bch')}")
         print(f"     Precio Principal: {datos_respuesta.get('precio_usd_saco')}")
         # Mostrar un par de precios de posición como ejemplo
-        print(f"     Precio DIC24: {datos_respuesta.get('precio_posicion_dic24')}")
-        print(f"     Precio MAR25: {datos_respuesta.get('precio_posicion_mar25')}")
+        print(f"     Precio DIC24: {datos_respuesta.get('posiciones', {}).get('2024-12')}")
+        print(f"     Precio MAR25: {datos_respuesta.get('posiciones', {}).get('2025-03')}")
         print(f"     Fuente Precio: {datos_respuesta.get('fuente_precio')}")
         print(f"     Fuente Tasa: {datos_respuesta.get('fuente_tasa')}")
         print(f"     Fecha Registro: {datos_respuesta.get('fecha_registro')}")
@@ -94,8 +96,8 @@ try:
         print(f"     Tasa BCH: {datos_respuesta.get('tasa_cambio_bch')}")
         print(f"     Precio Principal: {datos_respuesta.get('precio_usd_saco')}")
         # Mostrar un par de precios de posición como ejemplo
-        print(f"     Precio DIC24: {datos_respuesta.get('precio_posicion_dic24')}")
-        print(f"     Precio MAR25: {datos_respuesta.get('precio_posicion_mar25')}")
+        print(f"     Precio DIC24: {datos_respuesta.get('posiciones', {}).get('2024-12')}")
+        print(f"     Precio MAR25: {datos_respuesta.get('posiciones', {}).get('2025-03')}")
         print(f"     Fuente Precio: {datos_respuesta.get('fuente_precio')}")
         print(f"     Fuente Tasa: {datos_respuesta.get('fuente_tasa')}")
         print(f"     Fecha Registro: {datos_respuesta.get('fecha_registro')}")
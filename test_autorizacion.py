@@ -0,0 +1,75 @@
+# ==test_autorizacion.py #045
+# Autorización por claims del JWT (require_role) y revocación por contador de versión.
+import inspect
+import time
+
+import pytest
+
+from auth.revocacion import RegistroRevocaciones, revocaciones
+from auth.seguridad import hash_password, require_role
+from usuarios.crud import crear_usuario, obtener_usuario_por_email
+
+
+def _usuario(email: str, id_rol: int) -> int:
+    assert crear_usuario("Prueba Autorización", email, hash_password("clave-segura"), id_rol, 1)
+    return obtener_usuario_por_email(email).id_usuario
+
+
+def _login(cliente, email: str):
+    return cliente.post("/login/", json={"email": email, "contraseña": "clave-segura"})
+
+
+@pytest.fixture(scope="module")
+def admin(cliente):
+    _usuario("admin.autorizacion@ihcafe.hn", 1)
+    token = _login(cliente, "admin.autorizacion@ihcafe.hn").json()["token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_autoriza_solo_con_claims(cliente, admin, monkeypatch):
+    # Sin revisión de revocaciones pendiente, la petición no toca la base
+    def sin_base():
+        raise AssertionError("La autorización consultó la base de datos")
+
+    monkeypatch.setattr("auth.revocacion.obtener_conexion", sin_base)
+    monkeypatch.setattr(revocaciones, "_ultima_revision", time.monotonic() + 60)
+    assert cliente.get("/admin/solicitudes/pendientes", headers=admin).status_code == 200
+
+
+def test_rol_insuficiente_y_token_invalido(cliente):
+    _usuario("editor.autorizacion@exportadora.hn", 2)
+    token = _login(cliente, "editor.autorizacion@exportadora.hn").json()["token"]
+    assert cliente.get("/admin/solicitudes/pendientes", headers={"Authorization": f"Bearer {token}"}).status_code == 403
+    assert cliente.get("/admin/solicitudes/pendientes", headers={"Authorization": "Bearer x.y.z"}).status_code == 401
+    with pytest.raises(ValueError):
+        require_role("superusuario")
+
+
+def test_desactivar_revoca_tokens_al_instante(cliente, admin):
+    id_usuario = _usuario("desactivado.autorizacion@ihcafe.hn", 1)
+    token = {"Authorization": f"Bearer {_login(cliente, 'desactivado.autorizacion@ihcafe.hn').json()['token']}"}
+    assert cliente.get("/admin/solicitudes/pendientes", headers=token).status_code == 200
+
+    # Otro proceso (su propio registro en memoria) se entera por el contador de versión
+    otro_proceso = RegistroRevocaciones(intervalo=0)
+    assert otro_proceso.token_vigente(id_usuario, time.time())
+
+    assert cliente.post(f"/admin/usuarios/{id_usuario}/desactivar", headers=admin).status_code == 200
+    assert cliente.get("/admin/solicitudes/pendientes", headers=token).status_code == 401
+    assert not otro_proceso.token_vigente(id_usuario, time.time() - 5)
+    assert _login(cliente, "desactivado.autorizacion@ihcafe.hn").status_code == 403
+
+
+def test_dependencias_no_bloquean_el_event_loop():
+    # validar() puede recargar tokens_revocados desde SQLite: debe correr en el threadpool
+    for dependencia in (require_role("admin_ihcafe"), require_role("admin_ihcafe", token_en_query=True)):
+        assert not inspect.iscoroutinefunction(dependencia)
+
+
+def test_token_emitido_justo_despues_de_reactivar_vale(cliente, admin):
+    id_usuario = _usuario("reactivado.autorizacion@ihcafe.hn", 1)
+    assert cliente.post(f"/admin/usuarios/{id_usuario}/desactivar", headers=admin).status_code == 200
+    assert cliente.post(f"/admin/usuarios/{id_usuario}/activar", headers=admin).status_code == 200
+    time.sleep(0.002)  # Resolución de iat: milisegundos
+    token = _login(cliente, "reactivado.autorizacion@ihcafe.hn").json()["token"]
+    assert cliente.get("/admin/solicitudes/pendientes", headers={"Authorization": f"Bearer {token}"}).status_code == 200
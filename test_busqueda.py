@@ -0,0 +1,61 @@
+# ==test_busqueda.py #065
+# /admin/solicitudes/buscar: índice FTS5 sincronizado por triggers, relevancia y paginación.
+from admin.busqueda import consulta_fts, fragmento
+from base_datos.escritor import escritor
+from usuarios.entidades import resolver_entidad
+
+
+def _buscar(cliente, cabeceras, **params):
+    return cliente.get("/admin/solicitudes/buscar", headers=cabeceras, params=params)
+
+
+def test_consulta_segura_y_fragmento():
+    assert consulta_fts('juan@expo "OR" *') == '"juan"* AND "expo"* AND "OR"*'
+    assert consulta_fts(" ¿? ") is None
+    assert fragmento([None, "Beneficio Marcala Café"], ["cafe"]) == "Beneficio Marcala [Café]"
+
+
+def test_busqueda_por_organizacion_email_y_clave(cliente, cabeceras_admin):
+    for i, organizacion in enumerate(["Beneficio Santa Bárbara", "Cooperativa Santa Rosa", "Exportadora Olancho"]):
+        assert cliente.post("/registro/solicitar_acceso", json={
+            "nombre_completo": f"Búsqueda {i}", "email_corporativo": f"busqueda{i}@ventas.hn",
+            "nombre_exportadora": organizacion, "clave_exportador": f"BQ-{i}77",
+        }).status_code == 201
+
+    resultado = _buscar(cliente, cabeceras_admin, q="santa barbara").json()  # Sin tildes ni mayúsculas
+    assert [s["nombre_organizacion"] for s in resultado["solicitudes"]] == ["Beneficio Santa Bárbara"]
+    assert "[Bárbara]" in resultado["solicitudes"][0]["fragmento"]
+    assert _buscar(cliente, cabeceras_admin, q="busqueda2@ventas").json()["solicitudes"][0]["email"] == "busqueda2@ventas.hn"
+    assert _buscar(cliente, cabeceras_admin, q="BQ-177").json()["solicitudes"][0]["clave_exportador"] == "BQ-177"
+
+    # Paginación por cursor: sin repetidos, en orden de relevancia
+    primera = _buscar(cliente, cabeceras_admin, q="santa", limite=1).json()
+    segunda = _buscar(cliente, cabeceras_admin, q="santa", limite=1, cursor=primera["siguiente"]).json()
+    ids = [s["id_solicitud"] for s in primera["solicitudes"] + segunda["solicitudes"]]
+    assert len(set(ids)) == 2 and segunda["siguiente"] is None
+    assert primera["solicitudes"][0]["puntaje"] <= segunda["solicitudes"][0]["puntaje"]
+
+
+def test_triggers_mantienen_el_indice(cliente, cabeceras_admin):
+    assert cliente.post("/registro/solicitar_acceso", json={
+        "nombre_completo": "Trigger", "email_corporativo": "trigger@ventas.hn",
+        "nombre_exportadora": "Finca Quetzal", "clave_exportador": "TQ1",
+    }).status_code == 201
+    id_solicitud = _buscar(cliente, cabeceras_admin, q="quetzal").json()["solicitudes"][0]["id_solicitud"]
+
+    assert cliente.post(f"/admin/solicitudes/{id_solicitud}/rechazar", headers=cabeceras_admin,
+                        json={"motivo": "Documentación incompleta"}).status_code == 200
+    rechazada = _buscar(cliente, cabeceras_admin, q="documentacion", estado="RECHAZADA").json()["solicitudes"]
+    assert [s["id_solicitud"] for s in rechazada] == [id_solicitud]
+    assert _buscar(cliente, cabeceras_admin, q="quetzal", estado="PENDIENTE").json()["solicitudes"] == []
+
+    escritor.ejecutar_sql("DELETE FROM solicitudes_registro WHERE id_solicitud = ?", (id_solicitud,))
+    assert _buscar(cliente, cabeceras_admin, q="quetzal").json()["solicitudes"] == []
+
+
+def test_entidades_y_errores(cliente, cabeceras_admin):
+    escritor.ejecutar(lambda conn: resolver_entidad(conn, "Torrefactora Lenca"))
+    assert [e["nombre"] for e in _buscar(cliente, cabeceras_admin, q="lenca").json()["entidades"]] == ["Torrefactora Lenca"]
+    assert _buscar(cliente, cabeceras_admin, q="???").status_code == 400
+    assert _buscar(cliente, cabeceras_admin, q="x", estado="OTRO").status_code == 400
+    assert _buscar(cliente, cabeceras_admin, q="x", cursor="roto").status_code == 400
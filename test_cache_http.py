@@ -0,0 +1,61 @@
+# ==test_cache_http.py #042
+# ETag / Last-Modified / 304 y Cache-Control en /cierre_ny_bch/ultimo y /por_fecha.
+from datetime import date, timedelta
+
+from modulo_cierre import cache_http
+
+
+def test_fecha_historica_cacheable_y_304(cliente):
+    fecha = "2020-02-03"
+    cliente.post("/cierre_ny_bch/", json={"fecha": fecha, "tasa_cambio_bch": 24.6})
+    respuesta = cliente.get(f"/cierre_ny_bch/por_fecha/{fecha}")
+    assert respuesta.status_code == 200
+    assert respuesta.headers["cache-control"] == cache_http.CACHE_HISTORICO
+    assert "immutable" not in respuesta.headers["cache-control"]  # Se puede corregir: debe revalidarse
+    etag, modificado = respuesta.headers["etag"], respuesta.headers["last-modified"]
+
+    revalidacion = cliente.get(f"/cierre_ny_bch/por_fecha/{fecha}", headers={"If-None-Match": etag})
+    assert revalidacion.status_code == 304 and revalidacion.content == b""
+    assert revalidacion.headers["etag"] == etag
+    por_fecha_mod = cliente.get(f"/cierre_ny_bch/por_fecha/{fecha}", headers={"If-Modified-Since": modificado})
+    assert por_fecha_mod.status_code == 304
+    # Un ETag distinto recibe el cuerpo completo
+    assert cliente.get(f"/cierre_ny_bch/por_fecha/{fecha}", headers={"If-None-Match": '"0-x"'}).status_code == 200
+
+    # Corrección de la fecha histórica: la revalidación con el ETag viejo recibe el cierre nuevo
+    cliente.post("/cierre_ny_bch/", json={"fecha": fecha, "tasa_cambio_bch": 24.9})
+    corregido = cliente.get(f"/cierre_ny_bch/por_fecha/{fecha}", headers={"If-None-Match": etag})
+    assert corregido.status_code == 200 and corregido.json()["tasa_cambio_bch"] == 24.9
+
+
+def test_ultimo_se_revalida_y_cambia_con_cada_upsert(cliente):
+    fecha = (date.today() + timedelta(days=3650)).isoformat()  # Siempre el más reciente
+    cliente.post("/cierre_ny_bch/", json={"fecha": fecha, "tasa_cambio_bch": 30.0})
+    primera = cliente.get("/cierre_ny_bch/ultimo")
+    assert primera.headers["cache-control"] == cache_http.CACHE_REVALIDAR
+    etag = primera.headers["etag"]
+    assert cliente.get("/cierre_ny_bch/ultimo", headers={"If-None-Match": etag}).status_code == 304
+
+    # Corrección inmediata (mismo segundo): el ETag viejo ya no sirve
+    cliente.post("/cierre_ny_bch/", json={"fecha": fecha, "tasa_cambio_bch": 30.5})
+    nueva = cliente.get("/cierre_ny_bch/ultimo", headers={"If-None-Match": etag})
+    assert nueva.status_code == 200
+    assert nueva.json()["tasa_cambio_bch"] == 30.5
+    assert nueva.headers["etag"] != etag
+
+
+def test_304_por_version_no_consulta(cliente, monkeypatch):
+    etag = cliente.get("/cierre_ny_bch/ultimo").headers["etag"]
+
+    def no_deberia_llamarse():
+        raise AssertionError("Se consultó el historial con la versión sin cambios")
+
+    monkeypatch.setattr("modulo_cierre.api._ultimo_registro", no_deberia_llamarse)
+    assert cliente.get("/cierre_ny_bch/ultimo", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_fecha_sin_cierre_no_se_cachea(cliente):
+    respuesta = cliente.get("/cierre_ny_bch/por_fecha/1999-01-04")
+    assert respuesta.status_code == 200 and respuesta.json() is None
+    assert respuesta.headers["cache-control"] == cache_http.CACHE_REVALIDAR
+    assert "etag" not in respuesta.headers
@@ -0,0 +1,64 @@
+# ==test_cache_usuarios.py #047
+# Caché LRU/TTL de usuarios: aciertos, expiración, desalojo e invalidación.
+from usuarios.cache import CacheUsuarios, cache_usuarios
+from usuarios.crud import crear_usuario, obtener_usuario_por_email, desactivar_usuario
+from usuarios.modelos import Usuario
+
+
+def _usuario(id_usuario: int) -> Usuario:
+    return Usuario(id_usuario, f"Usuario {id_usuario}", f"u{id_usuario}@cafe.hn", "hash", 2)
+
+
+def test_lru_ttl_e_invalidacion():
+    lecturas = []
+
+    def cargar(id_usuario):
+        lecturas.append(id_usuario)
+        return _usuario(id_usuario)
+
+    cache = CacheUsuarios(max_entradas=2, ttl=60)
+    cache.obtener_por_id(1, cargar)
+    cache.obtener_por_id(1, cargar)
+    assert cache.obtener_por_email("u1@cafe.hn", lambda email: None).id_usuario == 1
+    assert lecturas == [1]
+
+    cache.obtener_por_id(2, cargar)
+    cache.obtener_por_id(3, cargar)  # Desaloja al 1 (el menos usado)
+    cache.obtener_por_id(1, cargar)
+    assert lecturas == [1, 2, 3, 1]
+
+    cache.invalidar(email="u1@cafe.hn")
+    cache.obtener_por_id(1, cargar)
+    assert lecturas[-1] == 1 and len(lecturas) == 5
+
+    cache.ttl = -1  # Todo lo que se guarde ya nace vencido
+    cache.invalidar(1)
+    cache.obtener_por_id(1, cargar)
+    cache.obtener_por_id(1, cargar)
+    estadisticas = cache.estadisticas()
+    assert estadisticas["expirados"] == 1 and estadisticas["invalidaciones"] == 2
+
+
+def test_carga_concurrente_con_invalidacion_no_guarda_dato_viejo():
+    cache = CacheUsuarios()
+
+    def cargar_mientras_se_invalida(id_usuario):
+        cache.invalidar(id_usuario)  # Otro hilo confirma un cambio mientras se leía
+        return _usuario(id_usuario)
+
+    cache.obtener_por_id(7, cargar_mientras_se_invalida)
+    assert cache.estadisticas()["entradas"] == 0
+
+
+def test_hooks_de_crud(cliente):
+    assert obtener_usuario_por_email("cache.crud@exportadora.hn") is None
+    assert crear_usuario("Cache CRUD", "cache.crud@exportadora.hn", "x", 2, 1)
+    usuario = obtener_usuario_por_email("cache.crud@exportadora.hn")  # El email se invalidó al crear
+    assert usuario is not None and usuario.activo
+
+    aciertos = cache_usuarios.aciertos
+    obtener_usuario_por_email("cache.crud@exportadora.hn")
+    assert cache_usuarios.aciertos == aciertos + 1
+
+    assert desactivar_usuario(usuario.id_usuario)
+    assert not obtener_usuario_por_email("cache.crud@exportadora.hn").activo
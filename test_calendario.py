@@ -0,0 +1,76 @@
+# ==test_calendario.py #073
+# Calendario KC (primer aviso, rotación, posición activa) y serie continua ajustada hacia atrás.
+from datetime import date
+
+import pytest
+
+from modulo_cierre.calendario import CalendarioKC, SerieContinua, calendario_kc
+from modulo_cierre.historial import HistorialCierres
+
+
+def test_fechas_de_contrato_y_posicion_activa():
+    kch25 = calendario_kc.contrato("2025-03")
+    assert kch25.codigo == "KCH25"
+    assert kch25.primer_aviso == date(2025, 2, 20)
+    assert kch25.ultimo_dia_negociacion == date(2025, 3, 19)
+    assert kch25.fecha_roll == date(2025, 2, 19)
+    assert calendario_kc.activo(date(2025, 2, 18)).contrato == "2025-03"
+    assert calendario_kc.activo(date(2025, 2, 19)).contrato == "2025-05"
+    assert calendario_kc.activo(date(1999, 12, 31)) is None
+    assert [c.contrato for c in calendario_kc.entre(date(2025, 1, 1), date(2025, 12, 31))] == [
+        "2025-03", "2025-05", "2025-07", "2025-09", "2025-12", "2026-03"]
+    # Un feriado dentro de la ventana corre el primer aviso un día hábil
+    con_feriado = CalendarioKC(2025, 2025, feriados=[date(2025, 2, 24)])
+    assert con_feriado.contrato("2025-03").primer_aviso == date(2025, 2, 19)
+
+
+CIERRES = [
+    ("2025-02-17", {"2025-03": 100.0, "2025-05": 104.0}),
+    ("2025-02-18", {"2025-03": 101.0, "2025-05": 105.0}),
+    ("2025-02-19", {"2025-03": 102.0, "2025-05": 107.0}),   # Rotación: diferencial 5
+    ("2025-02-20", {"2025-05": 108.0}),
+]
+
+
+def _registro(id_registro, fecha):
+    return {"id_registro": id_registro, "fecha": fecha, "precio_usd_saco": None, "tasa_cambio_bch": None,
+            "fecha_registro": "2030-01-01 00:00:00"}
+
+
+def test_serie_continua_incremental_y_reconstruida():
+    fuente = HistorialCierres()
+    serie = SerieContinua(fuente=fuente)
+    assert serie.serie() == ([], [], [], [])
+    for i, (fecha, posiciones) in enumerate(CIERRES, start=1):
+        fuente.actualizar(_registro(i, fecha), posiciones)
+        serie.actualizar(date.fromisoformat(fecha), posiciones)
+    assert serie._version == fuente.version  # Todo por append, sin reconstruir
+
+    fechas, contratos, ajustados, crudos = serie.serie()
+    assert contratos == ["2025-03", "2025-03", "2025-05", "2025-05"]
+    assert crudos == [100.0, 101.0, 107.0, 108.0]
+    assert ajustados == pytest.approx([105.0, 106.0, 107.0, 108.0])
+    assert SerieContinua(fuente=fuente).serie() == (fechas, contratos, ajustados, crudos)
+
+    # Corregir una fecha pasada no es un append: la serie se reconstruye al leerla
+    fuente.actualizar(_registro(3, "2025-02-19"), {"2025-03": 102.0, "2025-05": 110.0})
+    serie.actualizar(date(2025, 2, 19), {"2025-03": 102.0, "2025-05": 110.0})
+    assert serie.serie(desde=date(2025, 2, 18))[2] == pytest.approx([109.0, 110.0, 108.0])
+
+
+def test_endpoints_calendario(cliente):
+    respuesta = cliente.post("/cierre_ny_bch/", json={"fecha": "2049-01-05", "posiciones": {"2049-03": 230.0, "2049-05": 232.0}})
+    assert respuesta.status_code == 201
+    assert respuesta.json()["precio_usd_saco"] == 230.0  # Precio de la posición activa
+
+    activo = cliente.get("/cierre_ny_bch/activo/2049-01-05").json()
+    assert activo["activo"]["codigo"] == "KCH49" and activo["siguiente"]["codigo"] == "KCK49"
+    assert cliente.get("/cierre_ny_bch/activo/2060-01-01").status_code == 404
+
+    contratos = cliente.get("/cierre_ny_bch/calendario", params={"desde": "2049-01-01", "hasta": "2049-03-31"}).json()
+    assert [c["contrato"] for c in contratos] == ["2049-03", "2049-05"]
+    assert cliente.get("/cierre_ny_bch/calendario", params={"desde": "2049-02-01", "hasta": "2049-01-01"}).status_code == 400
+
+    continua = cliente.get("/cierre_ny_bch/continua", params={"desde": "2049-01-01", "hasta": "2049-01-31"}).json()
+    assert continua["fechas"] == ["2049-01-05"] and continua["contratos"] == ["2049-03"]
+    assert continua["precios_originales"] == [230.0]
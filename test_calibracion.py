@@ -0,0 +1,45 @@
+# ==test_calibracion.py #053
+# Costo de bcrypt: lectura del costo de un hash, calibración y rehash al iniciar sesión.
+import time
+
+from passlib.hash import bcrypt
+
+from auth.calibracion import calibrar, costo_actual, costo_de_hash, rehash
+
+
+def test_costo_de_hash():
+    assert costo_de_hash("$2b$12$" + "x" * 53) == 12
+    assert costo_de_hash("$2a$04$" + "x" * 53) == 4
+    assert costo_de_hash("pbkdf2-sha256$29000$...") is None
+    assert costo_de_hash("") is None
+
+
+def test_calibrar_elige_el_costo_mas_cercano():
+    resultado = calibrar(objetivo_ms=0.001, costo_min=4, costo_max=6, repeticiones=1)
+    assert resultado.costo == 4 and list(resultado.mediciones) == [4]  # Ya pasó el objetivo: no mide más
+    resultado = calibrar(objetivo_ms=1e6, costo_min=4, costo_max=6, repeticiones=1)
+    assert resultado.costo == 6 and list(resultado.mediciones) == [4, 5, 6]
+
+
+def test_solo_se_recalcula_hacia_arriba():
+    costo = costo_actual()
+    assert rehash.necesita_rehash(f"$2b${costo - 1:02d}$" + "x" * 53)
+    assert not rehash.necesita_rehash(f"$2b${costo:02d}$" + "x" * 53)
+    assert not rehash.necesita_rehash(f"$2b${costo + 1:02d}$" + "x" * 53)  # No se debilita un hash más costoso
+
+
+def test_login_recalcula_hash_con_menor_costo(cliente):
+    from usuarios.crud import crear_usuario, obtener_usuario_por_email
+    email = "rehash@exportadora.hn"
+    assert crear_usuario("Rehash", email, bcrypt.using(rounds=4).hash("clave-vieja"), 2, 1)
+
+    respuesta = cliente.post("/login/", json={"email": email, "contraseña": "clave-vieja"})
+    assert respuesta.status_code == 200  # No espera al rehash
+    limite = time.monotonic() + 10
+    while rehash.pendientes() and time.monotonic() < limite:
+        time.sleep(0.05)
+
+    nuevo_hash = obtener_usuario_por_email(email).contraseña_hash  # La caché se invalidó tras el COMMIT
+    assert costo_de_hash(nuevo_hash) == costo_actual()
+    assert bcrypt.verify("clave-vieja", nuevo_hash)
+    assert rehash.metricas()["completados"] >= 1
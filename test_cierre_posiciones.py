@@ -0,0 +1,43 @@
+# ==test_cierre_posiciones.py #035
+# Posiciones ICE como mapa dinámico {contrato 'YYYY-MM': precio} en /cierre_ny_bch.
+import pytest
+
+from modulo_cierre.posiciones import normalizar_contrato, nombre_legado
+
+
+def test_normalizar_contrato():
+    assert normalizar_contrato("2025-03") == "2025-03"
+    assert normalizar_contrato("DIC24") == "2024-12"
+    assert nombre_legado("2024-12") == "dic24"
+    for invalido in ("2025-13", "xyz25", "marzo"):
+        with pytest.raises(ValueError):
+            normalizar_contrato(invalido)
+
+
+def test_mapa_de_posiciones_ida_y_vuelta(cliente):
+    respuesta = cliente.post("/cierre_ny_bch/", json={
+        "fecha": "2031-01-06",
+        "tasa_cambio_bch": 26.1,
+        "posiciones": {"2031-03": 201.5, "2031-05": 202.0},
+        "precio_posicion_dic30": 199.0,  # Campo viejo: se acepta como posición
+    })
+    assert respuesta.status_code == 201
+    assert respuesta.json()["posiciones"] == {"2030-12": 199.0, "2031-03": 201.5, "2031-05": 202.0}
+
+    # Volver a guardar la fecha reemplaza el mapa completo
+    cliente.post("/cierre_ny_bch/", json={"fecha": "2031-01-06", "posiciones": {"2031-03": 203.0}})
+    cierre = cliente.get("/cierre_ny_bch/por_fecha/2031-01-06").json()
+    assert cierre["posiciones"] == {"2031-03": 203.0}
+
+
+def test_rango_de_contratos(cliente):
+    for dia, precio in (("2032-02-02", 100.0), ("2032-02-03", 101.0)):
+        cliente.post("/cierre_ny_bch/", json={"fecha": dia, "posiciones": {"2032-03": precio, "2032-05": precio + 1, "2032-12": 0.5}})
+    filas = cliente.get("/cierre_ny_bch/posiciones", params={
+        "contrato_desde": "2032-03", "contrato_hasta": "may32", "desde": "2032-02-03",
+    }).json()
+    assert [(f["contrato"], f["fecha"], f["precio"]) for f in filas] == [
+        ("2032-03", "2032-02-03", 101.0), ("2032-05", "2032-02-03", 102.0),
+    ]
+    assert cliente.get("/cierre_ny_bch/posiciones", params={"contrato_desde": "KCZ"}).status_code == 400
+    assert cliente.post("/cierre_ny_bch/", json={"fecha": "2032-02-04", "posiciones": {"13-2032": 1}}).status_code == 422
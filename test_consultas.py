@@ -0,0 +1,38 @@
+# ==test_consultas.py #030
+# Pruebas del helper INSERT ... RETURNING (base_datos/consultas.py), con y sin soporte nativo.
+import sqlite3
+
+import pytest
+
+import base_datos.consultas as consultas
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("""
+        CREATE TABLE cierres (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fecha TEXT UNIQUE NOT NULL,
+            precio REAL,
+            doble REAL GENERATED ALWAYS AS (precio * 2) STORED,
+            version INTEGER DEFAULT 1
+        )
+    """)
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize("soporta_returning", [True, False])
+def test_insertar_y_upsert_devuelven_fila_final(conn, monkeypatch, soporta_returning):
+    monkeypatch.setattr(consultas, "SOPORTA_RETURNING", soporta_returning)
+
+    fila = consultas.insertar_retornando(conn, "cierres", {"fecha": "2025-01-02", "precio": 10.0})
+    assert fila == {"id": 1, "fecha": "2025-01-02", "precio": 10.0, "doble": 20.0, "version": 1}
+
+    fila = consultas.insertar_retornando(
+        conn, "cierres", {"fecha": "2025-01-02", "precio": 12.5},
+        clave_conflicto="fecha", set_extra=["version = version + 1"],
+    )
+    assert fila == {"id": 1, "fecha": "2025-01-02", "precio": 12.5, "doble": 25.0, "version": 2}
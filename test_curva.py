@@ -0,0 +1,53 @@
+# ==test_curva.py #071
+# Curva forward ICE: interpolación por mes de embarque, caché por fecha y endpoints.
+from datetime import date
+
+import pytest
+
+from modulo_cierre.curva import CacheCurvas, CurvaForward, indice_mes, mes_de_indice
+
+POSICIONES = {"2048-03": 200.0, "2048-05": 210.0, "2048-09": 190.0}
+
+
+def test_interpolacion_y_extremos():
+    curva = CurvaForward.desde_posiciones(date(2048, 1, 2), POSICIONES)
+    assert mes_de_indice(indice_mes("2048-12")) == "2048-12"
+    assert curva.precio("2048-04") == pytest.approx(205.0)
+    assert curva.precio("2048-07") == pytest.approx(200.0)
+    assert curva.precio("2048-05") == 210.0
+    assert curva.precio("2048-01") == 200.0      # Antes de la primera posición: el nearby
+    assert curva.precio("2048-10") is None       # Después de la última: sin precio
+    assert curva.mensual() == pytest.approx([200.0, 205.0, 210.0, 205.0, 200.0, 195.0, 190.0])
+    # Una pasada con meses ordenados da lo mismo que mes por mes
+    meses = list(range(indice_mes("2047-11"), indice_mes("2048-12")))
+    assert curva.precios_para(meses) == [curva.precios_para([m])[0] for m in meses]
+    assert CurvaForward.desde_posiciones(date(2048, 1, 2), {}).precios_para([1, 2]) == [None, None]
+
+
+def test_endpoints_curva(cliente):
+    assert cliente.post("/cierre_ny_bch/", json={"fecha": "2048-01-02", "posiciones": POSICIONES}).status_code == 201
+    assert cliente.post("/cierre_ny_bch/", json={"fecha": "2048-01-03", "posiciones": {"2048-03": 220.0}}).status_code == 201
+
+    curva = cliente.get("/cierre_ny_bch/curva/2048-01-02").json()
+    assert curva["contratos"] == ["2048-03", "2048-05", "2048-09"]
+    assert curva["meses"][0] == "2048-03" and curva["meses"][-1] == "2048-09"
+    assert curva["precios_mensuales"][1] == pytest.approx(205.0)
+    assert cliente.get("/cierre_ny_bch/curva/2048-01-04").status_code == 404
+
+    precios = cliente.post("/cierre_ny_bch/curva/precios", json={
+        "fechas": ["2048-01-02", "2048-01-03", "2048-01-04"], "meses": ["abr48", "2048-10", "2048-04"],
+    }).json()
+    assert precios["meses"] == ["2048-04", "2048-10", "2048-04"]
+    assert precios["precios"] == [[pytest.approx(205.0), None, pytest.approx(205.0)], [None, None, None], [None, None, None]]
+    assert cliente.post("/cierre_ny_bch/curva/precios", json={"fechas": ["2048-01-02"], "meses": ["2048-13"]}).status_code == 422
+
+    # Corregir un cierre invalida las curvas guardadas
+    assert cliente.post("/cierre_ny_bch/", json={"fecha": "2048-01-02", "posiciones": {"2048-03": 199.0}}).status_code == 201
+    assert cliente.get("/cierre_ny_bch/curva/2048-01-02").json()["contratos"] == ["2048-03"]
+
+
+def test_cache_reutiliza_curvas(cliente):
+    cache = CacheCurvas()
+    cache.obtener([date(2048, 1, 2), date(2048, 1, 4)])
+    cache.obtener([date(2048, 1, 2), date(2048, 1, 4)])
+    assert cache.estadisticas() == {"curvas": 2, "aciertos": 2, "fallos": 2}
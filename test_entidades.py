@@ -0,0 +1,59 @@
+# ==test_entidades.py #061
+# Entidades por nombre normalizado: normalización, migración de duplicados y creación sin carreras.
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from base_datos.escritor import escritor
+from base_datos.migraciones import _normalizar_nombre_m009, aplicar_migraciones, version_esperada
+from usuarios.entidades import cache_entidades, normalizar_nombre, resolver_entidad
+
+
+def test_normalizar_nombre():
+    assert normalizar_nombre("  Café   Honduras S.A. ") == "cafe honduras s.a."
+    assert normalizar_nombre("CAFE HONDURAS S.A.") == normalizar_nombre("café honduras  s.a.")
+    assert normalizar_nombre("Exportadora Ñandú") == "exportadora nandu"
+    # La migración 9 usa una copia congelada: hoy debe coincidir con la de la app
+    for nombre in ("  Café   Honduras S.A. ", "Exportadora Ñandú", "BENEFICIO\tEL  SOL"):
+        assert _normalizar_nombre_m009(nombre) == normalizar_nombre(nombre)
+
+
+def test_migracion_unifica_duplicados(tmp_path):
+    db = str(tmp_path / "entidades.db")
+    aplicar_migraciones(db)
+    # Base como antes de la migración 9, con duplicados que solo difieren en mayúsculas
+    with sqlite3.connect(db) as conn:
+        conn.execute("DROP INDEX idx_entidades_nombre_normalizado")
+        conn.execute("CREATE INDEX idx_entidades_nombre ON entidades (nombre)")  # Creado por la migración 2
+        conn.execute("UPDATE entidades SET nombre_normalizado = NULL")
+        conn.executemany("INSERT INTO entidades (id_entidad, tipo, nombre) VALUES (?, 'EXPORTADOR', ?)",
+                         [(10, "Beneficio El Sol"), (11, "BENEFICIO EL SOL"), (12, "Otra")])
+        conn.execute("INSERT INTO usuarios (nombre_completo, email, contraseña_hash, id_rol, id_entidad) VALUES ('U', 'u@x.hn', 'x', 2, 11)")
+        conn.execute("PRAGMA user_version = 8")
+
+    assert aplicar_migraciones(db) == version_esperada()
+    with sqlite3.connect(db) as conn:
+        assert conn.execute("SELECT id_entidad FROM usuarios WHERE email = 'u@x.hn'").fetchone() == (10,)
+        normalizados = dict(conn.execute("SELECT id_entidad, nombre_normalizado FROM entidades WHERE id_entidad >= 10"))
+        indices = {fila[0] for fila in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert normalizados == {10: "beneficio el sol", 11: None, 12: "otra"}
+    assert "idx_entidades_nombre" not in indices and "idx_entidades_nombre_normalizado" in indices
+
+
+def test_resolucion_concurrente_una_sola_fila(cliente):
+    variantes = ["Exportadora Carrera", "EXPORTADORA CARRERA", "exportadora  carrera", "Exportadora Carréra"]
+    with ThreadPoolExecutor(max_workers=8) as hilos:
+        ids = list(hilos.map(lambda nombre: escritor.ejecutar(lambda conn: resolver_entidad(conn, nombre)), variantes * 5))
+    assert len(set(ids)) == 1
+    assert cache_entidades.obtener("exportadora carrera") == ids[0]  # Guardado tras el COMMIT
+
+
+def test_savepoint_deshecho_no_queda_en_cache(cliente):
+    def _trabajo(conn):
+        conn.execute("SAVEPOINT prueba")
+        resolver_entidad(conn, "Exportadora Deshecha")
+        conn.execute("ROLLBACK TO prueba")
+        conn.execute("RELEASE prueba")
+    escritor.ejecutar(_trabajo)
+    assert cache_entidades.obtener("exportadora deshecha") is None
+    id_entidad = escritor.ejecutar(lambda conn: resolver_entidad(conn, "Exportadora Deshecha"))
+    assert cache_entidades.obtener("exportadora deshecha") == id_entidad
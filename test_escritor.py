@@ -0,0 +1,62 @@
+# ==test_escritor.py #074
+# Hilo escritor único: ni un trabajo que termina la transacción ni un error interno deben matar el hilo.
+import pytest
+
+from base_datos.escritor import EscritorUnico
+
+
+@pytest.fixture
+def escritor_prueba(tmp_path):
+    escritor = EscritorUnico(str(tmp_path / "escritor.db"), ventana_ms=200)
+    escritor.ejecutar(lambda conn: conn.execute("CREATE TABLE datos (valor INTEGER)"))
+    yield escritor
+    escritor.detener()
+
+
+def _insertar(valor):
+    return lambda conn: conn.execute("INSERT INTO datos (valor) VALUES (?)", (valor,)).lastrowid
+
+
+def test_error_normal_solo_deshace_su_trabajo(escritor_prueba):
+    def fallar(conn):
+        conn.execute("INSERT INTO datos (valor) VALUES (99)")
+        raise ValueError("falla")
+
+    futuros = [escritor_prueba.enviar(_insertar(1)), escritor_prueba.enviar(fallar), escritor_prueba.enviar(_insertar(2))]
+    assert futuros[0].result(5) and futuros[2].result(5)
+    with pytest.raises(ValueError):
+        futuros[1].result(5)
+    assert escritor_prueba.ejecutar(lambda conn: [tuple(f) for f in conn.execute("SELECT valor FROM datos ORDER BY valor")]) == [(1,), (2,)]
+
+
+def test_trabajo_que_hace_commit_no_mata_el_hilo(escritor_prueba):
+    futuros = [
+        escritor_prueba.enviar(_insertar(1)),
+        escritor_prueba.enviar(lambda conn: conn.execute("COMMIT")),
+        escritor_prueba.enviar(_insertar(2)),
+    ]
+    # Todo el lote falla (con un error, no esperando para siempre)
+    for futuro in futuros:
+        assert futuro.exception(timeout=5) is not None
+    # El hilo sigue vivo y la conexión sigue usable
+    assert escritor_prueba.ejecutar(_insertar(3)) is not None
+    assert escritor_prueba.ejecutar(lambda conn: conn.in_transaction) is True
+
+
+def test_error_inesperado_del_lote_resuelve_los_futuros(escritor_prueba, monkeypatch):
+    procesar_original = escritor_prueba._procesar_lote
+
+    def procesar_con_falla(conn, lote):
+        conn.execute("BEGIN IMMEDIATE")
+        for _, futuro in lote:
+            futuro.set_running_or_notify_cancel()
+        raise RuntimeError("falla interna")
+
+    monkeypatch.setattr(escritor_prueba, "_procesar_lote", procesar_con_falla)
+    futuro = escritor_prueba.enviar(_insertar(1))
+    assert isinstance(futuro.exception(timeout=5), RuntimeError)
+
+    monkeypatch.setattr(escritor_prueba, "_procesar_lote", procesar_original)
+    assert escritor_prueba._hilo.is_alive()
+    assert escritor_prueba.ejecutar(_insertar(2)) is not None
+    assert escritor_prueba.ejecutar(lambda conn: [tuple(f) for f in conn.execute("SELECT valor FROM datos")]) == [(2,)]
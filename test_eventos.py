@@ -0,0 +1,77 @@
+# ==test_eventos.py #063
+# Eventos SSE de solicitudes: publicación tras el COMMIT, reenvío desde Last-Event-ID y autorización.
+import asyncio
+
+import pytest
+
+from admin.eventos import BusEventos, bus_solicitudes
+from admin.solicitudes import flujo_eventos
+
+
+def test_historial_y_reenvio():
+    async def _probar():
+        bus = BusEventos(max_historial=3)
+        suscriptor, pendientes, completo = bus.suscribir()
+        assert (pendientes, completo) == ([], True)
+        for i in range(5):
+            bus.publicar("solicitud_creada", {"id_solicitud": i})
+        recibidos = [await suscriptor.cola.get() for _ in range(5)]
+        assert [e.id for e in recibidos] == [1, 2, 3, 4, 5]
+
+        assert recibidos[0].como_sse().startswith(f"id: {bus.epoca}-1\n")
+
+        _, pendientes, completo = bus.suscribir(ultimo_id=f"{bus.epoca}-3")
+        assert [e.id for e in pendientes] == [4, 5] and completo
+        _, pendientes, completo = bus.suscribir(ultimo_id=f"{bus.epoca}-1")  # Ya salió del historial
+        assert not completo
+        _, pendientes, completo = bus.suscribir(ultimo_id=f"{bus.epoca}-99")
+        assert not completo
+        _, pendientes, completo = bus.suscribir(ultimo_id="5")  # Formato anterior o inválido
+        assert not completo
+        assert bus.estadisticas()["suscriptores"] == 5
+    asyncio.run(_probar())
+
+
+def test_id_de_antes_de_un_reinicio_pide_recargar():
+    async def _probar():
+        anterior = BusEventos()
+        for i in range(5):
+            anterior.publicar("solicitud_creada", {"id_solicitud": i})
+        id_viejo = f"{anterior.epoca}-5"
+        # Proceso nuevo que ya publicó más eventos que el id viejo: el 5 existe, pero es otro
+        reiniciado = BusEventos()
+        for i in range(8):
+            reiniciado.publicar("solicitud_creada", {"id_solicitud": i})
+        _, pendientes, completo = reiniciado.suscribir(ultimo_id=id_viejo)
+        assert (pendientes, completo) == ([], False)
+    asyncio.run(_probar())
+
+
+def test_solicitud_nueva_llega_al_flujo(cliente):
+    ultimo = bus_solicitudes.estadisticas()["ultimo_id"]
+    assert cliente.post("/registro/solicitar_acceso", json={
+        "nombre_completo": "Eventos", "email_corporativo": "eventos@exportadora.hn",
+        "nombre_exportadora": "Exportadora Eventos", "clave_exportador": "EV1",
+    }).status_code == 201
+
+    async def _leer():
+        async def conectado():
+            return False
+        flujo = flujo_eventos(f"{bus_solicitudes.epoca}-{ultimo}", conectado, intervalo_ping=0.05)
+        partes = [await flujo.__anext__() for _ in range(3)]  # retry, evento, ping
+        await flujo.aclose()
+        return partes
+
+    retry, evento, ping = asyncio.run(_leer())
+    assert retry.startswith("retry:") and ping == ": ping\n\n"
+    assert evento.startswith(f"id: {bus_solicitudes.epoca}-{ultimo + 1}\nevent: solicitud_creada\n")
+    assert '"email": "eventos@exportadora.hn"' in evento and '"estado": "PENDIENTE"' in evento
+    assert bus_solicitudes.estadisticas()["suscriptores"] == 0  # Se desuscribe al cerrar
+
+
+@pytest.mark.parametrize("cabeceras_admin", [2], indirect=True)  # Usuario sin rol de administrador
+def test_eventos_requiere_admin(cliente, cabeceras_admin):
+    assert cliente.get("/admin/solicitudes/eventos").status_code == 401
+    assert cliente.get("/admin/solicitudes/eventos", params={"token": "x.y.z"}).status_code == 401
+    token = cabeceras_admin["Authorization"].removeprefix("Bearer ")
+    assert cliente.get("/admin/solicitudes/eventos", params={"token": token}).status_code == 403
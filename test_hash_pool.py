@@ -0,0 +1,44 @@
+# ==test_hash_pool.py #049
+# Pool acotado de bcrypt: admisión (429 + Retry-After) y métricas de espera / duración.
+import threading
+
+import pytest
+
+from auth.hash_pool import PoolHash, PoolSaturado
+
+
+@pytest.fixture
+def pool_ocupado():
+    """Pool de 1 hilo sin cola, con su único hilo bloqueado hasta el final de la prueba."""
+    pool = PoolHash(workers=1, max_cola=0)
+    liberar = threading.Event()
+    bloqueo = pool.enviar(liberar.wait)
+    yield pool
+    liberar.set()
+    bloqueo.result()
+    pool.cerrar()
+
+
+def test_admision_y_metricas(pool_ocupado):
+    with pytest.raises(PoolSaturado) as error:
+        pool_ocupado.enviar(sum, [1, 2])
+    assert error.value.reintentar_en >= 1
+    forzado = pool_ocupado.enviar(sum, [1, 2], forzar=True)  # Las operaciones administrativas esperan
+    metricas = pool_ocupado.metricas()
+    assert (metricas["pendientes"], metricas["rechazados"]) == (2, 1)
+
+    pool = PoolHash(workers=2, max_cola=4)
+    assert [pool.ejecutar(pow, 2, n) for n in range(3)] == [1, 2, 4]
+    metricas = pool.metricas()
+    assert metricas["completados"] == 3 and metricas["pendientes"] == 0
+    assert metricas["hash_ms_promedio"] is not None and metricas["espera_ms_p95"] is not None
+    pool.cerrar()
+
+
+def test_login_saturado_responde_429(cliente, pool_ocupado, monkeypatch):
+    monkeypatch.setattr("auth.login.pool_hash", pool_ocupado)
+    from usuarios.crud import crear_usuario
+    crear_usuario("Login Saturado", "saturado@exportadora.hn", "$2b$12$" + "x" * 53, 2, 1)
+    respuesta = cliente.post("/login/", json={"email": "saturado@exportadora.hn", "contraseña": "x"})
+    assert respuesta.status_code == 429
+    assert int(respuesta.headers["retry-after"]) >= 1
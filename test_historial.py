@@ -0,0 +1,67 @@
+# ==test_historial.py #038
+# Historial de cierres en memoria: orden, reemplazo, NULL como NaN y coherencia con la base.
+import math
+from datetime import date
+
+import pytest
+
+from base_datos.conexion import obtener_conexion
+from base_datos.escritor import escritor
+from modulo_cierre.historial import HistorialCierres, historial
+
+
+def _registro(id_registro, fecha, tasa=None, precio=None):
+    return {"id_registro": id_registro, "fecha": fecha, "tasa_cambio_bch": tasa, "precio_usd_saco": precio,
+            "fuente_precio": "ICE Futures", "fuente_tasa": "BCH", "fecha_registro": "2030-01-01 00:00:00"}
+
+
+def test_actualizar_mantiene_orden_y_reemplaza():
+    h = HistorialCierres()
+    h.actualizar(_registro(2, "2030-01-08", tasa=25.0), {})
+    h.actualizar(_registro(1, "2030-01-06", tasa=24.0), {"2030-03": 190.0})
+    h.actualizar(_registro(3, "2030-01-07"), {})
+    h.actualizar(_registro(2, "2030-01-08", tasa=25.5), {})  # Reemplaza la misma fecha
+
+    assert len(h) == 3
+    assert h.ultimo()["tasa_cambio_bch"] == 25.5
+    assert h.por_fecha(date(2030, 1, 6))["posiciones"] == {"2030-03": 190.0}
+    assert h.por_fecha(date(2030, 1, 7))["tasa_cambio_bch"] is None
+    assert h.por_fecha(date(2030, 1, 9)) is None
+    assert [r["id_registro"] for r in h.rango(date(2030, 1, 7), date(2030, 1, 31))] == [3, 2]
+    fechas, tasas = h.serie("tasa_cambio_bch", hasta=date(2030, 1, 7))
+    assert list(fechas) == [date(2030, 1, 6).toordinal(), date(2030, 1, 7).toordinal()]
+    assert tasas[0] == 24.0 and math.isnan(tasas[1])
+
+
+def test_upsert_actualiza_historial_de_la_aplicacion(cliente):
+    assert historial.cargado
+    version = historial.version
+    respuesta = cliente.post("/cierre_ny_bch/", json={"fecha": "2033-06-01", "tasa_cambio_bch": 27.25,
+                                                      "posiciones": {"2033-09": 210.0}})
+    assert respuesta.status_code == 201
+    assert historial.version > version
+    assert cliente.get("/cierre_ny_bch/por_fecha/2033-06-01").json() == respuesta.json()
+
+    # La copia en memoria coincide con una carga fresca desde la base
+    with obtener_conexion() as conn:
+        fresco = HistorialCierres()
+        fresco.cargar(conn)
+    assert fresco.rango() == historial.rango()
+
+
+def test_acciones_posteriores_solo_si_el_trabajo_se_confirma():
+    ejecutadas = []
+
+    def trabajo_fallido(conn):
+        escritor.despues_del_commit(lambda: ejecutadas.append("fallido"))
+        raise ValueError("falla a propósito")
+
+    def trabajo_exitoso(conn):
+        escritor.despues_del_commit(lambda: ejecutadas.append("exitoso"))
+
+    with pytest.raises(ValueError):
+        escritor.ejecutar(trabajo_fallido)
+    escritor.ejecutar(trabajo_exitoso)
+    assert ejecutadas == ["exitoso"]
+    with pytest.raises(RuntimeError):
+        escritor.despues_del_commit(lambda: None)
@@ -0,0 +1,66 @@
+# ==test_importacion_cierres.py #067
+# Importación masiva de cierres desde CSV: conteos, rechazos, reemplazo de posiciones e historial.
+import io
+from datetime import date
+
+import pytest
+
+from modulo_cierre.historial import historial
+from modulo_cierre.importacion import importar_cierres, leer_encabezado
+
+
+def _importar(cliente, texto: str):
+    return cliente.post("/cierre_ny_bch/importar",
+                        files={"archivo": ("cierres.csv", io.BytesIO(texto.encode("utf-8-sig")), "text/csv")})
+
+
+def test_encabezado():
+    encabezado = leer_encabezado(["Fecha", "tasa_cambio_bch", "dic24", "precio_posicion_mar25", "2025-05"])
+    assert encabezado.indices == {"fecha": 0, "tasa_cambio_bch": 1}
+    assert encabezado.posiciones == [(2, "2024-12"), (3, "2025-03"), (4, "2025-05")]
+    with pytest.raises(ValueError, match="desconocida"):
+        leer_encabezado(["fecha", "precio"])
+    with pytest.raises(ValueError, match="repetida"):
+        leer_encabezado(["fecha", "dic24", "2024-12"])
+    with pytest.raises(ValueError, match="fecha"):
+        leer_encabezado(["tasa_cambio_bch"])
+
+
+def test_importar_inserta_actualiza_y_rechaza(cliente):
+    respuesta = _importar(cliente, (
+        "fecha,precio_usd_saco,tasa_cambio_bch,2045-03,2045-05\n"
+        "2045-01-02,210.5,26.1,205.0,206.0\n"
+        "2045-01-03,,26.2,207.0,\n"
+        "2045-01-03,212.0,26.3,208.0,\n"      # Repetida en el archivo: gana esta
+        "2045-02-30,1,1,1,1\n"
+        "2045-01-04,-5,26.4,,\n"
+        "\n"
+        "2045-01-05,213,x,,\n"
+    ))
+    assert respuesta.status_code == 200
+    resumen = respuesta.json()
+    assert (resumen["insertados"], resumen["actualizados"], resumen["rechazados"]) == (2, 1, 3)
+    assert [e["linea"] for e in resumen["errores"]] == [5, 6, 8]
+
+    cierre = cliente.get("/cierre_ny_bch/por_fecha/2045-01-03").json()
+    assert (cierre["precio_usd_saco"], cierre["tasa_cambio_bch"]) == (212.0, 26.3)
+    assert cierre["posiciones"] == {"2045-03": 208.0}
+    assert historial.por_fecha(date(2045, 1, 2))["posiciones"] == {"2045-03": 205.0, "2045-05": 206.0}
+
+    # Reimportar reemplaza el cierre completo de la fecha, como el POST
+    resumen = _importar(cliente, "fecha,tasa_cambio_bch,2045-05\n2045-01-02,26.9,207.5\n").json()
+    assert (resumen["insertados"], resumen["actualizados"]) == (0, 1)
+    cierre = cliente.get("/cierre_ny_bch/por_fecha/2045-01-02").json()
+    assert cierre["precio_usd_saco"] is None and cierre["posiciones"] == {"2045-05": 207.5}
+
+
+def test_lotes_pequenos_y_errores_de_archivo(cliente):
+    lineas = ["fecha,tasa_cambio_bch\n"] + [f"2046-01-{dia:02d},27.{dia}\n" for dia in range(1, 29)]
+    resultado = importar_cierres(iter(lineas), tamaño_lote=5)
+    assert (resultado.insertados, resultado.rechazados) == (28, 0)
+    assert cliente.get("/cierre_ny_bch/por_fecha/2046-01-28").json()["tasa_cambio_bch"] == 27.28
+
+    assert _importar(cliente, "").status_code == 400
+    assert _importar(cliente, "dia,tasa\n").status_code == 400
+    assert cliente.post("/cierre_ny_bch/importar",
+                        files={"archivo": ("c.csv", b"fecha\n\xff\xfe\n", "text/csv")}).status_code == 400
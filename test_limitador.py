@@ -0,0 +1,94 @@
+# ==test_limitador.py #051
+# Limitador de /login: cubetas por email e IP, espera progresiva, bloqueo y backends.
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+import auth.limitador as limitador
+from auth.limitador import BackendMemoria, BackendSQLite, LimitadorLogin, LimiteExcedido
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    """Reloj manual para el módulo del limitador."""
+    ahora = [1_000_000.0]
+    monkeypatch.setattr(limitador, "time", SimpleNamespace(time=lambda: ahora[0]))
+    return ahora
+
+
+@pytest.fixture(params=["memoria", "sqlite"])
+def limitador_login(request, reloj):
+    if request.param == "sqlite":
+        request.getfixturevalue("cliente")  # Base migrada y escritor en marcha
+        return LimitadorLogin(BackendSQLite())
+    return LimitadorLogin(BackendMemoria())
+
+
+def test_cubeta_por_email(limitador_login, reloj):
+    email = f"cubeta.{uuid.uuid4().hex}@cafe.hn"
+    for _ in range(5):
+        limitador_login.admitir(email, None)
+    with pytest.raises(LimiteExcedido) as error:
+        limitador_login.admitir(email.upper(), None)  # Misma cuenta
+    assert 55 <= error.value.reintentar_en <= 60
+    reloj[0] += 60
+    limitador_login.admitir(email, None)
+
+
+def test_login_exitoso_no_gasta_la_cubeta_del_email(limitador_login, reloj):
+    email = f"varios.equipos.{uuid.uuid4().hex}@cafe.hn"
+    for _ in range(20):  # Más que la capacidad de la cuenta, todos correctos
+        limitador_login.admitir(email, None)
+        limitador_login.registrar_exito(email)
+    limitador_login.admitir(email, None)
+
+    ip = f"ip-{uuid.uuid4().hex}"
+    for _ in range(30):  # La cubeta de la IP sí se gasta, aunque los logins sean correctos
+        limitador_login.admitir(email, ip)
+        limitador_login.registrar_exito(email)
+    with pytest.raises(LimiteExcedido):
+        limitador_login.admitir(email, ip)
+
+
+def test_espera_progresiva_bloqueo_y_exito(limitador_login, reloj):
+    email, ip = f"fallos.{uuid.uuid4().hex}@cafe.hn", f"ip-{uuid.uuid4().hex}"
+    for _ in range(3):
+        limitador_login.registrar_fallo(email, ip)
+    with pytest.raises(LimiteExcedido) as error:
+        limitador_login.admitir(email, ip)
+    assert error.value.reintentar_en == 1
+    reloj[0] += 1
+    limitador_login.admitir(email, ip)
+
+    for _ in range(7):
+        limitador_login.registrar_fallo(email, ip)
+    reloj[0] += limitador.ESPERA_MAXIMA  # Más que cualquier espera progresiva
+    with pytest.raises(LimiteExcedido) as error:  # 10 fallos: bloqueo de 15 minutos
+        limitador_login.admitir(email, ip)
+    assert error.value.reintentar_en == 15 * 60 - limitador.ESPERA_MAXIMA
+
+    limitador_login.registrar_exito(email)
+    limitador_login.admitir(email, ip)
+
+
+def test_purga_de_claves_vencidas(reloj):
+    backend = BackendMemoria(purgar_cada=10)
+    limitador_login = LimitadorLogin(backend)
+    for i in range(9):
+        limitador_login.admitir(f"u{i}@cafe.hn", None)
+    reloj[0] += 3600
+    limitador_login.admitir("otro@cafe.hn", None)
+    assert len(backend) == 1
+
+
+def test_login_rechazado_antes_de_buscar_al_usuario(cliente, monkeypatch):
+    monkeypatch.setattr("auth.login.limitador_login", LimitadorLogin(BackendMemoria()))
+    busquedas = []
+    monkeypatch.setattr("auth.login.obtener_usuario_por_email", lambda email: busquedas.append(email))
+    codigos = [
+        cliente.post("/login/", json={"email": "victima@exportadora.hn", "contraseña": f"x{i}"}).status_code
+        for i in range(6)
+    ]
+    assert codigos[:3] == [401, 401, 401] and codigos[-1] == 429
+    assert len(busquedas) == 3  # Desde el tercer fallo ya hay espera: ni base ni bcrypt
@@ -0,0 +1,131 @@
+# ==test_migraciones.py #033
+# Motor de migraciones: versión en PRAGMA user_version, idempotencia y
+# reconstrucción de tablas por lotes sin perder escrituras concurrentes.
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from base_datos.migraciones import (
+    aplicar_migraciones, version_esperada, columnas_tabla, reconstruir_tabla_en_linea,
+)
+
+# Forma de cierre_ny_ice_bch en la base de producción (columnas agregadas con ALTER TABLE)
+CIERRE_PRODUCCION = '''
+    CREATE TABLE cierre_ny_ice_bch (
+        id_registro INTEGER PRIMARY KEY AUTOINCREMENT,
+        fecha DATE NOT NULL UNIQUE,
+        precio_usd_saco REAL,
+        mes_embarque TEXT,
+        posicion_ice TEXT,
+        tasa_cambio_bch REAL,
+        fuente_precio TEXT DEFAULT "ICE Futures",
+        fuente_tasa TEXT DEFAULT "Banco Central de Honduras",
+        fecha_registro DATETIME DEFAULT CURRENT_TIMESTAMP
+    , precio_posicion_dic24 REAL, precio_posicion_mar25 REAL)
+'''
+
+
+def _version(db):
+    with sqlite3.connect(db) as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def test_base_nueva_queda_en_la_ultima_version(tmp_path):
+    db = str(tmp_path / "nueva.db")
+    assert aplicar_migraciones(db) == version_esperada()
+    assert _version(db) == version_esperada()
+    # Volver a ejecutar no hace nada
+    assert aplicar_migraciones(db) == version_esperada()
+
+
+def test_base_mas_nueva_que_el_codigo_falla(tmp_path):
+    db = str(tmp_path / "futura.db")
+    with sqlite3.connect(db) as conn:
+        conn.execute(f"PRAGMA user_version = {version_esperada() + 1}")
+    with pytest.raises(RuntimeError):
+        aplicar_migraciones(db)
+
+
+def test_cierre_de_produccion_se_reconstruye_sin_perder_datos(tmp_path):
+    db = str(tmp_path / "produccion.db")
+    with sqlite3.connect(db) as conn:
+        conn.execute(CIERRE_PRODUCCION)
+        conn.execute(
+            "INSERT INTO cierre_ny_ice_bch (fecha, precio_usd_saco, tasa_cambio_bch, precio_posicion_mar25) "
+            "VALUES ('2025-04-07', 180.5, 25.6, 181.0)"
+        )
+    aplicar_migraciones(db)
+    with sqlite3.connect(db) as conn:
+        conn.row_factory = sqlite3.Row
+        fila = conn.execute("SELECT * FROM cierre_ny_ice_bch").fetchone()
+        posiciones = [tuple(f) for f in conn.execute("SELECT fecha, contrato, precio FROM cierre_posiciones")]
+        ancha = conn.execute("SELECT * FROM cierre_ny_ice_bch_ancho").fetchone()
+        columnas = columnas_tabla(conn, "cierre_ny_ice_bch")
+    assert (fila["id_registro"], fila["precio_usd_saco"], fila["tasa_cambio_bch"]) == (1, 180.5, 25.6)
+    assert not [c for c in columnas if c.startswith("precio_posicion_")]
+    # Las posiciones pasaron al formato largo y la vista conserva la forma anterior
+    assert posiciones == [("2025-04-07", "2025-03", 181.0)]
+    assert (ancha["precio_posicion_mar25"], ancha["precio_posicion_dic24"]) == (181.0, None)
+
+
+def test_reconstruccion_por_lotes_incluye_escrituras_concurrentes(tmp_path):
+    db = str(tmp_path / "lotes.db")
+    conn = sqlite3.connect(db, isolation_level=None)
+    conn.execute("CREATE TABLE datos (id INTEGER PRIMARY KEY, valor INTEGER, doble INTEGER GENERATED ALWAYS AS (valor * 2) STORED)")
+    conn.executemany("INSERT INTO datos (valor) VALUES (?)", [(i,) for i in range(1, 101)])
+    otra = sqlite3.connect(db, isolation_level=None)  # La aplicación escribiendo entre lotes
+    lotes = []
+
+    def escribir_entre_lotes(copiadas):
+        lotes.append(copiadas)
+        if len(lotes) == 1:
+            otra.execute("UPDATE datos SET valor = -1 WHERE id = 5")     # Fila ya copiada
+            otra.execute("DELETE FROM datos WHERE id = 90")              # Fila aún sin copiar
+            otra.execute("INSERT INTO datos (valor) VALUES (1000)")
+
+    reconstruir_tabla_en_linea(
+        conn, "datos",
+        "CREATE TABLE {tabla} (id INTEGER PRIMARY KEY, valor INTEGER NOT NULL, "
+        "doble INTEGER GENERATED ALWAYS AS (valor * 2) STORED, extra TEXT)",
+        indices=[("idx_datos_valor", "valor")],
+        lote=30, progreso=escribir_entre_lotes,
+    )
+    assert len(lotes) > 1
+    assert conn.execute("SELECT COUNT(*) FROM datos").fetchone()[0] == 100
+    assert conn.execute("SELECT valor, doble FROM datos WHERE id = 5").fetchone() == (-1, -2)
+    assert conn.execute("SELECT 1 FROM datos WHERE id = 90").fetchone() is None
+    assert conn.execute("SELECT 1 FROM datos WHERE valor = 1000").fetchone() is not None
+    assert "extra" in columnas_tabla(conn, "datos")
+    restos = conn.execute("SELECT name FROM sqlite_master WHERE name LIKE 'datos__%'").fetchall()
+    assert restos == []
+    assert conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'idx_datos_valor'").fetchone()
+
+
+def test_migraciones_en_linea_concurrentes_se_aplican_una_vez(tmp_path, capsys):
+    db = str(tmp_path / "concurrente.db")
+    with sqlite3.connect(db) as conn:
+        conn.execute(CIERRE_PRODUCCION)
+        conn.executemany(
+            "INSERT INTO cierre_ny_ice_bch (fecha, tasa_cambio_bch, precio_posicion_mar25) VALUES (?, 25.0, 180.0)",
+            [(f"{2000 + i // 366:04d}-{i % 366:03d}",) for i in range(20000)],
+        )
+    barrera = threading.Barrier(2)
+
+    def iniciar_proceso():
+        barrera.wait()
+        return aplicar_migraciones(db)
+
+    with ThreadPoolExecutor(max_workers=2) as ejecutor:
+        versiones = list(ejecutor.map(lambda _: iniciar_proceso(), range(2)))
+
+    assert versiones == [version_esperada()] * 2
+    salida = capsys.readouterr().out
+    assert salida.count("Migración 003 aplicada") == 1 and salida.count("Migración 004 aplicada") == 1
+    with sqlite3.connect(db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM cierre_ny_ice_bch").fetchone()[0] == 20000
+        assert conn.execute("SELECT COUNT(*) FROM cierre_posiciones").fetchone()[0] == 20000
+        assert conn.execute("SELECT COUNT(*) FROM migraciones_en_curso").fetchone()[0] == 0
+        restos = conn.execute("SELECT name FROM sqlite_master WHERE instr(name, 'cierre_ny_ice_bch__') = 1").fetchall()
+        assert restos == []
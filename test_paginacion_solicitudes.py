@@ -0,0 +1,49 @@
+# ==test_paginacion_solicitudes.py #057
+# /admin/solicitudes: paginación por cursor, filtros y total en caché por versión.
+from admin.solicitudes import conteos_solicitudes
+
+
+def _solicitar(cliente, i):
+    assert cliente.post("/registro/solicitar_acceso", json={
+        "nombre_completo": f"Paginación {i}", "email_corporativo": f"paginacion{i}@exportadora.hn",
+        "nombre_exportadora": f"Exportadora Paginación {i}", "clave_exportador": f"PG{i}",
+    }).status_code == 201
+
+
+def test_recorrido_por_cursor(cliente, cabeceras_admin):
+    for i in range(7):
+        _solicitar(cliente, i)
+    total = cliente.get("/admin/solicitudes/pendientes", headers=cabeceras_admin).json()["total"]
+
+    vistas, cursor = [], None
+    while True:
+        params = {"limite": 3, **({"cursor": cursor} if cursor else {})}
+        pagina = cliente.get("/admin/solicitudes/pendientes", headers=cabeceras_admin, params=params).json()
+        assert pagina["total"] == total and len(pagina["solicitudes"]) <= 3
+        vistas += [(s["fecha_solicitud"], s["id_solicitud"]) for s in pagina["solicitudes"]]
+        cursor = pagina["siguiente"]
+        if cursor is None:
+            break
+    assert len(vistas) == total == len(set(vistas))
+    assert vistas == sorted(vistas, reverse=True)  # Más recientes primero, sin saltos ni repetidos
+
+
+def test_total_en_cache_hasta_que_cambia_la_tabla(cliente, cabeceras_admin):
+    pendientes = lambda: cliente.get("/admin/solicitudes/pendientes", headers=cabeceras_admin, params={"limite": 1}).json()
+    total = pendientes()["total"]
+    aciertos = conteos_solicitudes.aciertos
+    assert pendientes()["total"] == total
+    assert conteos_solicitudes.aciertos == aciertos + 1
+    _solicitar(cliente, "nueva")
+    assert pendientes()["total"] == total + 1  # La inserción aumentó la versión
+
+
+def test_filtros_y_errores(cliente, cabeceras_admin):
+    listar = lambda **params: cliente.get("/admin/solicitudes/", headers=cabeceras_admin, params=params)
+    assert listar(tipo_entidad="GESTOR").json()["total"] == 0
+    assert listar(desde="2000-01-01", hasta="2000-12-31").json()["solicitudes"] == []
+    assert listar(estado="PENDIENTE", tipo_entidad="EXPORTADOR").json()["total"] >= 7
+    assert listar(estado="BORRADOR").status_code == 400
+    assert listar(desde="2025-02-01", hasta="2025-01-01").status_code == 400
+    assert listar(cursor="no-es-un-cursor").status_code == 400
+    assert listar(limite=1000).status_code == 422
@@ -0,0 +1,136 @@
+# ==test_planes_consulta.py #031
+# Regresión de planes de consulta: ejecuta los flujos de todos los routers, captura cada
+# sentencia SQL que llega a SQLite y falla si alguna recorre completa una tabla de datos.
+import re
+
+import pytest
+
+import base_datos.conexion as conexion
+import base_datos.escritor as modulo_escritor
+from base_datos.migraciones import INDICES
+from base_datos.escritor import escritor
+
+FECHA = "2025-04-07"
+
+# Consultas que recorren la tabla a propósito (con la razón)
+PERMITIDAS = (
+    # Semilla de base_datos/secuencias.py: se ejecuta una sola vez por ámbito
+    "SELECT MAX(CAST(registro AS INTEGER)) FROM registro_compras_nacionales",
+    # auth/revocacion.py: tabla pequeña, se recarga completa solo cuando cambia su versión
+    "SELECT id_usuario, revocado_desde FROM tokens_revocados",
+)
+
+_SCAN_COMPLETO = re.compile(r"^SCAN (\w+)$")
+
+
+@pytest.fixture
+def consultas_capturadas(monkeypatch):
+    """Abre conexiones nuevas (pool y escritor) que registran cada sentencia ejecutada."""
+    capturadas = []
+    abrir_original = conexion.abrir_conexion
+
+    def abrir_con_traza(*args, **kwargs):
+        conn = abrir_original(*args, **kwargs)
+        conn.set_trace_callback(capturadas.append)
+        return conn
+
+    escritor.detener()
+    monkeypatch.setattr(conexion, "abrir_conexion", abrir_con_traza)
+    monkeypatch.setattr(modulo_escritor, "abrir_conexion", abrir_con_traza)
+    monkeypatch.setattr(conexion, "pool", conexion.PoolConexiones(conexion.DB_NAME))
+    yield capturadas
+    escritor.detener()
+
+
+def _ejercitar_routers(cliente, cabeceras):
+    """Recorre los endpoints de todos los routers con datos válidos."""
+    assert cliente.post("/cierre_ny_bch/", json={"fecha": FECHA, "tasa_cambio_bch": 24.8, "posiciones": {"2025-05": 150.0}}).status_code == 201
+    cliente.get("/cierre_ny_bch/ultimo")
+    cliente.get(f"/cierre_ny_bch/por_fecha/{FECHA}")
+    cliente.get("/cierre_ny_bch/")
+    cliente.get(f"/cierre_ny_bch/tasa/{FECHA}")
+    cliente.get("/cierre_ny_bch/tasas", params={"fechas": [FECHA, "2025-04-05"], "politica": "interpolada"})
+    cliente.get("/cierre_ny_bch/posiciones", params={"contrato_desde": "2025-03", "contrato_hasta": "2025-12", "desde": FECHA})
+    cliente.get("/cierre_ny_bch/serie", params={"contrato": "2025-05", "agregacion": "semana", "desde": "2025-01-01", "sma": 2})
+
+    registro = {"fecha": FECHA, "exp_qic": "048", "cosecha": "2024-2025",
+                "sacos46l": 3.0, "valorlemp": 300.0, "sacos46c": 1.0, "valorelemp": 100.0}
+    creado = cliente.post("/registro_compras_nac/", json=registro)
+    assert creado.status_code == 201
+    cliente.get("/registro_compras_nac/proximo_reg_compa", params={"exp_qic": "048"})
+    cliente.get("/registro_compras_nac/por_fecha", params={"fecha": FECHA, "exp_qic": "048"})
+    cliente.post("/registro_compras_nac/calcular_detalle_pago", json=registro)
+    cliente.get("/registro_compras_nac/")
+    cliente.get(f"/registro_compras_nac/{creado.json()['registros'][0]['id_registro']}")
+
+    compra = cliente.post("/compras_nacionales/", json={"fecha_compra": FECHA, "tipo_cafe": "Lavado", "numero_sacos": 2, "precio_por_saco": 3500.0})
+    assert compra.status_code == 201
+    cliente.get("/compras_nacionales/")
+    cliente.get(f"/compras_nacionales/por_fecha/{FECHA}")
+    cliente.get(f"/compras_nacionales/{compra.json()['id_compra']}")
+
+    for i in range(2):
+        cliente.post("/registro/solicitar_acceso", json={
+            "nombre_completo": f"Planes {i}", "email_corporativo": f"planes{i}@exportadora.hn",
+            "nombre_exportadora": "Exportadora Planes", "clave_exportador": f"P{i}",
+        })
+    cliente.post("/login/", json={"email": "nadie@exportadora.hn", "contraseña": "x"})
+
+    pendientes = cliente.get("/admin/solicitudes/pendientes", headers=cabeceras).json()["solicitudes"]
+    ids = [s["id_solicitud"] for s in pendientes if s["email"].startswith("planes")]
+    pagina = cliente.get("/admin/solicitudes/pendientes", headers=cabeceras,
+                         params={"tipo_entidad": "EXPORTADOR", "desde": "2020-01-01", "limite": 1}).json()
+    cliente.get("/admin/solicitudes/pendientes", headers=cabeceras, params={"limite": 1, "cursor": pagina["siguiente"]})
+    cliente.get("/admin/solicitudes/", headers=cabeceras, params={"hasta": "2100-01-01", "limite": 1, "cursor": pagina["siguiente"]})
+    cliente.get(f"/admin/solicitudes/{ids[0]}", headers=cabeceras)
+    cliente.get("/admin/solicitudes/buscar", headers=cabeceras, params={"q": "planes", "estado": "PENDIENTE", "limite": 1})
+    assert cliente.post(f"/admin/solicitudes/{ids[0]}/aprobar", headers=cabeceras).status_code == 201
+    assert cliente.post(f"/admin/solicitudes/{ids[1]}/rechazar", headers=cabeceras).status_code == 200
+    cliente.post("/registro/solicitar_acceso", json={
+        "nombre_completo": "Planes Lote", "email_corporativo": "planes.lote@exportadora.hn",
+        "nombre_exportadora": "Exportadora Planes", "clave_exportador": "PL",
+    })
+    id_lote = max(s["id_solicitud"] for s in cliente.get("/admin/solicitudes/pendientes", headers=cabeceras).json()["solicitudes"])
+    assert cliente.post("/admin/solicitudes/bulk", headers=cabeceras, json={"acciones": [
+        {"id_solicitud": id_lote, "accion": "aprobar"}, {"id_solicitud": ids[0], "accion": "rechazar"},
+    ]}).status_code == 200
+
+    id_usuario = escritor.ejecutar_sql("""
+        INSERT INTO usuarios (nombre_completo, email, contraseña_hash, id_rol, id_entidad)
+        VALUES ('Usuario Planes', 'usuario.planes@exportadora.hn', 'x', 2, 1)
+    """)
+    assert cliente.post(f"/admin/usuarios/{id_usuario}/revocar_sesiones", headers=cabeceras).status_code == 200
+    assert cliente.post(f"/admin/usuarios/{id_usuario}/desactivar", headers=cabeceras).status_code == 200
+    assert cliente.post(f"/admin/usuarios/{id_usuario}/activar", headers=cabeceras).status_code == 200
+
+
+def _recorridos_completos(sql: str):
+    with conexion.obtener_conexion() as conn:
+        plan = conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall()
+    return [fila[3] for fila in plan if _SCAN_COMPLETO.match(fila[3])]
+
+
+def test_ninguna_consulta_de_los_routers_recorre_una_tabla_completa(cliente, cabeceras_admin, consultas_capturadas):
+    _ejercitar_routers(cliente, cabeceras_admin)
+
+    sentencias = {
+        " ".join(sql.split())
+        for sql in consultas_capturadas
+        if re.match(r"\s*(SELECT|UPDATE|DELETE)\b", sql, re.IGNORECASE)
+    }
+    assert sentencias, "No se capturó ninguna consulta"
+
+    fallas = {}
+    for sql in sentencias:
+        if any(sql.startswith(permitida) for permitida in PERMITIDAS):
+            continue
+        recorridos = _recorridos_completos(sql)
+        if recorridos:
+            fallas[sql] = recorridos
+    assert not fallas, "Consultas con recorrido completo:\n" + "\n".join(f"{k}\n  -> {v}" for k, v in fallas.items())
+
+
+def test_indices_administrados_existen():
+    with conexion.obtener_conexion() as conn:
+        existentes = {fila[0] for fila in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {nombre for nombre, _, _ in INDICES} <= existentes
@@ -0,0 +1,84 @@
+# ==test_secuencias.py #028
+# Pruebas del asignador de números reg_compa (base_datos/secuencias.py).
+from concurrent.futures import ThreadPoolExecutor
+
+from base_datos.conexion import obtener_conexion
+from base_datos.escritor import escritor
+from base_datos.secuencias import ambito_reg_compa, reservar_rango, semilla_reg_compa, siguiente_numero, valor_actual
+
+FECHA = "2025-03-03"
+
+
+def _registro(exp_qic: str, cosecha: str = "2024-2025"):
+    return {
+        "fecha": FECHA,
+        "exp_qic": exp_qic,
+        "cosecha": cosecha,
+        "sacos46l": 10.0,
+        "valorlemp": 1000.0,
+        "sacos46c": 5.0,
+        "valorelemp": 500.0,
+    }
+
+
+def test_posts_concurrentes_no_duplican_numeros(cliente):
+    respuesta = cliente.post("/cierre_ny_bch/", json={"fecha": FECHA, "tasa_cambio_bch": 24.75})
+    assert respuesta.status_code == 201
+
+    def crear(i):
+        return cliente.post("/registro_compras_nac/", json=_registro(f"{i % 7:03d}"))
+
+    with ThreadPoolExecutor(max_workers=16) as ejecutor:
+        respuestas = list(ejecutor.map(crear, range(80)))
+
+    assert all(r.status_code == 201 for r in respuestas), [r.text for r in respuestas if r.status_code != 201]
+    numeros = [r.json()["reg_compa"].split("/")[0] for r in respuestas]
+    assert len(set(numeros)) == len(numeros)
+
+    # Lavado y Corriente de una misma petición comparten número; entre peticiones no se repite
+    with obtener_conexion() as conn:
+        filas = conn.execute("""
+            SELECT registro, COUNT(DISTINCT reg_compa) FROM registro_compras_nacionales
+            WHERE fecha = ? GROUP BY registro
+        """, (FECHA,)).fetchall()
+    assert all(fila[1] == 1 for fila in filas)
+
+
+def test_reserva_de_rango_no_se_solapa():
+    ambito = ambito_reg_compa("999", "2030-2031")
+    rango = escritor.ejecutar(lambda conn: reservar_rango(conn, ambito, 100))
+    siguiente = escritor.ejecutar(lambda conn: siguiente_numero(conn, ambito))
+    assert len(rango) == 100
+    assert siguiente == rango.stop
+
+
+def test_ambitos_independientes():
+    a = ambito_reg_compa("111", "2024-2025")
+    b = ambito_reg_compa("222", "2024-2025")
+    escritor.ejecutar(lambda conn: siguiente_numero(conn, a))
+    escritor.ejecutar(lambda conn: siguiente_numero(conn, a))
+    assert escritor.ejecutar(lambda conn: siguiente_numero(conn, b)) == 1
+    with obtener_conexion() as conn:
+        assert valor_actual(conn, a) == 2
+
+
+def test_peticion_rechazada_no_consume_numero(cliente):
+    assert cliente.post("/cierre_ny_bch/", json={"fecha": FECHA, "tasa_cambio_bch": 24.75}).status_code == 201
+    assert cliente.post("/registro_compras_nac/", json=_registro("333")).status_code == 201
+    ambito = ambito_reg_compa()
+    with obtener_conexion() as conn:
+        antes = valor_actual(conn, ambito)
+    assert antes > 0
+    vacio = {**_registro("333"), "sacos46l": 0.0, "valorlemp": 0.0, "sacos46c": 0.0, "valorelemp": 0.0}
+    assert cliente.post("/registro_compras_nac/", json=vacio).status_code == 400
+    with obtener_conexion() as conn:
+        assert valor_actual(conn, ambito) == antes
+
+
+def test_semilla_sin_cosecha_parte_del_maximo_existente():
+    escritor.ejecutar_sql("""
+        INSERT INTO registro_compras_nacionales (reg_compa, registro, exp_qic, cosecha, fecha, clase)
+        VALUES ('0041/444', '41', '444', NULL, ?, 'Lavado')
+    """, (FECHA,))
+    ambito = ambito_reg_compa("444")
+    assert escritor.ejecutar(lambda conn: siguiente_numero(conn, ambito, semilla_reg_compa("444"))) == 42
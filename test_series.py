@@ -0,0 +1,63 @@
+# ==test_series.py #069
+# GET /cierre_ny_bch/serie: OHLC por período y medias móviles en una pasada.
+import math
+from datetime import date
+
+import pytest
+
+from modulo_cierre.series import agregar, inicio_periodo, media_exponencial, media_simple
+
+
+def _o(texto):
+    return date.fromisoformat(texto).toordinal()
+
+
+def test_agregar_por_semana_y_mes():
+    puntos = [(_o("2047-01-01"), 10.0), (_o("2047-01-02"), 12.0), (_o("2047-01-03"), math.nan),
+              (_o("2047-01-07"), 9.0), (_o("2047-01-08"), 11.0), (_o("2047-02-04"), 20.0)]
+    assert date.fromordinal(inicio_periodo(_o("2047-01-10"), "semana")).weekday() == 0
+    semanas = agregar(puntos, "semana")
+    assert semanas.fechas == ["2046-12-31", "2047-01-07", "2047-02-04"]
+    assert (semanas.apertura, semanas.maximo, semanas.minimo, semanas.cierre, semanas.dias) == (
+        [10.0, 9.0, 20.0], [12.0, 11.0, 20.0], [10.0, 9.0, 20.0], [12.0, 11.0, 20.0], [2, 2, 1])
+    meses = agregar(puntos, "mes")
+    assert meses.fechas == ["2047-01-01", "2047-02-01"] and meses.dias == [4, 1]
+    assert meses.minimo == [9.0, 20.0] and meses.cierre == [11.0, 20.0]
+    with pytest.raises(ValueError):
+        agregar(puntos, "anio")
+
+
+def test_medias_moviles():
+    valores = [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert media_simple(valores, 3) == [None, None, 2.0, 3.0, 4.0]
+    ema = media_exponencial(valores, 3)
+    assert ema[:2] == [None, None] and ema[2] == 2.0
+    assert ema[3] == pytest.approx(3.0) and ema[4] == pytest.approx(4.0)
+    assert media_exponencial([1.0], 3) == [None]
+    # EMA por la fórmula recursiva directa
+    assert media_exponencial([2.0, 4.0, 10.0], 2)[2] == pytest.approx(3.0 + (2 / 3) * (10.0 - 3.0))
+
+
+def test_endpoint_serie(cliente):
+    for dia, precio, tasa in [("2047-03-04", 200.0, 27.0), ("2047-03-05", 205.0, 27.1),
+                              ("2047-03-11", 199.0, 27.2), ("2047-03-13", 210.0, None)]:
+        assert cliente.post("/cierre_ny_bch/", json={"fecha": dia, "tasa_cambio_bch": tasa,
+                                                      "posiciones": {"2047-05": precio}}).status_code == 201
+
+    serie = cliente.get("/cierre_ny_bch/serie", params={
+        "contrato": "may47", "agregacion": "semana", "desde": "2047-03-01", "hasta": "2047-03-31", "sma": 2, "ema": 2,
+    }).json()
+    assert serie["serie"] == "2047-05" and serie["fechas"] == ["2047-03-04", "2047-03-11"]
+    assert serie["apertura"] == [200.0, 199.0] and serie["maximo"] == [205.0, 210.0] and serie["cierre"] == [205.0, 210.0]
+    assert serie["sma"] == [None, 207.5] and serie["ema"] == [None, 207.5]
+
+    tasas = cliente.get("/cierre_ny_bch/serie", params={"campo": "tasa_cambio_bch", "desde": "2047-03-01",
+                                                        "hasta": "2047-03-31"}).json()
+    assert tasas["fechas"] == ["2047-03-04", "2047-03-05", "2047-03-11"]  # La tasa NULL no es un punto
+    assert tasas["sma"] is None and tasas["cierre"] == [27.0, 27.1, 27.2]
+
+    assert cliente.get("/cierre_ny_bch/serie", params={"agregacion": "hora"}).status_code == 400
+    assert cliente.get("/cierre_ny_bch/serie", params={"contrato": "2047-13"}).status_code == 400
+    assert cliente.get("/cierre_ny_bch/serie", params={"campo": "fuente_tasa"}).status_code == 400
+    assert cliente.get("/cierre_ny_bch/serie", params={"desde": "2047-04-01", "hasta": "2047-03-01"}).status_code == 400
+    assert cliente.get("/cierre_ny_bch/serie", params={"sma": 0}).status_code == 422
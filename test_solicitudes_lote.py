@@ -0,0 +1,99 @@
+# ==test_solicitudes_lote.py #059
+# POST /admin/solicitudes/bulk: resultados por id, entidades compartidas y errores aislados.
+from base_datos.conexion import obtener_conexion
+from base_datos.escritor import escritor
+
+
+def _solicitar(cliente, email, organizacion):
+    assert cliente.post("/registro/solicitar_acceso", json={
+        "nombre_completo": f"Lote {email}", "email_corporativo": email,
+        "nombre_exportadora": organizacion, "clave_exportador": "L1",
+    }).status_code == 201
+    with obtener_conexion() as conn:
+        return conn.execute("SELECT id_solicitud FROM solicitudes_registro WHERE email = ?", (email,)).fetchone()[0]
+
+
+def test_lote_mixto(cliente, cabeceras_admin):
+    a = _solicitar(cliente, "lote.a@exportadora.hn", "Exportadora Lote Compartida")
+    b = _solicitar(cliente, "lote.b@exportadora.hn", "Exportadora Lote Compartida")
+    c = _solicitar(cliente, "lote.c@exportadora.hn", "Exportadora Lote C")
+    d = _solicitar(cliente, "lote.d@exportadora.hn", "Exportadora Lote D")
+    # El email de 'd' ya tiene usuario: su aprobación falla sin afectar a las demás
+    escritor.ejecutar_sql("""
+        INSERT INTO usuarios (nombre_completo, email, contraseña_hash, id_rol) VALUES ('Ya existe', ?, 'x', 2)
+    """, ("lote.d@exportadora.hn",))
+
+    respuesta = cliente.post("/admin/solicitudes/bulk", headers=cabeceras_admin, json={"acciones": [
+        {"id_solicitud": a, "accion": "aprobar"},
+        {"id_solicitud": b, "accion": "aprobar"},
+        {"id_solicitud": c, "accion": "rechazar", "motivo": "Clave inválida"},
+        {"id_solicitud": d, "accion": "aprobar"},
+        {"id_solicitud": 10**9, "accion": "aprobar"},
+    ]})
+    assert respuesta.status_code == 200
+    cuerpo = respuesta.json()
+    assert (cuerpo["aprobadas"], cuerpo["rechazadas"], cuerpo["fallidas"]) == (2, 1, 2)
+    por_id = {r["id_solicitud"]: r for r in cuerpo["resultados"]}
+    assert [r["id_solicitud"] for r in cuerpo["resultados"]] == [a, b, c, d, 10**9]
+    assert not por_id[d]["ok"] and not por_id[10**9]["ok"]
+
+    with obtener_conexion() as conn:
+        estados = dict(conn.execute(f"SELECT id_solicitud, estado FROM solicitudes_registro WHERE id_solicitud IN ({a}, {b}, {c}, {d})").fetchall())
+        entidades = {conn.execute("SELECT id_entidad FROM usuarios WHERE id_usuario = ?", (por_id[i]["id_usuario_creado"],)).fetchone()[0] for i in (a, b)}
+        creadas_d = conn.execute("SELECT COUNT(*) FROM entidades WHERE nombre = 'Exportadora Lote D'").fetchone()[0]
+    assert estados == {a: "APROBADA", b: "APROBADA", c: "RECHAZADA", d: "PENDIENTE"}
+    assert len(entidades) == 1  # Misma organización, una sola entidad
+    assert creadas_d == 0       # La entidad de 'd' se deshizo junto con su usuario
+
+    # Repetir el lote: ya nada está pendiente
+    repetido = cliente.post("/admin/solicitudes/bulk", headers=cabeceras_admin, json={"acciones": [{"id_solicitud": a, "accion": "aprobar"}]})
+    assert repetido.json()["fallidas"] == 1
+
+
+def test_lote_invalido(cliente, cabeceras_admin):
+    enviar = lambda acciones: cliente.post("/admin/solicitudes/bulk", headers=cabeceras_admin, json={"acciones": acciones})
+    assert enviar([{"id_solicitud": 1, "accion": "aprobar"}, {"id_solicitud": 1, "accion": "rechazar"}]).status_code == 400
+    assert enviar([]).status_code == 422
+    assert enviar([{"id_solicitud": 1, "accion": "archivar"}]).status_code == 422
+
+
+def test_bloque_fallido_se_informa_por_id(cliente, cabeceras_admin, monkeypatch):
+    import admin.solicitudes as solicitudes
+    a = _solicitar(cliente, "lote.e@exportadora.hn", "Exportadora Lote E")
+    b = _solicitar(cliente, "lote.f@exportadora.hn", "Exportadora Lote Falla")
+    resolver_original = solicitudes.resolver_entidad
+
+    def _resolver(conn, nombre):
+        if nombre == "Exportadora Lote Falla":
+            raise RuntimeError("disco lleno")
+        return resolver_original(conn, nombre)
+    # Un bloque por solicitud: el segundo falla con un error inesperado y solo se deshace su SAVEPOINT
+    monkeypatch.setattr(solicitudes, "TAMAÑO_BLOQUE", 1)
+    monkeypatch.setattr(solicitudes, "resolver_entidad", _resolver)
+
+    respuesta = cliente.post("/admin/solicitudes/bulk", headers=cabeceras_admin, json={"acciones": [
+        {"id_solicitud": a, "accion": "aprobar"},
+        {"id_solicitud": b, "accion": "aprobar"},
+    ]})
+    assert respuesta.status_code == 200
+    cuerpo = respuesta.json()
+    assert (cuerpo["aprobadas"], cuerpo["fallidas"]) == (1, 1)
+    fallida = cuerpo["resultados"][1]
+    assert fallida["id_solicitud"] == b and not fallida["ok"] and "disco lleno" in fallida["mensaje"]
+    with obtener_conexion() as conn:
+        estados = dict(conn.execute(f"SELECT id_solicitud, estado FROM solicitudes_registro WHERE id_solicitud IN ({a}, {b})").fetchall())
+    assert estados == {a: "APROBADA", b: "PENDIENTE"}
+
+
+def test_un_solo_hash_por_lote(cliente, cabeceras_admin, monkeypatch):
+    import admin.solicitudes as solicitudes
+    ids = [_solicitar(cliente, f"lote.hash{i}@exportadora.hn", "Exportadora Lote Hash") for i in range(3)]
+    llamadas = []
+    hash_original = solicitudes.hash_password
+    monkeypatch.setattr(solicitudes, "hash_password", lambda c: llamadas.append(c) or hash_original(c))
+
+    respuesta = cliente.post("/admin/solicitudes/bulk", headers=cabeceras_admin, json={"acciones": [
+        {"id_solicitud": i, "accion": "aprobar"} for i in ids
+    ]})
+    assert respuesta.json()["aprobadas"] == 3
+    assert len(llamadas) == 1  # La contraseña temporal es la misma: se calcula una vez
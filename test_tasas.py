@@ -0,0 +1,60 @@
+# ==test_tasas.py #040
+# Tasa de cambio "a una fecha": políticas exacta / anterior / interpolada, lotes y
+# la misma respuesta desde el historial en memoria o desde SQL.
+from datetime import date
+
+import pytest
+
+from base_datos.conexion import obtener_conexion
+from modulo_cierre import tasas
+from modulo_cierre.historial import historial
+
+VIERNES, SABADO, LUNES = "2034-03-03", "2034-03-04", "2034-03-06"
+
+
+@pytest.fixture(scope="module")
+def fin_de_semana(cliente):
+    """Tasas publicadas el viernes y el lunes; nada el fin de semana."""
+    cliente.post("/cierre_ny_bch/", json={"fecha": VIERNES, "tasa_cambio_bch": 25.0})
+    cliente.post("/cierre_ny_bch/", json={"fecha": "2034-03-05", "precio_usd_saco": 200.0})  # Sin tasa
+    cliente.post("/cierre_ny_bch/", json={"fecha": LUNES, "tasa_cambio_bch": 25.3})
+    return cliente
+
+
+def test_politicas(fin_de_semana):
+    cliente = fin_de_semana
+    anterior = cliente.get(f"/cierre_ny_bch/tasa/{SABADO}").json()
+    assert (anterior["fecha_tasa"], anterior["tasa_cambio_bch"]) == (VIERNES, 25.0)
+    interpolada = cliente.get(f"/cierre_ny_bch/tasa/{SABADO}", params={"politica": "interpolada"}).json()
+    assert interpolada["tasa_cambio_bch"] == pytest.approx(25.1)
+    assert cliente.get(f"/cierre_ny_bch/tasa/{SABADO}", params={"politica": "exacta"}).status_code == 404
+    assert cliente.get(f"/cierre_ny_bch/tasa/{LUNES}", params={"politica": "exacta"}).json()["tasa_cambio_bch"] == 25.3
+    assert cliente.get(f"/cierre_ny_bch/tasa/{SABADO}", params={"politica": "cercana"}).status_code == 422
+    # Demasiado lejos de la última tasa publicada
+    assert cliente.get("/cierre_ny_bch/tasa/2034-04-30").status_code == 404
+
+
+def test_lote_en_una_llamada(fin_de_semana):
+    filas = fin_de_semana.get("/cierre_ny_bch/tasas", params={"fechas": [LUNES, SABADO, "1990-01-01"]}).json()
+    assert [f["tasa_cambio_bch"] for f in filas] == [25.3, 25.0, None]
+
+
+def test_memoria_y_sql_coinciden(fin_de_semana, monkeypatch):
+    fechas = [date(2034, 3, d) for d in range(1, 12)]
+    with obtener_conexion() as conn:
+        for politica in tasas.POLITICAS:
+            en_memoria = tasas.resolver_tasas(fechas, politica)
+            monkeypatch.setattr(historial, "cargado", False)
+            por_sql = tasas.resolver_tasas(fechas, politica, conn)
+            monkeypatch.setattr(historial, "cargado", True)
+            assert en_memoria == por_sql
+
+
+def test_registro_de_fin_de_semana_usa_tasa_anterior(fin_de_semana):
+    registro = {"fecha": SABADO, "exp_qic": "091", "cosecha": "2033-2034",
+                "sacos46l": 10, "valorlemp": 100, "sacos46c": 0, "valorelemp": 0}
+    detalle = fin_de_semana.post("/registro_compras_nac/calcular_detalle_pago", json=registro).json()
+    assert detalle["tasa_cambio_usd_hnl"] == 25.0
+    exacta = fin_de_semana.post("/registro_compras_nac/calcular_detalle_pago", json=registro,
+                                params={"politica_tasa": "exacta"})
+    assert exacta.status_code == 400
@@ -0,0 +1,142 @@
+# ==usuarios/actividad.py #054
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from config.settings import ACTIVIDAD_INTERVALO
+from base_datos.escritor import escritor
+
+# --- Búfer de ultimo_login / ultima_actividad ---
+# Escribir en usuarios en cada login o petición autenticada agregaría una
+# transacción al camino más usado. En su lugar, cada evento solo actualiza un
+# diccionario en memoria (un valor por usuario: el más reciente) y un hilo lo
+# vuelca cada ACTIVIDAD_INTERVALO segundos en un único trabajo del escritor,
+# con UPDATE por lotes (executemany). Al apagar se vuelca lo pendiente.
+#
+# Si la aplicación se cae entre volcados se pierden a lo sumo ACTIVIDAD_INTERVALO
+# segundos de actividad: aceptable para auditoría, no para facturación.
+
+
+def _formato_db(instante: float) -> str:
+    """Mismo formato (UTC) que CURRENT_TIMESTAMP de SQLite."""
+    return datetime.fromtimestamp(instante, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class BufferActividad:
+    def __init__(self, intervalo: float = ACTIVIDAD_INTERVALO):
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._logins: Dict[int, float] = {}
+        self._actividad: Dict[int, float] = {}
+        self._hilo: Optional[threading.Thread] = None
+        self._alto = threading.Event()
+        # --- Métricas ---
+        self.eventos = 0
+        self.volcados = 0
+        self.filas_escritas = 0
+        self.errores = 0
+        self._ultimo_volcado_ms: Optional[float] = None
+
+    # --- Registro (no toca la base) ---
+
+    def registrar_login(self, id_usuario: int):
+        ahora = time.time()
+        with self._lock:
+            self._logins[id_usuario] = ahora
+            self._actividad[id_usuario] = ahora
+            self.eventos += 1
+        self._asegurar_hilo()
+
+    def registrar_actividad(self, id_usuario: int):
+        ahora = time.time()
+        with self._lock:
+            self._actividad[id_usuario] = ahora
+            self.eventos += 1
+        self._asegurar_hilo()
+
+    # --- Volcado ---
+
+    def volcar(self) -> int:
+        """Escribe lo pendiente en un solo trabajo del escritor. Devuelve las filas actualizadas."""
+        with self._lock:
+            logins, self._logins = self._logins, {}
+            actividad, self._actividad = self._actividad, {}
+        if not actividad:
+            return 0
+
+        # MAX(): otro proceso (u otro worker) pudo escribir un valor más reciente
+        filas_login = [(_formato_db(t), id_usuario) for id_usuario, t in logins.items()]
+        filas_actividad = [(_formato_db(t), id_usuario) for id_usuario, t in actividad.items()]
+
+        def _volcar(conn: sqlite3.Connection) -> int:
+            conn.executemany("""
+                UPDATE usuarios SET ultimo_login = MAX(COALESCE(ultimo_login, ''), ?)
+                WHERE id_usuario = ?
+            """, filas_login)
+            return conn.executemany("""
+                UPDATE usuarios SET ultima_actividad = MAX(COALESCE(ultima_actividad, ''), ?)
+                WHERE id_usuario = ?
+            """, filas_actividad).rowcount
+
+        inicio = time.perf_counter()
+        try:
+            filas = escritor.ejecutar(_volcar)
+        except Exception as e:
+            self._devolver(logins, actividad)
+            with self._lock:
+                self.errores += 1
+            print(f"⚠️ Error al volcar actividad de usuarios: {e}")
+            return 0
+        with self._lock:
+            self.volcados += 1
+            self.filas_escritas += filas
+            self._ultimo_volcado_ms = round((time.perf_counter() - inicio) * 1000, 2)
+        return filas
+
+    def _devolver(self, logins: Dict[int, float], actividad: Dict[int, float]):
+        """Reincorpora un lote que no se pudo escribir (sin pisar eventos más nuevos)."""
+        with self._lock:
+            for pendientes, lote in ((self._logins, logins), (self._actividad, actividad)):
+                for id_usuario, instante in lote.items():
+                    pendientes[id_usuario] = max(instante, pendientes.get(id_usuario, instante))
+
+    # --- Hilo de volcado ---
+
+    def _asegurar_hilo(self):
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        with self._lock:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._alto.clear()
+                self._hilo = threading.Thread(target=self._bucle, name="actividad-usuarios", daemon=True)
+                self._hilo.start()
+
+    def _bucle(self):
+        while not self._alto.wait(self.intervalo):
+            self.volcar()
+
+    def detener(self):
+        """Detiene el hilo y vuelca lo pendiente (al apagar, ANTES de detener el escritor)."""
+        with self._lock:
+            hilo, self._hilo = self._hilo, None
+        self._alto.set()
+        if hilo is not None:
+            hilo.join(self.intervalo + 5)
+        self.volcar()
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {
+                "intervalo_segundos": self.intervalo,
+                "pendientes": len(self._actividad),
+                "eventos": self.eventos,
+                "volcados": self.volcados,
+                "filas_escritas": self.filas_escritas,
+                "errores": self.errores,
+                "ultimo_volcado_ms": self._ultimo_volcado_ms,
+            }
+
+
+actividad_usuarios = BufferActividad()
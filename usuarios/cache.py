@@ -0,0 +1,126 @@
+# ==usuarios/cache.py #046
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from usuarios.modelos import Usuario
+
+# --- Caché de usuarios (LRU + TTL) ---
+# Cada login busca al usuario por email. Esta caché evita ir a SQLite en cada
+# intento. Los registros se indexan por id_usuario; el email apunta al id.
+#
+# Invalidación explícita: quien modifique un usuario (crear_usuario, aprobar_solicitud,
+# desactivar/activar, cambio de contraseña) llama a invalidar() después del COMMIT.
+# El TTL acota cuánto puede durar un dato viejo si alguien cambia la tabla por fuera.
+
+MAX_ENTRADAS = 2048
+TTL_SEGUNDOS = 300.0
+
+
+class CacheUsuarios:
+    def __init__(self, max_entradas: int = MAX_ENTRADAS, ttl: float = TTL_SEGUNDOS):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._por_id: "OrderedDict[int, tuple]" = OrderedDict()  # id -> (expira, Usuario)
+        self._ids_por_email: Dict[str, int] = {}
+        # Cada invalidación aumenta la generación; una carga que empezó antes no se guarda
+        self._generacion = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.expirados = 0
+        self.invalidaciones = 0
+
+    # --- Lectura ---
+
+    def obtener_por_id(self, id_usuario: int, cargar: Callable[[int], Optional[Usuario]]) -> Optional[Usuario]:
+        with self._lock:
+            usuario = self._vigente(id_usuario)
+            generacion = self._generacion
+        if usuario is not None:
+            return usuario
+        usuario = cargar(id_usuario)
+        self._guardar(usuario, generacion)
+        return usuario
+
+    def obtener_por_email(self, email: str, cargar: Callable[[str], Optional[Usuario]]) -> Optional[Usuario]:
+        with self._lock:
+            id_usuario = self._ids_por_email.get(email)
+            usuario = self._vigente(id_usuario) if id_usuario is not None else None
+            if id_usuario is None:
+                self.fallos += 1
+            generacion = self._generacion
+        if usuario is not None:
+            return usuario
+        usuario = cargar(email)
+        self._guardar(usuario, generacion)
+        return usuario
+
+    def _vigente(self, id_usuario: int) -> Optional[Usuario]:
+        """Entrada vigente (y la marca como usada recientemente). Requiere el lock."""
+        entrada = self._por_id.get(id_usuario)
+        if entrada is None:
+            self.fallos += 1
+            return None
+        expira, usuario = entrada
+        if expira < time.monotonic():
+            self.expirados += 1
+            self.fallos += 1
+            self._quitar(id_usuario)
+            return None
+        self._por_id.move_to_end(id_usuario)
+        self.aciertos += 1
+        return usuario
+
+    # --- Escritura ---
+
+    def _guardar(self, usuario: Optional[Usuario], generacion: int):
+        if usuario is None:
+            return
+        with self._lock:
+            if generacion != self._generacion:
+                return  # Hubo una invalidación mientras se leía de la base
+            self._quitar(usuario.id_usuario)
+            self._por_id[usuario.id_usuario] = (time.monotonic() + self.ttl, usuario)
+            self._ids_por_email[usuario.email] = usuario.id_usuario
+            while len(self._por_id) > self.max_entradas:
+                self._quitar(next(iter(self._por_id)))
+
+    def _quitar(self, id_usuario: int):
+        entrada = self._por_id.pop(id_usuario, None)
+        if entrada is not None and self._ids_por_email.get(entrada[1].email) == id_usuario:
+            del self._ids_por_email[entrada[1].email]
+
+    def invalidar(self, id_usuario: Optional[int] = None, email: Optional[str] = None):
+        """Descarta un usuario por id y/o email (llamar después del COMMIT que lo modifica)."""
+        with self._lock:
+            self._generacion += 1
+            self.invalidaciones += 1
+            if email is not None and email in self._ids_por_email:
+                self._quitar(self._ids_por_email[email])
+            if id_usuario is not None:
+                self._quitar(id_usuario)
+
+    def limpiar(self):
+        with self._lock:
+            self._generacion += 1
+            self._por_id.clear()
+            self._ids_por_email.clear()
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._por_id),
+                "max_entradas": self.max_entradas,
+                "ttl_segundos": self.ttl,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "expirados": self.expirados,
+                "invalidaciones": self.invalidaciones,
+                "tasa_aciertos": round(self.aciertos / consultas, 4) if consultas else None,
+            }
+
+
+cache_usuarios = CacheUsuarios()
@@ -2,20 +2,21 @@
 import sqlite3
 from typing import Optional
 from usuarios.modelos import Usuario
-
-DB_NAME = "cafehnd.db"
+from base_datos.conexion import obtener_conexion
+from base_datos.escritor import escritor
+from auth.revocacion import revocar_tokens
+from usuarios.cache import cache_usuarios
 
 def crear_usuario(nombre: str, email: str, contraseña_hash: str, id_rol: int, id_entidad: int = None) -> bool:
     """Crea un nuevo usuario en la base de datos."""
-    try:
-        conn = sqlite3.connect(DB_NAME)
-        cursor = conn.cursor()
-        cursor.execute("""
+    def _crear(conn: sqlite3.Connection):
+        conn.execute("""
             INSERT INTO usuarios (nombre_completo, email, contraseña_hash, id_rol, id_entidad)
             VALUES (?, ?, ?, ?, ?)
         """, (nombre, email, contraseña_hash, id_rol, id_entidad))
-        conn.commit()
-        conn.close()
+        escritor.despues_del_commit(lambda: cache_usuarios.invalidar(email=email))
+    try:
+        escritor.ejecutar(_crear)
         return True
     except sqlite3.IntegrityError:
         # El email ya existe
@@ -25,19 +26,46 @@ def crear_usuario(nombre: str, email: str, contraseña_hash: str, id_rol: int, i
         return False
 
 def obtener_usuario_por_email(email: str) -> Optional[Usuario]:
-    """Busca un usuario por su email."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM usuarios WHERE email = ?", (email,))
-    fila = cursor.fetchone()
-    conn.close()
-    return Usuario.desde_fila_db(fila)
+    """Busca un usuario por su email (a través de la caché de usuarios)."""
+    return cache_usuarios.obtener_por_email(email, _leer_usuario_por_email)
 
 def obtener_usuario_por_id(id_usuario: int) -> Optional[Usuario]:
-    """Busca un usuario por su ID."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM usuarios WHERE id_usuario = ?", (id_usuario,))
-    fila = cursor.fetchone()
-    conn.close()
+    """Busca un usuario por su ID (a través de la caché de usuarios)."""
+    return cache_usuarios.obtener_por_id(id_usuario, _leer_usuario_por_id)
+
+def _leer_usuario_por_email(email: str) -> Optional[Usuario]:
+    with obtener_conexion() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM usuarios WHERE email = ?", (email,))
+        fila = cursor.fetchone()
     return Usuario.desde_fila_db(fila)
+
+def _leer_usuario_por_id(id_usuario: int) -> Optional[Usuario]:
+    with obtener_conexion() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM usuarios WHERE id_usuario = ?", (id_usuario,))
+        fila = cursor.fetchone()
+    return Usuario.desde_fila_db(fila)
+
+def desactivar_usuario(id_usuario: int) -> bool:
+    """
+    Desactiva un usuario e invalida los tokens que ya tenga emitidos.
+    Devuelve False si el usuario no existe.
+    """
+    def _desactivar(conn: sqlite3.Connection) -> bool:
+        cursor = conn.execute("UPDATE usuarios SET activo = 0 WHERE id_usuario = ?", (id_usuario,))
+        if cursor.rowcount == 0:
+            return False
+        revocar_tokens(conn, id_usuario)
+        escritor.despues_del_commit(lambda: cache_usuarios.invalidar(id_usuario))
+        return True
+    return escritor.ejecutar(_desactivar)
+
+def activar_usuario(id_usuario: int) -> bool:
+    """Reactiva un usuario (sus tokens anteriores siguen revocados). False si no existe."""
+    def _activar(conn: sqlite3.Connection) -> bool:
+        if conn.execute("UPDATE usuarios SET activo = 1 WHERE id_usuario = ?", (id_usuario,)).rowcount == 0:
+            return False
+        escritor.despues_del_commit(lambda: cache_usuarios.invalidar(id_usuario))
+        return True
+    return escritor.ejecutar(_activar)
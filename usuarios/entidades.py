@@ -0,0 +1,108 @@
+# ==usuarios/entidades.py #060
+import re
+import sqlite3
+import threading
+import unicodedata
+from typing import Dict, Iterable, Optional
+
+from base_datos.escritor import escritor
+
+# --- Resolución de entidades por nombre ---
+# Las aprobaciones buscan la exportadora por el nombre que escribió el solicitante.
+# "Café Honduras S.A." y "CAFE HONDURAS  s.a." son la misma entidad: la búsqueda se
+# hace por nombre_normalizado (sin tildes, sin mayúsculas, espacios simples), que
+# tiene un índice UNIQUE (migración 9).
+#
+# Los ids se guardan en memoria (nombre_normalizado -> id_entidad), cargados al
+# iniciar. La caché solo recibe ids ya confirmados: crear una entidad registra una
+# acción posterior al COMMIT que vuelve a leerla, así un SAVEPOINT deshecho no deja
+# en memoria el id de una fila que no existe.
+
+_ESPACIOS = re.compile(r"\s+")
+
+
+def normalizar_nombre(nombre: str) -> str:
+    """Clave de comparación de un nombre: sin tildes, en minúsculas y con espacios simples."""
+    sin_tildes = "".join(
+        c for c in unicodedata.normalize("NFKD", nombre) if not unicodedata.combining(c)
+    )
+    return _ESPACIOS.sub(" ", sin_tildes.casefold()).strip()
+
+
+class CacheEntidades:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids: Dict[str, int] = {}
+        self.aciertos = 0
+        self.fallos = 0
+
+    def cargar(self, conn: sqlite3.Connection):
+        filas = conn.execute(
+            "SELECT nombre_normalizado, id_entidad FROM entidades WHERE nombre_normalizado IS NOT NULL"
+        ).fetchall()
+        with self._lock:
+            self._ids = {fila[0]: fila[1] for fila in filas}
+
+    def precargar(self, conn: sqlite3.Connection, nombres: Iterable[str]):
+        """Trae en una consulta (por bloque) los ids de los nombres que no están en memoria."""
+        with self._lock:
+            faltantes = list({normalizar_nombre(n) for n in nombres if n} - self._ids.keys())
+        for inicio in range(0, len(faltantes), 500):
+            bloque = faltantes[inicio:inicio + 500]
+            filas = conn.execute(f"""
+                SELECT nombre_normalizado, id_entidad FROM entidades
+                WHERE nombre_normalizado IN ({",".join("?" * len(bloque))})
+            """, bloque).fetchall()
+            with self._lock:
+                self._ids.update({fila[0]: fila[1] for fila in filas})
+
+    def obtener(self, clave: str) -> Optional[int]:
+        with self._lock:
+            id_entidad = self._ids.get(clave)
+            if id_entidad is None:
+                self.fallos += 1
+            else:
+                self.aciertos += 1
+            return id_entidad
+
+    def guardar(self, clave: str, id_entidad: int):
+        with self._lock:
+            self._ids[clave] = id_entidad
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {"entidades": len(self._ids), "aciertos": self.aciertos, "fallos": self.fallos}
+
+
+cache_entidades = CacheEntidades()
+
+
+def resolver_entidad(conn: sqlite3.Connection, nombre: str, tipo: str = "EXPORTADOR") -> int:
+    """
+    id_entidad del nombre (normalizado); la crea si no existe.
+    Debe ejecutarse dentro de un trabajo del escritor único. Sin carreras: el INSERT
+    ... ON CONFLICT DO NOTHING sobre el índice UNIQUE deja una sola fila aunque dos
+    procesos aprueben a la vez solicitudes de la misma empresa.
+    """
+    clave = normalizar_nombre(nombre or "")
+    if not clave:
+        raise ValueError("El nombre de la entidad está vacío.")
+    id_entidad = cache_entidades.obtener(clave)
+    if id_entidad is not None:
+        return id_entidad
+
+    conn.execute("""
+        INSERT INTO entidades (tipo, nombre, nombre_normalizado) VALUES (?, ?, ?)
+        ON CONFLICT(nombre_normalizado) DO NOTHING
+    """, (tipo, nombre.strip(), clave))
+    id_entidad = conn.execute(
+        "SELECT id_entidad FROM entidades WHERE nombre_normalizado = ?", (clave,)
+    ).fetchone()[0]
+
+    def _confirmar():
+        # Después del COMMIT (hilo escritor): solo se guarda si la fila quedó confirmada
+        fila = conn.execute("SELECT id_entidad FROM entidades WHERE nombre_normalizado = ?", (clave,)).fetchone()
+        if fila is not None:
+            cache_entidades.guardar(clave, fila[0])
+    escritor.despues_del_commit(_confirmar)
+    return id_entidad
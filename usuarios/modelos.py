@@ -34,3 +34,25 @@ class Usuario:
             id_entidad=fila[5],
             activo=bool(fila[6]),
         )
+
+
+class UsuarioToken:
+    """
+    Usuario autenticado tal como lo describen los claims de su JWT
+    (ver auth/seguridad.py). No requiere consultar la base de datos.
+    """
+    def __init__(
+        self,
+        id_usuario: int,
+        email: Optional[str],
+        id_rol: int,
+        rol: str,
+        id_entidad: Optional[int] = None,
+        activo: bool = True,
+    ):
+        self.id_usuario = id_usuario
+        self.email = email
+        self.id_rol = id_rol
+        self.rol = rol
+        self.id_entidad = id_entidad
+        self.activo = activo